@@ -1,8 +1,13 @@
 #!/bin/bash
 # test_data_generator.sh - Test data generation performance
+# (end-to-end CLI timing; for reproducible per-component numbers saved as JSON, run
+#  workshop-assets/data_generator/benchmark.py)
 
 set -e
 
+# Paths below are relative to workshop-assets/
+cd "$(dirname "$0")/workshop-assets"
+
 # Colors
 GREEN='\033[0;32m'
 BLUE='\033[0;34m'
@@ -30,43 +35,14 @@ cleanup_files() {
   rm -f data_generator/backfill_ingest_progress.json
 }
 
-# Function to modify data_sprayer.py to use specific days
-modify_days() {
-  local days=$1
-  echo -e "${YELLOW}Modifying data_sprayer.py to generate ${days} days...${NC}"
-  
-  # Create backup if doesn't exist
-  if [[ ! -f data_generator/data_sprayer.py.backup ]]; then
-    cp data_generator/data_sprayer.py data_generator/data_sprayer.py.backup
-  fi
-  
-  # Modify line 160 (timedelta days)
-  if [[ "$OSTYPE" == "darwin"* ]]; then
-    # macOS
-    sed -i '' "s/timedelta(days=[0-9]*)/timedelta(days=${days})/" data_generator/data_sprayer.py
-  else
-    # Linux
-    sed -i "s/timedelta(days=[0-9]*)/timedelta(days=${days})/" data_generator/data_sprayer.py
-  fi
-  
-  # Verify change
-  if grep -q "timedelta(days=${days})" data_generator/data_sprayer.py; then
-    echo -e "${GREEN}✓ Set to ${days} days${NC}"
-  else
-    echo -e "${YELLOW}⚠ Could not verify change${NC}"
-  fi
-}
-
-# Function to restore original
-restore_original() {
-  if [[ -f data_generator/data_sprayer.py.backup ]]; then
-    mv data_generator/data_sprayer.py.backup data_generator/data_sprayer.py
-    echo -e "${GREEN}✓ Restored original data_sprayer.py${NC}"
-  fi
-}
-
-# Trap to ensure cleanup on exit
-trap restore_original EXIT
+# The chunk workers serialize with templates instead of json.dumps - check they still agree
+echo -e "${GREEN}Checking the template serializer against json.dumps...${NC}"
+(cd data_generator && python3 check_serializer.py) 2>&1 | tee -a "$RESULTS_FILE"
+if [ "${PIPESTATUS[0]}" -ne 0 ]; then
+  echo -e "${YELLOW}⚠ Serializer check failed - fix the templates before timing the generator${NC}" | tee -a "$RESULTS_FILE"
+  exit 1
+fi
+echo "" | tee -a "$RESULTS_FILE"
 
 echo -e "${BLUE}Starting tests (generation only - no ES ingestion)...${NC}\n"
 
@@ -80,9 +56,6 @@ for days in "${DAYS_TO_TEST[@]}"; do
   # Clean up previous run
   cleanup_files
   
-  # Modify script for this test
-  modify_days $days
-  
   # Calculate expected documents
   SECONDS_IN_DAYS=$((days * 86400))
   SERVICES=4
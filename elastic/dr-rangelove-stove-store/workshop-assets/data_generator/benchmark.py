@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the data sprayer - reproducible replacement for timing the CLI by hand.
+
+Each case runs in its own process (so peak RSS is per case) with a fixed seed and start time:
+- generate_python / generate_numpy: chunk worker throughput, docs per CPU second (= per core)
+- serialize: ns per document for the template serializer lines (and json.dumps of the same docs for reference)
+- merge: chunk file merge throughput (append_file)
+- ingest: client CPU per 10K docs through the _bulk pipeline against fake_es.py (optionally with faults)
+- cli: end-to-end --generate-only run, docs/sec and peak RSS across all its processes
+
+Results are saved as JSON named after data_sprayer.VERSION, so runs before and after a
+VERSION bump can be compared with --compare.
+
+Usage:
+  python3 benchmark.py                                   # all cases -> benchmark_results/<VERSION>-<time>.json
+  python3 benchmark.py --cases serialize,merge --repeat 5
+  python3 benchmark.py --compare benchmark_results/<old>.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import data_sprayer as ds
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS_PATH = os.path.join(SCRIPT_DIR, "scenarios.json")
+RESULTS_DIR = os.path.join(SCRIPT_DIR, "benchmark_results")
+
+SEED = 42
+START_TIME = "2026-01-01T00:00:00+00:00"
+INGEST_BATCH_DOCS = 5000  # Docs per _bulk request in the ingest case
+MERGE_BLOCK_BYTES = 1024 * 1024
+
+# Metrics compared by --compare; anything else is informational
+LOWER_IS_BETTER = ("_ns", "_ms_per_10k_docs", "_rss_mb")
+HIGHER_IS_BETTER = ("_per_second",)
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size (ru_maxrss is KB on Linux, bytes on macOS)"""
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def best_of(repeat: int, run: Callable[[], Dict[str, Any]], key: str) -> Dict[str, Any]:
+    """Run `run` repeat times and keep the result with the lowest `key` (a time)"""
+    return min((run() for _ in range(repeat)), key=lambda result: result[key])
+
+
+def generated_lines(seconds: int) -> List[str]:
+    """Dataset lines for the first `seconds` of the benchmark dataset"""
+    table = ds.ScenarioTable(ds.DataSprayer._load_worker_scenarios(SCENARIOS_PATH))
+    lines = []
+    for _, block in ds.DataSprayer._iter_chunk_blocks("python", 0, seconds, datetime.fromisoformat(START_TIME), table, SEED):
+        lines.extend(block)
+    return lines
+
+
+# --- Cases (each runs in a child process, stdout discarded) ---
+
+def case_generate(engine: str, args, work_dir: str) -> Dict[str, Any]:
+    if engine == "numpy" and ds.np is None:
+        return {"skipped": "numpy not installed"}
+    output_file = os.path.join(work_dir, "generate.jsonl")
+
+    def run():
+        cpu, wall = time.process_time(), time.perf_counter()
+        chunk_output, _, chunk_index = ds.DataSprayer._generate_chunk_worker(
+            engine, 0, 0, args.seconds, START_TIME, output_file, SCENARIOS_PATH, SEED)
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+        os.remove(chunk_output)
+        return {"cpu_s": cpu, "wall_s": wall, "docs": chunk_index["docs"], "bytes": chunk_index["bytes"]}
+
+    result = best_of(args.repeat, run, "cpu_s")
+    return {
+        "docs": result["docs"],
+        "cpu_s": round(result["cpu_s"], 3),
+        "docs_per_cpu_second": round(result["docs"] / result["cpu_s"]),
+        "mb_per_cpu_second": round(result["bytes"] / result["cpu_s"] / (1024 * 1024), 1),
+    }
+
+
+def case_serialize(args, work_dir: str) -> Dict[str, Any]:
+    # scenarios.json from the script directory - the case runs in an empty scratch directory
+    scenarios = ds.DataSprayer._load_worker_scenarios(SCENARIOS_PATH)
+    sprayer = ds.DataSprayer(None, scenarios)
+    serializer = ds.TemplateSerializer(scenarios)
+    count = args.serialize_docs
+    timestamps = [f"2026-01-01T00:00:{n % 60:02d}+00:00" for n in range(count)]
+    docs = {
+        "healthy": [sprayer._generate_healthy_doc(ts, "trade-service") for ts in timestamps],
+        "payment": [sprayer._generate_healthy_doc(ts, "payment-service") for ts in timestamps],
+        "anomaly": [sprayer._generate_anomaly_doc(ts, scenarios[n % len(scenarios)]) for n, ts in enumerate(timestamps)],
+    }
+    # The same docs as the values the chunk workers format with the templates
+    values = {
+        "healthy": [(d["@timestamp"], d["service.name"], d["http.status_code"], d["latency_ms"], d["log.message"],
+                     int(d["trace.id"][6:]), int(d["span.id"][5:])) for d in docs["healthy"]],
+        "payment": [(d["@timestamp"], d["http.status_code"], d["latency_ms"], d["log.message"], int(d["trace.id"][6:]),
+                     int(d["span.id"][5:]), d["transaction"]["type"], d["transaction"]["amount"], d["transaction"]["status"])
+                    for d in docs["payment"]],
+        "anomaly": [(d["@timestamp"], n % len(scenarios), int(d["trace.id"][6:]), int(d["span.id"][5:]))
+                    for n, d in enumerate(docs["anomaly"])],
+    }
+    templates = {"healthy": serializer.healthy_line, "payment": serializer.payment_line, "anomaly": serializer.anomaly_line}
+
+    def per_doc_ns(fn, items) -> float:
+        def run():
+            start = time.perf_counter()
+            for item in items:
+                fn(item)
+            return {"s": time.perf_counter() - start}
+        return round(best_of(args.repeat, run, "s")["s"] / len(items) * 1e9)
+
+    result = {"docs": count}
+    for kind, kind_docs in docs.items():
+        result[f"{kind}_template_ns"] = per_doc_ns(lambda line_values, line=templates[kind]: line(*line_values), values[kind])
+        result[f"{kind}_json_dumps_ns"] = per_doc_ns(lambda doc: json.dumps(doc) + "\n", kind_docs)
+    return result
+
+
+def case_merge(args, work_dir: str) -> Dict[str, Any]:
+    # Chunk files of real dataset lines, merged the way _generate_to_file_parallel does
+    block = "".join(generated_lines(600)).encode("utf-8")
+    block = (block * (MERGE_BLOCK_BYTES // len(block) + 1))[:MERGE_BLOCK_BYTES]
+    chunk_files = []
+    for chunk_id in range(args.merge_chunks):
+        path = os.path.join(work_dir, f"merge_chunk_{chunk_id}")
+        with open(path, "wb") as f:
+            for _ in range(args.merge_mb // args.merge_chunks):
+                f.write(block)
+        chunk_files.append(path)
+    total = sum(os.path.getsize(path) for path in chunk_files)
+    merged = os.path.join(work_dir, "merged.jsonl")
+
+    def run():
+        start = time.perf_counter()
+        fd = os.open(merged, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            methods = {ds.append_file(fd, path) for path in chunk_files}
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        elapsed = time.perf_counter() - start
+        os.remove(merged)
+        return {"s": elapsed, "methods": sorted(methods)}
+
+    result = best_of(args.repeat, run, "s")
+    return {
+        "chunks": args.merge_chunks,
+        "mb": round(total / (1024 * 1024)),
+        "method": ",".join(result["methods"]),
+        "mb_per_second": round(total / result["s"] / (1024 * 1024)),
+    }
+
+
+def start_fake_es(extra_args: List[str]):
+    """Start fake_es.py on a free port; returns (process, url)"""
+    server = subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, "fake_es.py"), "--port", "0", "--quiet"] + extra_args,
+                              stdout=subprocess.PIPE, text=True)
+    first_line = server.stdout.readline()  # "[Fake ES] Listening on http://127.0.0.1:PORT"
+    if "Listening on " not in first_line:
+        server.kill()
+        raise RuntimeError(f"fake_es.py did not start: {first_line.strip() or 'no output'}")
+    return server, first_line.split("Listening on ", 1)[1].strip()
+
+
+def fake_es_call(url: str, path: str, method: str = "GET") -> Dict[str, Any]:
+    request = urllib.request.Request(url + path, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def case_ingest(args, work_dir: str) -> Dict[str, Any]:
+    from elasticsearch import AsyncElasticsearch
+    from elasticsearch.serializer import NdjsonSerializer
+
+    lines = generated_lines(-(-args.ingest_docs // len(ds.SERVICES)))[:args.ingest_docs]
+    bodies = [(ds.bulk_body(lines[i:i + INGEST_BATCH_DOCS]), len(lines[i:i + INGEST_BATCH_DOCS]), i,
+               i + len(lines[i:i + INGEST_BATCH_DOCS])) for i in range(0, len(lines), INGEST_BATCH_DOCS)]
+
+    server, url = start_fake_es(shlex.split(args.fake_es_args))
+
+    async def run_async():
+        es_client = AsyncElasticsearch(hosts=[url], request_timeout=300,
+                                       serializers={NdjsonSerializer.mimetype: ds.PassthroughNdjsonSerializer()})
+        sprayer = ds.DataSprayer(es_client, ds.DataSprayer._load_worker_scenarios(SCENARIOS_PATH))
+        controller = ds.AdaptiveBulkController(concurrency=4, adaptive=False)
+
+        async def source():
+            for batch in bodies:
+                yield batch
+
+        try:
+            await es_client.info()  # Connect outside the measurement
+            fake_es_call(url, "/_fake/reset", "POST")
+            cpu, wall = time.process_time(), time.perf_counter()
+            indexed, failed = await sprayer._ingest_batches(source(), len(lines), controller)
+            cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+        finally:
+            await es_client.close()
+        stats = fake_es_call(url, "/_fake/stats")
+        if indexed + failed != len(lines) or indexed != stats["docs_indexed"]:
+            raise RuntimeError(f"fake_es ingest indexed {indexed:,} of {len(lines):,} docs ({failed:,} failed, "
+                               f"fake_es counted {stats['docs_indexed']:,})")
+        return {"cpu_s": cpu, "wall_s": wall, "failed": failed, "rejected": stats["docs_rejected"]}
+
+    try:
+        result = best_of(args.repeat, lambda: asyncio.run(run_async()), "cpu_s")
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "docs": len(lines),
+        "batch_docs": INGEST_BATCH_DOCS,
+        "docs_failed": result["failed"],
+        "docs_rejected_429": result["rejected"],
+        "cpu_ms_per_10k_docs": round(result["cpu_s"] / len(lines) * 10000 * 1000, 1),
+        "docs_per_second": round(len(lines) / result["wall_s"]),
+    }
+
+
+def case_cli(args, work_dir: str) -> Dict[str, Any]:
+    """End-to-end --generate-only (parallel generation, merge and line index) in its own process tree"""
+    shutil.copy(SCENARIOS_PATH, work_dir)
+    command = [sys.executable, os.path.join(SCRIPT_DIR, "data_sprayer.py"), "--generate-only", "--days", str(args.days),
+               "--seed", str(SEED), "--start-time", START_TIME]
+
+    def run():
+        for name in os.listdir(work_dir):
+            if name.startswith("backfill_"):
+                os.remove(os.path.join(work_dir, name))
+        start = time.perf_counter()
+        subprocess.run(command, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        return {"s": time.perf_counter() - start}
+
+    result = best_of(args.repeat, run, "s")
+    docs = args.days * 86400 * len(ds.SERVICES)
+    return {
+        "days": args.days,
+        "docs": docs,
+        "cpus": os.cpu_count(),
+        "wall_s": round(result["s"], 2),
+        "docs_per_second": round(docs / result["s"]),
+        # ru_maxrss of children: the largest process of the run (parent or any generation worker)
+        "process_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+CASES = {
+    "generate_python": lambda args, work_dir: case_generate("python", args, work_dir),
+    "generate_numpy": lambda args, work_dir: case_generate("numpy", args, work_dir),
+    "serialize": case_serialize,
+    "merge": case_merge,
+    "ingest": case_ingest,
+    "cli": case_cli,
+}
+
+
+def run_case(name: str, args) -> Dict[str, Any]:
+    """Child process entry: run one case in a scratch directory and add its peak RSS"""
+    work_dir = tempfile.mkdtemp(prefix=f"sprayer-bench-{name}-", dir=args.work_dir)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            os.chdir(work_dir)  # Anything the code under test writes stays in the scratch directory
+            result = CASES[name](args, work_dir)
+    finally:
+        os.chdir(SCRIPT_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if "skipped" not in result:
+        result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> int:
+    """Print metric changes between two result files; returns the number of regressions beyond threshold (%)"""
+    print(f"\nComparing {old['version']} ({old['timestamp']}) -> {new['version']} ({new['timestamp']})")
+    regressions = 0
+    for case, metrics in new["cases"].items():
+        for metric, value in metrics.items():
+            before = old["cases"].get(case, {}).get(metric)
+            lower = metric.endswith(LOWER_IS_BETTER)
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or not before:
+                continue
+            if not lower and not metric.endswith(HIGHER_IS_BETTER):
+                continue
+            change = (value - before) / before * 100
+            worse = change > threshold if lower else change < -threshold
+            regressions += worse
+            print(f"  {'⚠️ ' if worse else '  '} {case}.{metric}: {before:,} -> {value:,} ({change:+.1f}%)")
+    print(f"{regressions} regression(s) beyond {threshold:.0f}%" if regressions else f"No regressions beyond {threshold:.0f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data sprayer benchmark suite")
+    parser.add_argument("--cases", default=",".join(CASES),
+                        help=f"Comma-separated cases to run (default: all - {', '.join(CASES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best is kept (default: 3)")
+    parser.add_argument("--seconds", type=int, default=21600,
+                        help="Generate cases: dataset seconds per run (x4 services, default: 21600)")
+    parser.add_argument("--serialize-docs", type=int, default=50000, help="Serialize case: docs per type (default: 50000)")
+    parser.add_argument("--merge-chunks", type=int, default=8, help="Merge case: chunk files (default: 8)")
+    parser.add_argument("--merge-mb", type=int, default=512, help="Merge case: total MB (default: 512)")
+    parser.add_argument("--ingest-docs", type=int, default=200000, help="Ingest case: docs sent (default: 200000)")
+    parser.add_argument("--fake-es-args", default="",
+                        help="Ingest case: extra fake_es.py options, e.g. \"--latency lognormal:20:0.5 --reject-rate 0.01\"")
+    parser.add_argument("--days", type=int, default=1, help="CLI case: --days for --generate-only (default: 1)")
+    parser.add_argument("--work-dir", default=None, help="Scratch directory for generated files (default: system temp)")
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: benchmark_results/<VERSION>-<YYYYmmdd-HHMMSS>.json)")
+    parser.add_argument("--compare", metavar="RESULTS_JSON", default=None,
+                        help="Previous results file to compare against (exit status 1 on regressions)")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="--compare: percent change counted as a regression (default: 10)")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)  # Child process: run one case
+    parser.add_argument("--result-file", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        with open(args.result_file, "w") as f:
+            json.dump(run_case(args.case, args), f)
+        return
+
+    names = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)} (choose from {', '.join(CASES)})")
+
+    print(f"[Benchmark] data_sprayer {ds.VERSION} - Python {platform.python_version()}, {os.cpu_count()} CPUs, "
+          f"numpy {'%s' % ds.np.__version__ if ds.np is not None else 'not installed'}")
+    results = {
+        "version": ds.VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {
+            "hostname": platform.node(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "numpy": ds.np.__version__ if ds.np is not None else None,
+        },
+        "params": {key: getattr(args, key) for key in
+                   ("repeat", "seconds", "serialize_docs", "merge_chunks", "merge_mb", "ingest_docs", "fake_es_args", "days")},
+        "cases": {},
+    }
+
+    child_args = [f"--{key.replace('_', '-')}={value}" for key, value in results["params"].items()]
+    if args.work_dir:
+        try:
+            os.makedirs(args.work_dir, exist_ok=True)  # Cases create their scratch directories inside it
+        except OSError as e:
+            parser.error(f"--work-dir: {e}")
+        child_args.append(f"--work-dir={args.work_dir}")
+    for name in names:
+        print(f"⏱️  {name}...", flush=True)
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_file = f.name
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--case", name, "--result-file", result_file] + child_args,
+                           check=True)
+            with open(result_file) as f:
+                results["cases"][name] = json.load(f)
+        except subprocess.CalledProcessError as e:
+            results["cases"][name] = {"error": f"exit status {e.returncode}"}
+        finally:
+            os.remove(result_file)
+        print(f"   {json.dumps(results['cases'][name])}", flush=True)
+
+    failed = [name for name, result in results["cases"].items() if "error" in result]
+    if failed:
+        # Never leave a partial result file behind - it could end up being used as a baseline
+        print(f"❌ {len(failed)} case(s) failed: {', '.join(failed)} - results not saved")
+        sys.exit(1)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{ds.VERSION}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), results, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
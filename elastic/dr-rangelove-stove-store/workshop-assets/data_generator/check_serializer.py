@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Serializer check for the data sprayer: the chunk workers write dataset lines with
+TemplateSerializer instead of json.dumps, so its output must stay byte-identical to
+json.dumps(doc) + "\\n" for every document shape the generator produces - healthy docs,
+payment-service docs (also during a business incident) and every scenario in scenarios.json.
+
+Run it after changing the templates or the document schema; exits non-zero on a mismatch.
+test_data_generator.sh runs it before the timing tests, and pytest collects test_serializer_matches_json_dumps.
+
+Usage:
+  python3 check_serializer.py
+  python3 check_serializer.py --samples 1000000
+  python3 -m pytest check_serializer.py
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+import data_sprayer as ds
+
+SCENARIOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.json")
+
+
+def check_serializer(samples: int) -> bool:
+    scenarios = ds.DataSprayer._load_worker_scenarios(SCENARIOS_PATH)
+    sprayer = ds.DataSprayer(None, scenarios)
+    serializer = ds.TemplateSerializer(scenarios)
+    start_time = datetime.now(timezone.utc)
+    mismatches = 0
+
+    def check(expected_doc: Dict[str, Any], line: str):
+        nonlocal mismatches
+        expected = json.dumps(expected_doc) + "\n"
+        if line != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ Mismatch:\n   json.dumps: {expected.rstrip()}\n   template:   {line.rstrip()}")
+
+    for n in range(samples):
+        ts = (start_time + timedelta(seconds=n)).isoformat()
+        service = ds.SERVICES[n % len(ds.SERVICES)]
+
+        healthy = sprayer._generate_healthy_doc(ts, service, business_incident_active=(n % 7 == 0))
+        trace, span = int(healthy["trace.id"][6:]), int(healthy["span.id"][5:])
+        if service == "payment-service":
+            tx = healthy["transaction"]
+            line = serializer.payment_line(ts, healthy["http.status_code"], healthy["latency_ms"], healthy["log.message"],
+                                           trace, span, tx["type"], tx["amount"], tx["status"])
+        else:
+            line = serializer.healthy_line(ts, service, healthy["http.status_code"], healthy["latency_ms"],
+                                           healthy["log.message"], trace, span)
+        check(healthy, line)
+
+        scenario_index = n % len(scenarios)
+        scenario = scenarios[scenario_index]
+        check({
+            "@timestamp": ts,
+            "service.name": scenario["service.name"],
+            "http.status_code": scenario["http.status_code"],
+            "latency_ms": scenario["latency_ms"],
+            "log.message": scenario["log.message"],
+            "trace.id": f"trace-{trace}",
+            "span.id": f"span-{span}"
+        }, serializer.anomaly_line(ts, scenario_index, trace, span))
+
+    total = samples * 2
+    if mismatches:
+        print(f"❌ Serializer check failed: {mismatches:,}/{total:,} lines differ from json.dumps")
+        return False
+    print(f"✅ Serializer check passed: {total:,} lines identical to json.dumps ({len(scenarios)} scenarios)")
+    return True
+
+
+def test_serializer_matches_json_dumps():
+    assert check_serializer(10000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the template serializer output is identical to json.dumps")
+    parser.add_argument("--samples", type=int, default=100000, help="Healthy + anomaly line pairs to check (default: 100000)")
+    args = parser.parse_args()
+    sys.exit(0 if check_serializer(args.samples) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ Supports two modes:
 - --live: Continuous generation with periodic anomaly injection
 """
 
-VERSION = "2026-01-05-v9-streaming-batches"  # Fixed memory issue: stream batches instead of loading all into RAM
+VERSION = "2026-10-18-v11-weighted-scenarios"  # Part of the dataset cache key: bump whenever generated output changes
 
 
 def get_system_memory():
@@ -66,18 +66,42 @@ def log_memory(prefix=""):
 
 import argparse
 import asyncio
+import contextlib
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
 import json
+import mmap
 import os
+import queue
 import random
+import re
+import shutil
 import sys
 import threading
 import time
 import multiprocessing as mp
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
+from aiohttp import web
 from elasticsearch import AsyncElasticsearch
-from elasticsearch.helpers import async_bulk
+from elasticsearch.helpers import BULK_FLUSH, async_bulk, async_streaming_bulk
+from elasticsearch.serializer import NdjsonSerializer
+
+# NumPy is optional - only required for the vectorized generation engine
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# zstandard is optional - only required for --compress zstd / reading .zst datasets
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 
 # Configuration - support both naming conventions
@@ -112,11 +136,1296 @@ HEALTHY_MESSAGES = [
     "Response sent to client"
 ]
 
+# Healthy status code / transaction distributions (shared by all generation engines)
+HEALTHY_STATUS_CODES = [200, 201, 204]
+HEALTHY_STATUS_WEIGHTS = [85, 10, 5]
+TRANSACTION_STATUSES = ["success", "failed", "cancelled"]
+TRANSACTION_STATUS_WEIGHTS = [95, 4, 1]
+TRANSACTION_TYPES = ["payment", "checkout", "order"]
+TRANSACTION_AMOUNT_RANGES = {
+    "payment": (50.0, 500.0),
+    "checkout": (25.0, 350.0),
+    "order": (10.0, 200.0)
+}
+
+# Fallback scenario used by worker processes when scenarios.json is missing
+DEFAULT_SCENARIO = {
+    "name": "Market Data Latency Spike",
+    "service.name": "market-data-feed",
+    "http.status_code": 200,
+    "latency_ms": 3500,
+    "log.message": "WARN: P99 latency > 3000ms",
+    "duration_seconds": 15
+}
+
+# Generation engines selectable with --engine
+# - python: per-document random.* calls (no extra dependencies)
+# - numpy:  vectorized, generates a whole block of seconds per service at once
+ENGINES = ["auto", "python", "numpy"]
+GENERATION_BLOCK_SECONDS = 3600  # Seconds generated per vectorized block (1 hour = 14,400 docs)
+
+
+def resolve_engine(engine: str) -> str:
+    """Resolve the --engine choice to a concrete engine name"""
+    if engine == "auto":
+        return "numpy" if np is not None else "python"
+    if engine == "numpy" and np is None:
+        print("Warning: numpy is not installed - falling back to the python engine (pip install numpy)")
+        return "python"
+    return engine
+
+
+# Reproducible generation: every block of GENERATION_BLOCK_SECONDS has its own random
+# stream derived from (seed, block index), so any time slice can be regenerated
+# byte-for-byte from the seed and start time alone.
+def new_seed() -> int:
+    """Draw a fresh 63-bit seed (logged so the run can be reproduced later)"""
+    return random.SystemRandom().randrange(2**63)
+
+
+def python_block_rng(seed: int, block_index: int) -> random.Random:
+    """Independent random.Random stream for one generation block"""
+    return random.Random(f"{seed}:{block_index}")
+
+
+def numpy_block_rng(seed: int, block_index: int):
+    """Counter-based Philox stream keyed by (seed, block index) - no state shared between blocks"""
+    return np.random.Generator(np.random.Philox(key=(block_index << 64) | (seed & 0xFFFFFFFFFFFFFFFF)))
+
+
+def split_blocks(first_second: int, last_second: int, num_processes: int) -> List[tuple]:
+    """
+    Split seconds [first_second, last_second) into at most num_processes (chunk_id, start, end)
+    ranges aligned to whole generation blocks, so every block's random stream is consumed
+    by exactly one worker.
+    """
+    first_block = first_second // GENERATION_BLOCK_SECONDS
+    total_blocks = (last_second - 1) // GENERATION_BLOCK_SECONDS + 1 - first_block
+    num_processes = min(num_processes, total_blocks)
+    
+    chunks = []
+    for i in range(num_processes):
+        start_second = max(first_second, (first_block + total_blocks * i // num_processes) * GENERATION_BLOCK_SECONDS)
+        if i == num_processes - 1:
+            # Last chunk gets any remainder
+            end_second = last_second
+        else:
+            end_second = (first_block + total_blocks * (i + 1) // num_processes) * GENERATION_BLOCK_SECONDS
+        chunks.append((i, start_second, end_second))
+    return chunks
+
+
+# --summaries: per-service, per-minute rollups computed while generating and sent to a
+# companion index, so long-range views aggregate ~1,440 docs per service-day instead of 86,400
+SUMMARY_INDEX_NAME = "o11y-heartbeat-summary"
+SUMMARY_SUFFIX = ".summary.jsonl"  # Written next to the dataset (backfill_data.jsonl.summary.jsonl)
+SUMMARY_PERCENTILES = [50, 95, 99]
+SUMMARY_BATCH_DOCS = 5000
+
+
+class MinuteSummaries:
+    """
+    Per-service, per-minute rollups of the documents generated for seconds [start_second, end_second)
+    of a dataset starting at start_time. Minutes are calendar minutes of @timestamp, so they do not
+    line up with generation blocks: a worker finalizes the minutes that lie entirely inside its range
+    and hands the partial minutes at its edges over raw (edges), for the parent to merge with the
+    neighbouring worker's half.
+    """
+
+    def __init__(self, start_time: datetime, start_second: int = 0, end_second: int = 0):
+        self.first_minute = start_time.replace(second=0, microsecond=0)
+        self.offset = start_time.second  # Dataset second s falls in minute (s + offset) // 60
+        self.microsecond = start_time.microsecond
+        self.start_second = start_second
+        self.end_second = end_second
+        # (minute, service) -> [latencies, status class counts (index = status // 100),
+        #                       transactions, successful transactions, amount sum, successful amount sum]
+        self.buckets = {}
+        self.lines = []  # Finalized summary docs (JSON lines)
+
+    def add(self, second: int, service: str, latency: float, status: int, tx_status: str = None, amount: float = 0.0,
+            ms: int = 0):
+        if ms:
+            second += (self.microsecond + ms * 1000) // 1000000  # Anomaly docs are stamped a few ms into the second
+        key = ((second + self.offset) // 60, service)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [[], [0] * 6, 0, 0, 0.0, 0.0]
+        bucket[0].append(latency)
+        bucket[1][status // 100] += 1
+        if tx_status is not None:
+            bucket[2] += 1
+            bucket[4] += amount
+            if tx_status == "success":
+                bucket[3] += 1
+                bucket[5] += amount
+
+    def finish(self, upto_second: int = None):
+        """Finalize the minutes that end by upto_second and started inside the range (all minutes if None)"""
+        for key in sorted(self.buckets):
+            minute_start = key[0] * 60 - self.offset
+            if upto_second is not None and (minute_start < self.start_second or minute_start + 60 > upto_second):
+                continue
+            self.lines.append(self._summary_line(key, self.buckets.pop(key)))
+
+    def edges(self) -> Dict[tuple, list]:
+        """Raw buckets of the partial minutes left at the range edges (after finish(end_second))"""
+        return self.buckets
+
+    def merge(self, edges: Dict[tuple, list]):
+        for key, (latencies, classes, tx_count, tx_success, amount, success_amount) in edges.items():
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = [latencies, classes, tx_count, tx_success, amount, success_amount]
+                continue
+            bucket[0].extend(latencies)
+            bucket[1] = [a + b for a, b in zip(bucket[1], classes)]
+            bucket[2] += tx_count
+            bucket[3] += tx_success
+            bucket[4] += amount
+            bucket[5] += success_amount
+
+    def _summary_line(self, key: tuple, bucket: list) -> str:
+        minute, service = key
+        latencies, classes, tx_count, tx_success, amount, success_amount = bucket
+        latencies.sort()
+        count = len(latencies)
+        latency = {"min": latencies[0], "avg": round(sum(latencies) / count, 2), "max": latencies[-1]}
+        for p in SUMMARY_PERCENTILES:
+            latency[f"p{p}"] = latencies[max(0, -(-p * count // 100) - 1)]  # Nearest rank
+        doc = {
+            "@timestamp": (self.first_minute + timedelta(minutes=minute)).isoformat(),
+            "service.name": service,
+            "interval": "1m",
+            "doc_count": count,
+            "latency_ms": latency,
+            "http.status_class": {f"{c}xx": classes[c] for c in (2, 3, 4, 5)},
+        }
+        if tx_count:
+            doc["transaction"] = {
+                "count": tx_count,
+                "success": tx_success,
+                "success_rate": round(tx_success / tx_count, 4),
+                "amount_sum": round(amount, 2),
+                "success_amount_sum": round(success_amount, 2),
+            }
+        return json.dumps(doc) + "\n"
+
+
+def merge_summaries(start_time: datetime, parts: List[tuple]) -> List[str]:
+    """Summary lines of every worker's (lines, edges), followed by the edge minutes merged across workers"""
+    merged = MinuteSummaries(start_time)
+    lines = []
+    for part_lines, edges in parts:
+        lines.extend(part_lines)
+        merged.merge(edges)
+    merged.finish()
+    return lines + merged.lines
+
+
+def summary_body(lines: List[str]) -> bytes:
+    """_bulk body for summary docs - one id per (service, minute), so a resend overwrites instead of duplicating"""
+    parts = []
+    for line in lines:
+        doc = json.loads(line)
+        action = {"index": {"_index": SUMMARY_INDEX_NAME, "_id": f"{doc['service.name']}@{doc['@timestamp']}"}}
+        parts.append(json.dumps(action) + "\n" + line)
+    return "".join(parts).encode("utf-8")
+
+
+# --backfill --stream: generator processes hand ready-made _bulk bodies to the bulk pipeline
+# through a bounded queue instead of a file. A full queue blocks the generators, so
+# Elasticsearch sets the pace.
+STREAM_QUEUE_BATCHES = 4
+
+# Every generated document goes to INDEX_NAME (given in the _bulk URL), so one constant
+# action line can be spliced in front of each raw JSON line - no decode/re-encode.
+# `create` behaves like `index` for auto-generated IDs and is the only op a data stream
+# (setup.py --tsds) accepts.
+BULK_ACTION_LINE = b'{"create":{}}\n'
+
+
+def bulk_body(lines: List) -> bytes:
+    """Build an NDJSON _bulk body from newline-terminated JSON lines (str or bytes)"""
+    if isinstance(lines[0], str):
+        action = BULK_ACTION_LINE.decode()
+        body = (action + action.join(lines)).encode("utf-8")
+    else:
+        body = BULK_ACTION_LINE + BULK_ACTION_LINE.join(lines)
+    if not body.endswith(b"\n"):
+        body += b"\n"  # Last line of a file may lack its newline
+    return body
+
+
+SERIALIZER_FLUSH_BYTES = 8 * 1024 * 1024  # Write generated lines to disk in 8MB blocks
+
+# Dataset compression (--compress). Each chunk worker compresses its own stream; gzip members
+# and zstd frames can simply be concatenated, so the merged file is still one valid stream.
+COMPRESSION_EXTENSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = 3  # ~9x smaller than raw JSONL, much faster than the default level 9
+ZSTD_LEVEL = 3  # ~10x smaller, several times faster than gzip
+
+
+def dataset_filename(base: str, compress: str = "none", output_layout: str = "merged", dataset_format: str = "jsonl") -> str:
+    """Dataset file name for a compression mode/layout/format (e.g. backfill_data.jsonl.zst)"""
+    if dataset_format == "bulk":
+        base = os.path.splitext(base)[0] + ".bulk"
+    name = base + COMPRESSION_EXTENSIONS[compress]
+    return name + MANIFEST_SUFFIX if output_layout == "chunks" else name
+
+
+def check_compression(compress: str):
+    """Exit early if the requested compression needs a module that is not installed"""
+    if compress == "zstd" and zstandard is None:
+        print("Error: --compress zstd requires the zstandard package (pip install zstandard)")
+        sys.exit(1)
+
+
+def open_dataset_writer(path: str, compress: str = "none"):
+    """Open a (possibly compressing) binary writer for generated JSONL"""
+    if os.path.exists(path):
+        os.remove(path)  # Never truncate in place - the old file may be hard-linked into the dataset cache
+    if compress == "gzip":
+        return gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+    if compress == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, "wb"), closefd=True)
+    return open(path, "wb")
+
+
+def open_dataset_reader(path: str, compress: str = None):
+    """
+    Open a dataset for streaming binary line reads, transparently decompressing
+    .gz/.zst files (including multi-member/multi-frame files from parallel workers).
+    A chunks-layout manifest is read as one continuous stream of its parts.
+    """
+    if path.endswith(MANIFEST_SUFFIX):
+        return ChainedDatasetReader(path)
+    if compress is None:
+        compress = next((c for c, ext in COMPRESSION_EXTENSIONS.items() if ext and path.endswith(ext)), "none")
+    if compress == "gzip":
+        return gzip.open(path, "rb")
+    if compress == "zstd":
+        check_compression("zstd")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader, buffer_size=SERIALIZER_FLUSH_BYTES)
+    return open(path, "rb")
+
+
+# Output layouts (--output-layout):
+# - merged: chunk files are spliced into one file inside the kernel (copy_file_range/sendfile);
+#           the first chunk is renamed into place, so it is never copied at all
+# - chunks: no merge phase - a small manifest lists the chunk files in time order and
+#           ingest reads them directly (no second copy of the data on disk)
+OUTPUT_LAYOUTS = ["merged", "chunks"]
+MANIFEST_SUFFIX = ".parts.json"
+COPY_BUFFER = 1024 * 1024 * 10  # 10MB buffer for the user-space copy fallback
+
+
+def chunk_filename(output_file: str, chunk_id: int) -> str:
+    """Temporary/part file written by one generation worker"""
+    return f"{output_file}.chunk_{chunk_id}"
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Load a chunks-layout manifest (part paths are relative to the manifest)"""
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    manifest["parts"] = [os.path.join(base_dir, part) for part in manifest["parts"]]
+    return manifest
+
+
+def dataset_size(path: str) -> int:
+    """On-disk size of a dataset in bytes (sum of the parts for a manifest)"""
+    if path.endswith(MANIFEST_SUFFIX):
+        return sum(os.path.getsize(part) for part in read_manifest(path)["parts"])
+    return os.path.getsize(path)
+
+
+class ChainedDatasetReader:
+    """
+    Iterates the lines of every part listed in a chunks-layout manifest, in order,
+    optionally starting at byte first_offset of part first_part.
+    """
+
+    def __init__(self, manifest_path: str, first_part: int = 0, first_offset: int = 0):
+        manifest = read_manifest(manifest_path)
+        self.parts = manifest["parts"][first_part:]
+        self.compress = manifest.get("compress", "none")
+        self.first_offset = first_offset
+        self.current = None
+        self._lines = self._iter_lines()
+
+    def _iter_lines(self):
+        for i, part in enumerate(self.parts):
+            with open_dataset_reader(part, self.compress) as f:
+                if i == 0 and self.first_offset:
+                    skip_bytes(f, self.first_offset)
+                self.current = f
+                yield from f
+        self.current = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._lines)
+
+    def close(self):
+        self._lines.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def skip_bytes(f, offset: int):
+    """Move a fresh reader to an offset of its (decompressed) stream"""
+    if f.seekable():
+        f.seek(offset)  # gzip seeks forward by decompressing, still without splitting lines
+        return
+    while offset > 0:
+        data = f.read(min(offset, COPY_BUFFER))
+        if not data:
+            break
+        offset -= len(data)
+
+
+# Line index sidecar (<dataset>.idx.json): total docs, the uncompressed size of every part and
+# the byte offset of every INDEX_EVERY_LINES-th line of the logical (decompressed, parts chained)
+# stream. Gives O(1) totals, seek() straight to a resume point and line-aligned byte ranges.
+INDEX_SUFFIX = ".idx.json"
+INDEX_EVERY_LINES = 100000
+
+
+def read_line_index(path: str) -> Optional[Dict[str, Any]]:
+    """Load a dataset's line index, or None if it is missing or was written for a different file"""
+    try:
+        with open(path + INDEX_SUFFIX, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("size") != dataset_size(path):
+        return None  # Dataset was regenerated or truncated since
+    return index
+
+
+def write_line_index(path: str, index: Dict[str, Any]):
+    """Write a line index next to its dataset (atomically, stamped with the dataset's on-disk size)"""
+    index = dict(index, size=dataset_size(path))
+    tmp_file = path + INDEX_SUFFIX + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_file, path + INDEX_SUFFIX)
+
+
+def build_line_index(path: str) -> Dict[str, Any]:
+    """Build a line index for a dataset without one: one binary-mode pass counting newlines per block"""
+    if path.endswith(MANIFEST_SUFFIX):
+        manifest = read_manifest(path)
+        parts, compress = manifest["parts"], manifest.get("compress", "none")
+    else:
+        parts, compress = [path], None
+    
+    every = INDEX_EVERY_LINES
+    offsets = []
+    part_sizes = []
+    docs = 0  # Newlines seen so far
+    pos = 0  # Offset in the logical stream
+    last_byte = b"\n"
+    for part in parts:
+        part_start = pos
+        with open_dataset_reader(part, compress) as f:
+            while True:
+                block = f.read(SERIALIZER_FLUSH_BYTES)
+                if not block:
+                    break
+                n = block.count(b"\n")
+                # Line k starts right after newline number k - record the checkpoints starting in this block
+                idx, found = -1, 0
+                while len(offsets) * every <= docs + n:
+                    target = len(offsets) * every - docs
+                    while found < target:
+                        idx = block.find(b"\n", idx + 1)
+                        found += 1
+                    offsets.append(pos + idx + 1)
+                docs += n
+                pos += len(block)
+                last_byte = block[-1:]
+        part_sizes.append(pos - part_start)
+    if last_byte != b"\n":
+        docs += 1  # Final line without a trailing newline
+    offsets = offsets[:(docs - 1) // every + 1] if docs else []  # Drop the checkpoint at EOF
+    return {"docs": docs, "bytes": pos, "every": every, "offsets": offsets, "parts": part_sizes}
+
+
+def load_line_index(path: str) -> Dict[str, Any]:
+    """Line index for a dataset, built (and saved) on first use if the generator did not write one"""
+    index = read_line_index(path)
+    if index is None:
+        print(f"No line index for {path} - building one (binary pass)...")
+        build_start = time.time()
+        index = build_line_index(path)
+        write_line_index(path, index)
+        print(f"Indexed {index['docs']:,} lines in {time.time() - build_start:.1f}s")
+    return index
+
+
+def open_dataset_at(path: str, index: Dict[str, Any], line: int = 0):
+    """
+    Open a dataset positioned at `line`: seek to the nearest indexed checkpoint,
+    then skip fewer than INDEX_EVERY_LINES lines.
+    """
+    offsets = index["offsets"]
+    if line <= 0 or not offsets:
+        return open_dataset_reader(path)
+    checkpoint = min(line // index["every"], len(offsets) - 1)
+    offset = offsets[checkpoint]
+    
+    if path.endswith(MANIFEST_SUFFIX):
+        part, part_start = 0, 0
+        for size in index["parts"][:-1]:
+            if offset < part_start + size:
+                break
+            part_start += size
+            part += 1
+        f = ChainedDatasetReader(path, first_part=part, first_offset=offset - part_start)
+    else:
+        f = open_dataset_reader(path)
+        skip_bytes(f, offset)
+    
+    for _ in range(line - checkpoint * index["every"]):
+        next(f, None)
+    return f
+
+
+def append_file(dst_fd: int, src_path: str) -> str:
+    """
+    Append src_path to the end of dst_fd without copying through Python when possible.
+    Returns the method used (copy_file_range, sendfile or buffered).
+    """
+    with open(src_path, "rb") as src:
+        src_fd = src.fileno()
+        remaining = os.fstat(src_fd).st_size
+        dst_offset = os.lseek(dst_fd, 0, os.SEEK_END)
+        
+        # copy_file_range: in-kernel copy (and a reflink on XFS/btrfs) - Linux 4.5+, Python 3.8+
+        if hasattr(os, "copy_file_range"):
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src_fd, dst_fd, remaining, offset_dst=dst_offset)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                    dst_offset += copied
+                if remaining == 0:
+                    return "copy_file_range"
+            except OSError:
+                pass  # e.g. EXDEV/ENOSYS/EINVAL on older kernels - fall through from the current offsets
+        
+        src_offset = os.fstat(src_fd).st_size - remaining
+        os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+        try:
+            while remaining > 0:
+                sent = os.sendfile(dst_fd, src_fd, src_offset, remaining)
+                if sent == 0:
+                    break
+                remaining -= sent
+                src_offset += sent
+            if remaining == 0:
+                return "sendfile"
+        except OSError:
+            pass
+        
+        # Last resort: user-space copy
+        src.seek(src_offset)
+        os.lseek(dst_fd, 0, os.SEEK_END)
+        while True:
+            data = src.read(COPY_BUFFER)
+            if not data:
+                break
+            os.write(dst_fd, data)
+        return "buffered"
+
+
+# Dataset formats (--format):
+# - jsonl: one JSON document per line
+# - bulk:  "bulk-ready" - action lines are already interleaved and every BULK_BATCH_DOCS docs
+#          form one _bulk request body. A sidecar records (offset, length, docs) per batch, so
+#          ingest can mmap the file and send each batch as a memoryview slice (zero copy, zero parse)
+DATASET_FORMATS = ["jsonl", "bulk"]
+BULK_BATCH_DOCS = 10000  # Docs per pre-framed _bulk request (same as the ingest batch size)
+BULK_BATCHES_SUFFIX = ".batches.json"
+
+
+def check_dataset_format(dataset_format: str, compress: str, output_layout: str):
+    """Exit early for format options that cannot be combined"""
+    if dataset_format == "bulk" and (compress != "none" or output_layout != "merged"):
+        print("Error: --format bulk needs an uncompressed, merged file (it is memory-mapped at ingest)")
+        sys.exit(1)
+
+
+def read_bulk_batches(path: str) -> List[list]:
+    """Load the [offset, length, docs] batch list of a bulk-ready file"""
+    with open(path + BULK_BATCHES_SUFFIX, "r") as f:
+        return json.load(f)["batches"]
+
+
+# --cache: a finished dataset only depends on its generation inputs, so it is kept in a local
+# cache keyed by their hash and linked back in by the next setup on the same host/image (or CI
+# runner) instead of being generated again. The start time is not part of the key - only its
+# second/microsecond/UTC offset - so a cached dataset is reused for any window by moving every
+# @timestamp forward by whole minutes, which leaves line lengths (and the line index) unchanged
+CACHE_DIR = os.environ.get("DATA_SPRAYER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "data-sprayer")
+CACHE_MAX_BYTES = 20 * 1024 ** 3  # Least recently used datasets are evicted beyond this
+CACHE_META_FILE = "meta.json"
+TIMESTAMP_MINUTE = re.compile(rb'"@timestamp": "(\d{4}-\d\d-\d\dT\d\d:\d\d)')
+
+
+def dataset_files(output_file: str) -> List[str]:
+    """Every file of a generated dataset: the data (or manifest and parts) and its sidecar files"""
+    files = [output_file]
+    if output_file.endswith(MANIFEST_SUFFIX):
+        files.extend(read_manifest(output_file)["parts"])
+    for suffix in (INDEX_SUFFIX, BULK_BATCHES_SUFFIX, SUMMARY_SUFFIX):
+        if os.path.exists(output_file + suffix):
+            files.append(output_file + suffix)
+    return files
+
+
+def link_or_copy(src: str, dst: str):
+    """Hard-link src to dst (no copy on the same filesystem), falling back to a copy; dst is replaced atomically"""
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return  # Already linked (repeat cache hit) - renaming a link over itself would leave tmp_file behind
+    tmp_file = dst + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    try:
+        os.link(src, tmp_file)
+    except OSError:
+        shutil.copyfile(src, tmp_file)
+    os.replace(tmp_file, dst)
+
+
+def shift_dataset_file(src: str, dst: str, shift: timedelta, compress: str = None):
+    """Copy a dataset or summary file to dst with every @timestamp moved by shift (whole minutes)"""
+    if compress is None:
+        compress = next((c for c, ext in COMPRESSION_EXTENSIONS.items() if ext and src.endswith(ext)), "none")
+    shifted = {}  # Old minute -> new minute (a dataset spans at most days * 1440 minutes)
+    
+    def shift_minute(match):
+        minute = match.group(1)
+        new_minute = shifted.get(minute)
+        if new_minute is None:
+            new_minute = (datetime.fromisoformat(minute.decode()) + shift).strftime("%Y-%m-%dT%H:%M").encode()
+            shifted[minute] = new_minute
+        return b'"@timestamp": "' + new_minute
+    
+    tmp_file = dst + ".tmp"
+    with open_dataset_reader(src, compress) as reader, open_dataset_writer(tmp_file, compress) as writer:
+        while True:
+            block = reader.read(SERIALIZER_FLUSH_BYTES)
+            if not block:
+                break
+            block += reader.readline()  # End on a line boundary, so no timestamp is split across blocks
+            writer.write(TIMESTAMP_MINUTE.sub(shift_minute, block))
+    os.replace(tmp_file, dst)
+
+
+class DatasetCache:
+    """
+    Content-addressed store of finished datasets. An entry is a directory named after the hash
+    of the generation inputs, holding the dataset files and the progress record they were
+    generated with. Files are hard-linked in and out where possible (dataset writers never
+    truncate in place, so a linked file is never modified), and the least recently used
+    entries are evicted once the cache grows beyond max_bytes. A dataset fetched for a
+    different start time is copied out with its @timestamps shifted instead.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(scenarios_path: str, **inputs) -> str:
+        """Hash of the generation inputs, the scenarios.json contents and the generator VERSION"""
+        try:
+            with open(scenarios_path, "rb") as f:
+                scenarios = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            scenarios = None  # Generator falls back to DEFAULT_SCENARIO
+        blob = json.dumps({"version": VERSION, "scenarios": scenarios, **inputs}, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+    def fetch(self, key: str, output_file: str, start_time: datetime) -> Optional[Dict[str, Any]]:
+        """Link a cached dataset in as output_file, starting at start_time, and return its progress record (None on a miss)"""
+        entry = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(entry, CACHE_META_FILE), "r") as f:
+                meta = json.load(f)
+            shift = start_time - parse_start_time(meta["progress"]["start_time"])
+        except (OSError, ValueError, KeyError):
+            return None
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        try:
+            compress = None  # From the file extension, except for chunk files (listed in the manifest)
+            if shift:
+                print(f"[Cache] Shifting @timestamps by {shift} to start at {start_time.isoformat()}")
+                if output_file.endswith(MANIFEST_SUFFIX):
+                    compress = read_manifest(os.path.join(entry, os.path.basename(output_file))).get("compress", "none")
+            for name in meta["files"]:
+                src, dst = os.path.join(entry, name), os.path.join(output_dir, name)
+                if not shift or name.endswith((MANIFEST_SUFFIX, INDEX_SUFFIX, BULK_BATCHES_SUFFIX)):
+                    link_or_copy(src, dst)  # No timestamps inside
+                else:
+                    shift_dataset_file(src, dst, shift, "none" if name.endswith(SUMMARY_SUFFIX) else compress)
+            if shift and os.path.exists(output_file + INDEX_SUFFIX):
+                with open(output_file + INDEX_SUFFIX, "r") as f:
+                    index = json.load(f)
+                write_line_index(output_file, index)  # Offsets still hold, but a recompressed file has a new size
+        except (OSError, ValueError) as e:
+            print(f"[Cache] ⚠️  Entry {key} is unusable ({e}) - removing it")
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        os.utime(entry)  # Most recently used
+        return dict(meta["progress"], start_time=start_time.isoformat())
+
+    def store(self, key: str, output_file: str, progress: Dict[str, Any]):
+        """Add a finished dataset under key, then evict least recently used entries beyond max_bytes"""
+        entry = os.path.join(self.directory, key)
+        if os.path.exists(entry):
+            os.utime(entry)
+            return
+        files = dataset_files(output_file)
+        size = sum(os.path.getsize(path) for path in files)
+        if size > self.max_bytes:
+            print(f"[Cache] Dataset ({size / 1024**2:,.0f} MB) is larger than the cache limit "
+                  f"({self.max_bytes / 1024**2:,.0f} MB) - not cached")
+            return
+        
+        # Assemble the entry under a temporary name and rename it into place, so a killed
+        # run never leaves a partial entry behind under a valid key
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_entry = f"{entry}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry)
+        for path in files:
+            link_or_copy(path, os.path.join(tmp_entry, os.path.basename(path)))
+        with open(os.path.join(tmp_entry, CACHE_META_FILE), "w") as f:
+            json.dump({"files": [os.path.basename(path) for path in files], "bytes": size, "progress": progress,
+                       "stored": datetime.now(timezone.utc).isoformat()}, f, indent=2)
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            shutil.rmtree(tmp_entry, ignore_errors=True)  # Stored by a concurrent run in the meantime
+            return
+        print(f"[Cache] Stored dataset as {key} ({size / 1024**2:,.0f} MB) in {self.directory}")
+        self._evict(keep=key)
+
+    def _evict(self, keep: str):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                with open(os.path.join(path, CACHE_META_FILE), "r") as f:
+                    entries.append((os.path.getmtime(path), name, json.load(f)["bytes"]))
+            except (OSError, ValueError, KeyError):
+                continue  # Not an entry (or one being assembled by another run)
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            print(f"[Cache] Evicting least recently used dataset {name} ({size / 1024**2:,.0f} MB)")
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            total -= size
+
+
+class PassthroughNdjsonSerializer(NdjsonSerializer):
+    """NDJSON serializer that hands pre-framed bytes/memoryview bodies to the transport without copying"""
+    
+    def dumps(self, data: Any):
+        if isinstance(data, (bytes, memoryview)):
+            return data
+        return super().dumps(data)
+
+
+class AdaptiveBulkController:
+    """
+    AIMD controller for bulk ingest concurrency (in-flight batches) and batch size. Batches are
+    cut at a target byte size (payload size is what costs the cluster - docs vary in size) with
+    max_batch_docs as a secondary cap.
+    Every window of completed batches it looks at rejected (429) items, errors, batch latency
+    and throughput:
+    - rejections/errors: halve in-flight batches (the batch size once concurrency is at its minimum)
+    - batches slower than target_latency: halve the batch size (concurrency once at its minimum)
+    - healthy and the last increase raised throughput by 5%+ (or there was none): +1 in-flight
+      batch, then +batch_bytes_step once concurrency is at its maximum
+    - healthy but the last increase did not help: undo it and hold for a few windows
+    Every decision is logged with an [AIMD] prefix. adaptive=False pins the starting values.
+    """
+
+    def __init__(self, concurrency: int = 2, batch_bytes: int = 8 * 1024 * 1024,
+                 concurrency_range: tuple = (1, 16), batch_bytes_range: tuple = (1024 * 1024, 15 * 1024 * 1024),
+                 max_batch_docs: int = 50000, target_latency: float = 30.0, adaptive: bool = True):
+        self.min_concurrency, self.max_concurrency = concurrency_range
+        self.min_batch_bytes, self.max_batch_bytes = batch_bytes_range
+        self.concurrency = max(self.min_concurrency, min(self.max_concurrency, concurrency))
+        self.batch_bytes = max(self.min_batch_bytes, min(self.max_batch_bytes, batch_bytes))
+        self.batch_bytes_step = max(1024 * 1024, self.batch_bytes // 4)
+        self.max_batch_docs = max_batch_docs
+        self.options = {  # Starting settings - recreates an equivalent controller in a worker process
+            "concurrency": concurrency, "batch_bytes": batch_bytes, "concurrency_range": concurrency_range,
+            "batch_bytes_range": batch_bytes_range, "max_batch_docs": max_batch_docs,
+            "target_latency": target_latency, "adaptive": adaptive
+        }
+        self.target_latency = target_latency
+        self.adaptive = adaptive
+        
+        self.in_flight = 0
+        self._slots = None  # asyncio.Condition, created inside the running loop
+        self._reset_window()
+        self.window_start = None  # Starts with the first batch, not at construction
+        self.baseline_rate = 0.0  # Smoothed throughput at the current settings
+        self.last_increase = None  # "concurrency" / "batch_bytes" - undone if it did not help
+        self.hold_windows = 0
+        self.decisions = 0
+
+    def _reset_window(self):
+        self.window_batches = 0
+        self.window_docs = 0
+        self.window_rejected = 0
+        self.window_errors = 0
+        self.window_max_latency = 0.0
+        self.window_start = time.time()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Wait until fewer than `concurrency` batches are in flight"""
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+        if self.window_start is None:
+            self.window_start = time.time()
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < self.concurrency)
+            self.in_flight += 1
+        try:
+            yield self.in_flight
+        finally:
+            async with self._slots:
+                self.in_flight -= 1
+                self._slots.notify_all()
+
+    def record(self, docs: int, latency: float, rejected: int = 0, error: bool = False):
+        """Feed one completed batch; decides once per window (2 x concurrency batches, at least 4)"""
+        self.window_batches += 1
+        self.window_docs += docs
+        self.window_rejected += rejected
+        self.window_errors += int(error)
+        self.window_max_latency = max(self.window_max_latency, latency)
+        if self.adaptive and self.window_batches >= max(4, 2 * self.concurrency):
+            self._decide()
+            self._reset_window()
+
+    def _log(self, action: str, reason: str):
+        self.decisions += 1
+        print(f"[AIMD] {action}: concurrency={self.concurrency}, batch={self.batch_bytes / (1024 * 1024):.1f} MB ({reason})", flush=True)
+
+    def _decide(self):
+        elapsed = time.time() - self.window_start
+        rate = self.window_docs / elapsed if elapsed > 0 else 0.0
+        stats = f"{rate:,.0f} docs/sec, max latency {self.window_max_latency:.1f}s, rejected {self.window_rejected:,}, errors {self.window_errors}"
+        
+        if self.window_rejected or self.window_errors or self.window_max_latency > self.target_latency:
+            # Multiplicative decrease - the cluster is pushing back
+            if self.window_rejected or self.window_errors:
+                if self.concurrency > self.min_concurrency:
+                    self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                else:
+                    self.batch_bytes = max(self.min_batch_bytes, self.batch_bytes // 2)
+            elif self.batch_bytes > self.min_batch_bytes:
+                self.batch_bytes = max(self.min_batch_bytes, self.batch_bytes // 2)
+            else:
+                self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            self.baseline_rate = 0.0  # Throughput after a decrease is not comparable
+            self.last_increase = None
+            self.hold_windows = 2
+            self._log("decrease", stats)
+            return
+        
+        if self.hold_windows > 0:
+            self.hold_windows -= 1
+            self.baseline_rate = rate if not self.baseline_rate else (self.baseline_rate + rate) / 2
+            self._log("hold", stats)
+            return
+        
+        if self.last_increase and rate < self.baseline_rate * 1.05:
+            # The last step did not pay off - step back and stay there for a while
+            if self.last_increase == "concurrency":
+                self.concurrency = max(self.min_concurrency, self.concurrency - 1)
+            else:
+                self.batch_bytes = max(self.min_batch_bytes, self.batch_bytes - self.batch_bytes_step)
+            self.last_increase = None
+            self.hold_windows = 5
+            self._log("revert", f"{stats}; before the increase {self.baseline_rate:,.0f} docs/sec")
+            return
+        
+        # Additive increase
+        self.baseline_rate = rate
+        if self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self.last_increase = "concurrency"
+        elif self.batch_bytes < self.max_batch_bytes:
+            self.batch_bytes = min(self.max_batch_bytes, self.batch_bytes + self.batch_bytes_step)
+            self.last_increase = "batch_bytes"
+        else:
+            self.last_increase = None
+            self._log("at maximum", stats)
+            return
+        self._log("increase", stats)
+        if self._slots is not None:
+            asyncio.ensure_future(self._wake())
+
+    async def _wake(self):
+        async with self._slots:
+            self._slots.notify_all()
+
+
+CHECKPOINT_INTERVAL = 2.0  # Minimum seconds between ingest checkpoint writes
+
+
+class IngestCheckpoint:
+    """
+    Crash-safe ingest position for a dataset. Batches complete out of order, so acknowledged
+    line ranges are kept until they join the contiguous low-watermark (every line before it
+    is in Elasticsearch). The watermark and the ranges past it are written atomically
+    (temp file + rename) at most every `interval` seconds, so a resume only re-sends the
+    batches that had not been acknowledged.
+    """
+
+    def __init__(self, path: str, dataset: str, total_lines: int, interval: float = CHECKPOINT_INTERVAL):
+        self.path = path
+        self.dataset = dataset
+        self.total_lines = total_lines
+        self.interval = interval
+        self.watermark = 0
+        self.done = {}  # first_line -> end_line of acknowledged ranges past the watermark
+        self.done_ends = {}  # end_line -> first_line (merges neighbouring ranges)
+        self.last_save = 0.0
+        self.dirty = False
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state and (state.get("dataset") != dataset or state.get("size") != dataset_size(dataset)
+                      or state.get("total_lines") != total_lines):
+            print(f"⚠️  Ignoring ingest checkpoint {path}: it was written for a different dataset")
+        elif state:
+            self.watermark = state.get("last_line", 0)
+            for first, end in state.get("completed_ranges", []):
+                self._add(first, end)
+
+    def _add(self, first: int, end: int):
+        if end <= self.watermark:
+            return
+        first = max(first, self.watermark)
+        if end in self.done:  # Range that starts where this one ends
+            following_end = self.done.pop(end)
+            del self.done_ends[following_end]
+            end = following_end
+        if first in self.done_ends:  # Range that ends where this one starts
+            first = self.done_ends.pop(first)
+        self.done[first] = end
+        self.done_ends[end] = first
+        if self.watermark in self.done:
+            self.watermark = self.done.pop(self.watermark)
+            del self.done_ends[self.watermark]
+
+    def remaining(self) -> List[tuple]:
+        """Line ranges [first, end) that are not acknowledged yet, in file order"""
+        ranges = []
+        line = self.watermark
+        for first, end in sorted(self.done.items()):
+            ranges.append((line, first))
+            line = end
+        if line < self.total_lines:
+            ranges.append((line, self.total_lines))
+        return ranges
+
+    def acknowledged(self, first: int, end: int) -> bool:
+        """Whether all of lines [first, end) are acknowledged"""
+        return end <= self.watermark or any(f <= first and end <= e for f, e in self.done.items())
+
+    def complete(self, first: int, end: int):
+        """Acknowledge lines [first, end); writes the checkpoint if one is due"""
+        if end > first:
+            self._add(first, end)
+            self.dirty = True
+        if self.dirty and time.time() - self.last_save >= self.interval:
+            self.save()
+
+    def save(self):
+        """Write the checkpoint now (temp file + rename - a crash never leaves a torn file)"""
+        if not self.dirty:
+            return
+        state = {
+            "last_line": self.watermark,
+            "completed_ranges": sorted(self.done.items()),
+            "total_lines": self.total_lines,
+            "dataset": self.dataset,
+            "size": dataset_size(self.dataset),
+            "last_updated": datetime.now(timezone.utc).isoformat()
+        }
+        tmp_file = self.path + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        self.last_save = time.time()
+        self.dirty = False
+
+
+def split_line_ranges(ranges: List[tuple], parts: int) -> List[List[tuple]]:
+    """Split line ranges [first, end) into up to `parts` lists covering about the same number of lines"""
+    total = sum(end - first for first, end in ranges)
+    share = -(-total // parts) if parts > 0 else total
+    splits = []
+    current = []
+    current_lines = 0
+    for first, end in ranges:
+        while first < end:
+            take = min(end - first, share - current_lines)
+            current.append((first, first + take))
+            current_lines += take
+            first += take
+            if current_lines >= share:
+                splits.append(current)
+                current = []
+                current_lines = 0
+    if current:
+        splits.append(current)
+    return splits
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}  # Bulk item statuses worth sending again (None: no response)
+FATAL_STATUSES = {401, 403}  # _bulk request statuses that abort ingest (bad API key / missing privileges)
+RETRY_MAX_ATTEMPTS = 6  # Attempts per document (first send included) before it is dead-lettered
+RETRY_BASE_DELAY = 1.0  # Backoff before the second attempt (seconds), doubled per attempt
+RETRY_MAX_DELAY = 60.0
+DEAD_LETTER_FILE = "backfill_dead_letter.jsonl"
+
+
+class RetryQueue:
+    """
+    Bulk items waiting to be sent again. Retryable item failures (429 / 5xx, or no response at
+    all - connection errors and timeouts, status None) are queued with
+    jittered exponential backoff and go out in later batches, so an overloaded cluster costs
+    a resend of the rejected documents only. Items that fail permanently or run out of
+    attempts are appended to a dead-letter file (one JSON line per document).
+    Entries are (action_line, source_line, origin, attempts) - origin is the batch the
+    document was read in, which is only acknowledged once all its documents are settled.
+    """
+
+    def __init__(self, dead_letter_file: str = DEAD_LETTER_FILE, max_attempts: int = RETRY_MAX_ATTEMPTS,
+                 base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY):
+        self.dead_letter_file = dead_letter_file
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = random.Random()
+        self.items = []  # Heap of (ready_at, seq, entry)
+        self.seq = 0
+        self.retried = 0
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, failures: List[tuple]) -> List[bool]:
+        """
+        Queue failed items - (entry, status, error) - for another attempt and dead-letter the ones
+        that are not retryable or out of attempts. Items that failed together share one jittered
+        delay per attempt count, so they are resent together. Returns which items were queued.
+        """
+        now = time.time()
+        ready_at = {}
+        queued = []
+        dead = []
+        for entry, status, error in failures:
+            action, source, origin, attempts = entry
+            if attempts >= self.max_attempts or (status is not None and status not in RETRYABLE_STATUSES):
+                dead.append((entry, status, error))
+                queued.append(False)
+                continue
+            if attempts not in ready_at:
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+                ready_at[attempts] = now + self.rng.uniform(delay / 2, delay)  # Jitter spreads the resends out
+            heapq.heappush(self.items, (ready_at[attempts], self.seq, (action, source, origin, attempts + 1)))
+            self.seq += 1
+            queued.append(True)
+        self.retried += len(failures) - len(dead)
+        if dead:
+            self.dead_letter(dead)
+        return queued
+
+    def ready_in(self) -> Optional[float]:
+        """Seconds until the next item is due (0 if one is), or None if the queue is empty"""
+        if not self.items:
+            return None
+        return max(0.0, self.items[0][0] - time.time())
+
+    def take(self, max_bytes: int, max_docs: int) -> List[tuple]:
+        """Pop due items, up to a batch worth"""
+        entries = []
+        size = 0
+        now = time.time()
+        while self.items and self.items[0][0] <= now and size < max_bytes and len(entries) < max_docs:
+            entry = heapq.heappop(self.items)[2]
+            entries.append(entry)
+            size += len(entry[0]) + len(entry[1]) + 2
+        return entries
+
+    def dead_letter(self, failures: List[tuple]):
+        """Append (entry, status, error) failures to the dead-letter file"""
+        lines = []
+        for (action, source, _, attempts), status, error in failures:
+            lines.append(b'{"status":' + json.dumps(status).encode() + b',"attempts":' + str(attempts).encode()
+                         + b',"error":' + json.dumps(error, default=str).encode() + b',"action":' + bytes(action)
+                         + b',"doc":' + bytes(source) + b'}\n')
+        # One O_APPEND write, so ingest worker processes can share the file
+        fd = os.open(self.dead_letter_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, b"".join(lines))
+        finally:
+            os.close(fd)
+        self.dead += len(failures)
+
+
+def retry_body(entries: List[tuple]) -> bytes:
+    """Bulk body for re-queued items (each keeps its original action line)"""
+    return b"".join(bytes(action) + b"\n" + bytes(source) + b"\n" for action, source, _, _ in entries)
+
+
+class AliasSampler:
+    """
+    Weighted sampling in O(1) per draw, whatever the number of outcomes (Vose's alias method).
+    sample(rng) takes any object with random() - a random.Random or the random module - and uses
+    one draw; sample_array(rng, n) is the vectorized version for a numpy Generator.
+    Returns values[i] for outcome i (values defaults to the outcome indices). All-zero weights
+    sample uniformly.
+    """
+
+    def __init__(self, weights: List[float], values: List[int] = None):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights] if total > 0 else [1.0] * n
+        prob, alias = [1.0] * n, list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less], alias[less] = scaled[less], more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to rounding
+
+        self.n = n
+        self.values = tuple(values if values is not None else range(n))
+        self.prob = tuple(prob)
+        self.alias = tuple(self.values[a] for a in alias)
+        if np is not None:
+            self.prob_array = np.array(self.prob)
+            self.values_array = np.array(self.values)
+            self.alias_array = np.array(self.alias)
+            for array in (self.prob_array, self.values_array, self.alias_array):
+                array.flags.writeable = False
+
+    def sample(self, rng) -> int:
+        x = rng.random() * self.n
+        i = min(int(x), self.n - 1)  # random() * n can round up to n
+        return self.values[i] if x - i < self.prob[i] else self.alias[i]
+
+    def sample_array(self, rng, size: int):
+        x = rng.random(size) * self.n
+        i = np.minimum(x.astype(np.int64), self.n - 1)
+        return np.where(x - i < self.prob_array[i], self.values_array[i], self.alias_array[i])
+
+
+class ScenarioTable:
+    """
+    The scenarios and healthy-doc distributions compiled once into read-only lookup tables for
+    the per-document hot path: cumulative weights for random.choices(cum_weights=...), latency
+    parameters per service, (type, low, high) transaction amount ranges, the business incident
+    transaction mix and amount multiplier, scenario indices per service, and AliasSamplers that
+    pick scenarios by their "probability" (1/len(scenarios) if unset) - one over all scenarios,
+    one without the business impact scenarios (None if there are none).
+    DataSprayer builds one at load time and every worker process builds its own.
+    Healthy-doc draws consume the RNG exactly like the uncompiled code.
+    """
+
+    def __init__(self, scenarios: List[Dict[str, Any]]):
+        self.scenarios = tuple(scenarios)
+        self.by_service = {service: tuple(i for i, s in enumerate(scenarios) if s["service.name"] == service)
+                           for service in SERVICES}
+
+        # Anomaly scenario selection weighted by probability
+        weights = [float(s.get("probability", 1.0 / len(scenarios))) for s in scenarios]
+        self.sampler = AliasSampler(weights) if scenarios else None
+        no_impact = [i for i, s in enumerate(scenarios) if not s.get("business_impact", False)]
+        self.no_impact_sampler = AliasSampler([weights[i] for i in no_impact], no_impact) if no_impact else None
+
+        # Healthy docs: gauss(mu, sigma) clamped to [low, high]
+        self.latency = {service: ((lo + hi) / 2, (hi - lo) / 4, lo * 0.8, hi * 1.1)
+                        for service, (lo, hi) in HEALTHY_LATENCIES.items()}
+        self.status_cum_weights = tuple(itertools.accumulate(HEALTHY_STATUS_WEIGHTS))
+        self.tx_status_cum_weights = tuple(itertools.accumulate(TRANSACTION_STATUS_WEIGHTS))
+        self.transactions = tuple((t, *TRANSACTION_AMOUNT_RANGES[t]) for t in TRANSACTION_TYPES)
+
+        # Business incident: transaction_impact of the business impact scenario
+        impact = next((s for s in scenarios if s.get("business_impact")), None)
+        if impact and "transaction_impact" in impact:
+            # Reduced success rate (e.g. 0.95 * (1 - 0.6) = 38%); 75% of failures are "failed", 25% "cancelled"
+            success_rate = 0.95 * (1 - impact["transaction_impact"]["success_rate_drop"])
+            incident_weights = [success_rate * 100, (1 - success_rate) * 0.75 * 100, (1 - success_rate) * 0.25 * 100]
+            # Reduce amounts (e.g. multiply by (1 - 0.5) = 0.5 for a 50% reduction)
+            self.incident_amount_multiplier = 1 - impact["transaction_impact"]["amount_reduction"]
+        else:
+            # Fallback if scenario not found
+            incident_weights = [40, 45, 15]
+            self.incident_amount_multiplier = 0.5
+        self.incident_tx_status_cum_weights = tuple(itertools.accumulate(incident_weights))
+
+        # Same distributions as arrays for the numpy engine
+        if np is not None:
+            self.status_p = np.array(HEALTHY_STATUS_WEIGHTS, dtype=float) / sum(HEALTHY_STATUS_WEIGHTS)
+            self.tx_status_p = np.array(TRANSACTION_STATUS_WEIGHTS, dtype=float) / sum(TRANSACTION_STATUS_WEIGHTS)
+            self.tx_low = np.array([low for _, low, _ in self.transactions])
+            self.tx_high = np.array([high for _, _, high in self.transactions])
+            for array in (self.status_p, self.tx_status_p, self.tx_low, self.tx_high):
+                array.flags.writeable = False
+
+
+def _json_str(value: str) -> str:
+    """JSON-encode a constant for embedding in a %-format template"""
+    return json.dumps(value).replace("%", "%%")
+
+
+class TemplateSerializer:
+    """
+    Precompiled JSONL line templates for generator documents.
+    Produces exactly json.dumps(doc) + "\\n" (same key order and separators) without
+    building a dict per document: constants are JSON-encoded once, and only the
+    timestamp, numbers and ids are formatted per line.
+    """
+
+    def __init__(self, scenarios: List[Dict[str, Any]]):
+        head = '{"@timestamp": "%s", "service.name": '
+        tail = ', "trace.id": "trace-%d", "span.id": "span-%d"'
+
+        # Healthy docs: one template per service (payment-service adds the transaction object)
+        self.healthy = {}
+        for service in SERVICES:
+            template = head + _json_str(service) + ', "http.status_code": %d, "latency_ms": %r, "log.message": %s' + tail
+            if service == "payment-service":
+                template += ', "transaction": {"type": %s, "amount": %r, "status": %s}'
+            self.healthy[service] = template + "}\n"
+
+        # Anomaly docs (chunk worker schema): everything but timestamp and ids is constant per scenario
+        self.anomaly = [
+            head + _json_str(s["service.name"]) +
+            f', "http.status_code": {json.dumps(s["http.status_code"])}, "latency_ms": {json.dumps(s["latency_ms"])}'
+            f', "log.message": {_json_str(s["log.message"])}' + tail + "}\n"
+            for s in scenarios
+        ]
+
+        # Pre-encoded strings for fields drawn from fixed vocabularies
+        self.strings = {value: json.dumps(value) for value in HEALTHY_MESSAGES + TRANSACTION_TYPES + TRANSACTION_STATUSES}
+        # Same, indexable by the vocabulary position (used by the numpy engine)
+        self.messages = [self.strings[m] for m in HEALTHY_MESSAGES]
+        self.tx_types = [self.strings[t] for t in TRANSACTION_TYPES]
+        self.tx_statuses = [self.strings[t] for t in TRANSACTION_STATUSES]
+
+    def healthy_line(self, ts: str, service: str, status: int, latency: float, message: str, trace: int, span: int) -> str:
+        """Healthy doc for a non-payment service"""
+        return self.healthy[service] % (ts, status, latency, self.strings[message], trace, span)
+
+    def payment_line(self, ts: str, status: int, latency: float, message: str, trace: int, span: int,
+                     tx_type: str, amount: float, tx_status: str) -> str:
+        """Healthy payment-service doc with transaction fields"""
+        return self.healthy["payment-service"] % (
+            ts, status, latency, self.strings[message], trace, span,
+            self.strings[tx_type], amount, self.strings[tx_status]
+        )
+
+    def anomaly_line(self, ts: str, scenario_index: int, trace: int, span: int) -> str:
+        """Anomaly doc as written by the chunk workers"""
+        return self.anomaly[scenario_index] % (ts, trace, span)
+
+
+class BufferedLineWriter:
+    """Collects encoded lines in one reusable bytearray and writes it out in large blocks"""
+
+    def __init__(self, f, flush_bytes: int = SERIALIZER_FLUSH_BYTES):
+        self.f = f
+        self.buffer = bytearray(flush_bytes)
+        self.view = memoryview(self.buffer)
+        self.pos = 0
+        self.bytes_written = 0
+
+    def write_lines(self, lines: List[str]):
+        self.write("".join(lines).encode("utf-8"))
+
+    def write(self, data: bytes):
+        n = len(data)
+        if self.pos + n > len(self.buffer):
+            self.flush()
+        if n > len(self.buffer):
+            self.f.write(data)
+        else:
+            self.buffer[self.pos:self.pos + n] = data
+            self.pos += n
+        self.bytes_written += n
+
+    def flush(self):
+        if self.pos:
+            self.f.write(self.view[:self.pos])
+            self.pos = 0
+
+
+# Live mode: ticks are scheduled on the monotonic clock and only hand their docs to a bounded
+# buffer; a background flusher sends them, so a slow cluster never shifts the schedule
+LIVE_BUFFER_DOCS = 10000  # A full buffer holds ticks back - they are caught up once it drains
+LIVE_FLUSH_DOCS = 500  # Docs per live _bulk request
+LIVE_FLUSH_INTERVAL = 1.0  # Seconds before a partial live batch is sent anyway
+LIVE_RETRY_STATUSES = (429, 502, 503, 504)  # Retried by async_streaming_bulk with backoff
+LIVE_DRAIN_TIMEOUT = 10.0  # Seconds to wait for buffered docs to be sent on shutdown
+LIVE_RATE_SLICES = 10  # --rate: each second is generated in 100ms steps, spreading arrivals across it
+# A time-series data stream derives _id from service.name + @timestamp (ms), so each service gets
+# at most one doc per millisecond - a higher --rate would be rejected as duplicates (409)
+LIVE_TSDS_MAX_RATE = 1000 * len(SERVICES)
+LIVE_REPORT_INTERVAL = 5.0  # --rate: seconds between achieved vs target rate reports
+LIVE_ANOMALY_SECONDS = 15  # Default length of an injected anomaly
+BUSINESS_INCIDENT_FLAG = "/tmp/business_incident_active"  # Touch to start a business incident (06-trigger-business-incident.sh)
+BUSINESS_INCIDENT_SECONDS = 300  # Business incidents auto-end after 5 minutes
+
+# Live control endpoint: localhost HTTP commands, applied on the next tick (--control-port 0 disables it)
+#   GET  /status, /scenarios
+#   POST /scenario {"name": ..., "duration": 15}, /business-incident {"duration": 300}, /stop, /rate {"rate": N}
+LIVE_CONTROL_PORT = int(os.environ.get("DATA_SPRAYER_CONTROL_PORT", "8765"))
+LIVE_CONTROL_COMMANDS = ("scenario", "business-incident", "stop", "rate")
+LIVE_CONTROL_TIMEOUT = 10.0  # Seconds a control request waits for the tick that applies it
+
 
 class DataSprayer:
-    def __init__(self, es_client: AsyncElasticsearch):
+    def __init__(self, es_client: AsyncElasticsearch, scenarios: List[Dict[str, Any]] = None):
         self.es_client = es_client
-        self.scenarios = self._load_scenarios()
+        self.scenarios = scenarios if scenarios is not None else self._load_scenarios()
+        self.table = ScenarioTable(self.scenarios)
         self.injecting_anomaly = False
         self.current_scenario = None
         
@@ -139,17 +1448,17 @@ class DataSprayer:
             ]
     
     def _generate_healthy_doc(self, timestamp: datetime, service: str, business_incident_active: bool = False) -> Dict[str, Any]:
-        """Generate a healthy observability document"""
-        min_latency, max_latency = HEALTHY_LATENCIES[service]
+        """Generate a healthy observability document (timestamp may be pre-formatted with isoformat())"""
+        mu, sigma, min_latency, max_latency = self.table.latency[service]
         
         # Normal distribution around healthy range
-        latency = random.gauss((min_latency + max_latency) / 2, (max_latency - min_latency) / 4)
-        latency = max(min_latency * 0.8, min(max_latency * 1.1, latency))  # Clamp with slight variance
+        latency = random.gauss(mu, sigma)
+        latency = max(min_latency, min(max_latency, latency))  # Clamp with slight variance
         
         doc = {
-            "@timestamp": timestamp.isoformat(),
+            "@timestamp": timestamp if isinstance(timestamp, str) else timestamp.isoformat(),
             "service.name": service,
-            "http.status_code": random.choices([200, 201, 204], weights=[85, 10, 5])[0],
+            "http.status_code": random.choices(HEALTHY_STATUS_CODES, cum_weights=self.table.status_cum_weights)[0],
             "latency_ms": round(latency, 2),
             "log.message": random.choice(HEALTHY_MESSAGES),
             "trace.id": f"trace-{random.randint(100000, 999999)}",
@@ -158,49 +1467,16 @@ class DataSprayer:
         
         # Add transaction fields for payment-service (and optionally others)
         if service == "payment-service":
-            # Normal: 95% success rate, steady transaction amounts
             if business_incident_active:
-                # During business incident: apply transaction_impact from scenario
-                # Find the business impact scenario to get the reduction factors
-                impact_scenario = next((s for s in self.scenarios if s.get("business_impact")), None)
-                if impact_scenario and "transaction_impact" in impact_scenario:
-                    success_rate_drop = impact_scenario["transaction_impact"]["success_rate_drop"]
-                    amount_reduction = impact_scenario["transaction_impact"]["amount_reduction"]
-                    
-                    # Calculate reduced success rate (e.g., 0.95 * (1 - 0.6) = 0.38 = 38%)
-                    success_rate = 0.95 * (1 - success_rate_drop)
-                    fail_rate = (1 - success_rate) * 0.75  # 75% of failures are "failed"
-                    cancel_rate = (1 - success_rate) * 0.25  # 25% of failures are "cancelled"
-                    
-                    transaction_status = random.choices(
-                        ["success", "failed", "cancelled"], 
-                        weights=[success_rate * 100, fail_rate * 100, cancel_rate * 100]
-                    )[0]
-                    
-                    # Reduce amounts (e.g., multiply by (1 - 0.5) = 0.5 for 50% reduction)
-                    amount_multiplier = (1 - amount_reduction)
-                else:
-                    # Fallback if scenario not found
-                    transaction_status = random.choices(["success", "failed", "cancelled"], weights=[40, 45, 15])[0]
-                    amount_multiplier = 0.5
-                
-                transaction_type = random.choice(["payment", "checkout", "order"])
-                if transaction_type == "payment":
-                    base_amount = random.uniform(50.0, 500.0) * amount_multiplier
-                elif transaction_type == "checkout":
-                    base_amount = random.uniform(25.0, 350.0) * amount_multiplier
-                else:  # order
-                    base_amount = random.uniform(10.0, 200.0) * amount_multiplier
+                # During business incident: transaction mix and amount reduction of the business impact scenario
+                transaction_status = random.choices(TRANSACTION_STATUSES, cum_weights=self.table.incident_tx_status_cum_weights)[0]
+                amount_multiplier = self.table.incident_amount_multiplier
             else:
-                # Normal: 95% success rate
-                transaction_status = random.choices(["success", "failed", "cancelled"], weights=[95, 4, 1])[0]
-                transaction_type = random.choice(["payment", "checkout", "order"])
-                if transaction_type == "payment":
-                    base_amount = random.uniform(50.0, 500.0)
-                elif transaction_type == "checkout":
-                    base_amount = random.uniform(25.0, 350.0)
-                else:  # order
-                    base_amount = random.uniform(10.0, 200.0)
+                # Normal: 95% success rate, steady transaction amounts
+                transaction_status = random.choices(TRANSACTION_STATUSES, cum_weights=self.table.tx_status_cum_weights)[0]
+                amount_multiplier = 1.0
+            transaction_type, low, high = random.choice(self.table.transactions)
+            base_amount = random.uniform(low, high) * amount_multiplier
             
             doc["transaction"] = {
                 "type": transaction_type,
@@ -217,7 +1493,7 @@ class DataSprayer:
         latency = scenario["latency_ms"] + random.gauss(0, latency_variance)
         
         return {
-            "@timestamp": timestamp.isoformat(),
+            "@timestamp": timestamp if isinstance(timestamp, str) else timestamp.isoformat(),
             "service.name": scenario["service.name"],
             "http.status_code": scenario["http.status_code"],
             "latency_ms": round(latency, 2),
@@ -227,25 +1503,39 @@ class DataSprayer:
             "anomaly": True  # Tag for debugging
         }
     
-    def _generate_known_anomaly(self, timestamp: datetime) -> Dict[str, Any]:
-        """Generate known anomaly pattern for backfill (ML training)"""
-        scenario = random.choice(self.scenarios)
-        return self._generate_anomaly_doc(timestamp, scenario)
-    
-    async def _bulk_index(self, docs: List[Dict[str, Any]]):
-        """Bulk index documents to Elasticsearch"""
-        actions = [
-            {
-                "_index": INDEX_NAME,
-                "_source": doc
-            }
-            for doc in docs
-        ]
-        
-        success, failed = await async_bulk(self.es_client, actions, raise_on_error=False)
-        if failed:
-            print(f"Warning: {len(failed)} documents failed to index")
-        return success
+    async def _live_flusher(self, buffer: asyncio.Queue, stats: Dict[str, int]):
+        """
+        Background sender for live mode: streams docs from the buffer through async_streaming_bulk,
+        which cuts a _bulk request every LIVE_FLUSH_DOCS docs, or at the BULK_FLUSH marker sent
+        every LIVE_FLUSH_INTERVAL seconds, and retries rejections with backoff.
+        Returns after taking None from the buffer.
+        """
+        async def actions():
+            # The helper's own flush_after_seconds only fires after that long *without* a doc,
+            # which a steady live stream never has - flush on a fixed interval instead
+            flush_at = time.monotonic() + LIVE_FLUSH_INTERVAL
+            while True:
+                try:
+                    doc = await asyncio.wait_for(buffer.get(), max(0.0, flush_at - time.monotonic()))
+                except asyncio.TimeoutError:
+                    yield BULK_FLUSH
+                    flush_at = time.monotonic() + LIVE_FLUSH_INTERVAL
+                    continue
+                if doc is None:
+                    return
+                # create works for the plain index and the TSDS data stream
+                yield {"_op_type": "create", "_index": INDEX_NAME, "_source": doc}
+        
+        async for ok, item in async_streaming_bulk(self.es_client, actions(), chunk_size=LIVE_FLUSH_DOCS,
+                                                   max_retries=3, initial_backoff=1, max_backoff=10,
+                                                   retry_on_status=LIVE_RETRY_STATUSES,
+                                                   raise_on_error=False, raise_on_exception=False):
+            if ok:
+                stats["indexed"] += 1
+                continue
+            stats["failed"] += 1
+            if stats["failed"] <= 5 or stats["failed"] % 1000 == 0:
+                print(f"\nWarning: {stats['failed']:,} documents failed to index (latest: {str(item)[:300]})")
     
     def _load_progress(self, progress_file: str) -> Dict[str, Any]:
         """Load progress from JSON file"""
@@ -263,138 +1553,329 @@ class DataSprayer:
             json.dump(progress, f, indent=2)
     
     @staticmethod
-    def _generate_chunk_worker(chunk_id: int, start_second: int, end_second: int, start_time_iso: str, output_file: str, scenarios_path: str):
-        """
-        Worker function for multiprocessing - generates a chunk of time-series data.
-        This runs in a separate process. Loads scenarios from file to avoid pickling issues.
-        """
-        # Load scenarios in worker process to avoid pickling issues
+    def _load_worker_scenarios(scenarios_path: str) -> List[Dict[str, Any]]:
+        """Load scenarios in a worker process (avoids pickling them into every task)"""
         try:
             with open(scenarios_path, "r") as f:
                 scenarios = json.load(f)
         except Exception:
             # Fallback if scenarios file not found
             scenarios = []
-        
+        return scenarios or [DEFAULT_SCENARIO]
+    
+    @staticmethod
+    def _generate_block_python(rng, start_time: datetime, block_index: int, emit_start: int, emit_end: int,
+                               table: ScenarioTable, serializer: TemplateSerializer,
+                               summaries: MinuteSummaries = None) -> List[str]:
+        """
+        Generate one GENERATION_BLOCK_SECONDS block for all services with random.Random,
+        emitting JSON lines for seconds [emit_start, emit_end) (and adding them to summaries
+        if given). An anomaly doc takes its scenario's service, so it is stamped slot+1 ms
+        into the second - never the same service and @timestamp as another doc (a time-series
+        data stream would reject it).
+        """
+        block_start = block_index * GENERATION_BLOCK_SECONDS
+        sampler = table.sampler
+        lines = []
+        
+        # Always draw from the start of the block so a slice starting mid-block
+        # sees the same random sequence as the full dataset
+        for i in range(block_start, emit_end):
+            ts = (start_time + timedelta(seconds=i)).isoformat()  # Once per second, shared by all services
+            second_lines = []
+            summarize = summaries is not None and i >= emit_start
+            
+            # Generate documents for all services
+            for slot, service in enumerate(SERVICES):
+                # 98% healthy, 2% anomaly
+                if rng.random() < 0.98:
+                    # Generate healthy doc (inline to avoid pickling issues)
+                    mu, sigma, min_latency, max_latency = table.latency[service]
+                    latency = max(min_latency, min(max_latency, rng.gauss(mu, sigma)))
+                    status = rng.choices(HEALTHY_STATUS_CODES, cum_weights=table.status_cum_weights)[0]
+                    message = rng.choice(HEALTHY_MESSAGES)
+                    trace = rng.randint(100000, 999999)
+                    span = rng.randint(100000, 999999)
+                    
+                    # Add transaction fields for payment-service
+                    if service == "payment-service":
+                        transaction_status = rng.choices(TRANSACTION_STATUSES, cum_weights=table.tx_status_cum_weights)[0]
+                        transaction_type, low, high = rng.choice(table.transactions)
+                        base_amount = rng.uniform(low, high)
+                        second_lines.append(serializer.payment_line(
+                            ts, status, round(latency, 2), message, trace, span,
+                            transaction_type, round(base_amount, 2), transaction_status
+                        ))
+                        if summarize:
+                            summaries.add(i, service, round(latency, 2), status, transaction_status, round(base_amount, 2))
+                    else:
+                        second_lines.append(serializer.healthy_line(ts, service, status, round(latency, 2), message, trace, span))
+                        if summarize:
+                            summaries.add(i, service, round(latency, 2), status)
+                else:
+                    # Generate anomaly doc
+                    scenario_index = sampler.sample(rng)
+                    anomaly_ts = (start_time + timedelta(seconds=i, milliseconds=slot + 1)).isoformat()
+                    second_lines.append(serializer.anomaly_line(anomaly_ts, scenario_index, rng.randint(100000, 999999), rng.randint(100000, 999999)))
+                    if summarize:
+                        scenario = table.scenarios[scenario_index]
+                        summaries.add(i, scenario["service.name"], scenario["latency_ms"], scenario["http.status_code"], ms=slot + 1)
+            
+            if i >= emit_start:
+                lines.extend(second_lines)
+        return lines
+    
+    @staticmethod
+    def _generate_block_numpy(rng, start_time: datetime, block_index: int, emit_start: int, emit_end: int,
+                              table: ScenarioTable, serializer: TemplateSerializer,
+                              summaries: MinuteSummaries = None) -> List[str]:
+        """
+        Vectorized generation of one GENERATION_BLOCK_SECONDS block for all services.
+        Draws every random field as one array per service for the full block, then emits
+        JSON lines for seconds [emit_start, emit_end) in the same order (second by second,
+        service by service) as the python engine, adding them to summaries if given.
+        """
+        n = GENERATION_BLOCK_SECONDS
+        block_start = block_index * GENERATION_BLOCK_SECONDS
+        scenarios = table.scenarios
+
+        # One column set per service slot
+        columns = []
+        for service in SERVICES:
+            mu, sigma, min_latency, max_latency = table.latency[service]
+            latency = np.round(np.clip(rng.normal(mu, sigma, n), min_latency, max_latency), 2)
+
+            col = {
+                "anomaly": (rng.random(n) >= 0.98).tolist(),  # 98% healthy, 2% anomaly
+                "latency": latency.tolist(),
+                "status": rng.choice(HEALTHY_STATUS_CODES, size=n, p=table.status_p).tolist(),
+                "message": rng.integers(0, len(HEALTHY_MESSAGES), n).tolist(),
+                "trace": rng.integers(100000, 1000000, n).tolist(),
+                "span": rng.integers(100000, 1000000, n).tolist(),
+                "scenario": table.sampler.sample_array(rng, n).tolist(),
+            }
+            if service == "payment-service":
+                tx_type = rng.integers(0, len(TRANSACTION_TYPES), n)
+                amount = table.tx_low[tx_type] + rng.random(n) * (table.tx_high[tx_type] - table.tx_low[tx_type])
+                col["tx_status"] = rng.choice(len(TRANSACTION_STATUSES), size=n, p=table.tx_status_p).tolist()
+                col["tx_type"] = tx_type.tolist()
+                col["tx_amount"] = np.round(amount, 2).tolist()
+            columns.append(col)
+
+        messages, tx_types, tx_statuses = serializer.messages, serializer.tx_types, serializer.tx_statuses
+        anomaly_templates = serializer.anomaly
+        lines = []
+        for j in range(emit_start - block_start, emit_end - block_start):
+            ts = (start_time + timedelta(seconds=block_start + j)).isoformat()
+            for slot, (service, col) in enumerate(zip(SERVICES, columns)):
+                if col["anomaly"][j]:
+                    anomaly_ts = (start_time + timedelta(seconds=block_start + j, milliseconds=slot + 1)).isoformat()
+                    lines.append(anomaly_templates[col["scenario"][j]] % (anomaly_ts, col["trace"][j], col["span"][j]))
+                    if summaries is not None:
+                        scenario = scenarios[col["scenario"][j]]
+                        summaries.add(block_start + j, scenario["service.name"], scenario["latency_ms"], scenario["http.status_code"],
+                                      ms=slot + 1)
+                elif service == "payment-service":
+                    lines.append(serializer.healthy[service] % (
+                        ts, col["status"][j], col["latency"][j], messages[col["message"][j]], col["trace"][j], col["span"][j],
+                        tx_types[col["tx_type"][j]], col["tx_amount"][j], tx_statuses[col["tx_status"][j]]
+                    ))
+                    if summaries is not None:
+                        summaries.add(block_start + j, service, col["latency"][j], col["status"][j],
+                                      TRANSACTION_STATUSES[col["tx_status"][j]], col["tx_amount"][j])
+                else:
+                    lines.append(serializer.healthy[service] % (
+                        ts, col["status"][j], col["latency"][j], messages[col["message"][j]], col["trace"][j], col["span"][j]
+                    ))
+                    if summaries is not None:
+                        summaries.add(block_start + j, service, col["latency"][j], col["status"][j])
+        return lines
+
+    @staticmethod
+    def _iter_chunk_blocks(engine: str, start_second: int, end_second: int, start_time: datetime,
+                           table: ScenarioTable, seed: int, summaries: MinuteSummaries = None):
+        """
+        Yield (block_end_second, lines) for every GENERATION_BLOCK_SECONDS block overlapping
+        [start_second, end_second). Each block gets its own RNG derived from (seed, block index),
+        so the output for any second only depends on the seed - not on how work was split.
+        With summaries, the minutes completed by each block are finalized as it is yielded.
+        """
+        serializer = TemplateSerializer(table.scenarios)
+        for block_index in range(start_second // GENERATION_BLOCK_SECONDS, (end_second - 1) // GENERATION_BLOCK_SECONDS + 1):
+            block_start = block_index * GENERATION_BLOCK_SECONDS
+            emit_start = max(start_second, block_start)
+            block_end = min(block_start + GENERATION_BLOCK_SECONDS, end_second)
+            if engine == "numpy":
+                lines = DataSprayer._generate_block_numpy(numpy_block_rng(seed, block_index), start_time, block_index,
+                                                          emit_start, block_end, table, serializer, summaries)
+            else:
+                lines = DataSprayer._generate_block_python(python_block_rng(seed, block_index), start_time, block_index,
+                                                           emit_start, block_end, table, serializer, summaries)
+            if summaries is not None:
+                summaries.finish(block_end)
+            yield block_end, lines
+    
+    @staticmethod
+    def _generate_chunk_worker(engine: str, chunk_id: int, start_second: int, end_second: int, start_time_iso: str, output_file: str,
+                               scenarios_path: str, seed: int, compress: str = "none", dataset_format: str = "jsonl",
+                               first_line: int = 0, summarize: bool = False):
+        """
+        Worker function for multiprocessing - generates a chunk of time-series data to its own file.
+        This runs in a separate process. Loads scenarios from file (compiled into its own ScenarioTable)
+        to avoid pickling issues.
+        Returns the chunk's index info: uncompressed bytes and, relative to the chunk, the offsets of
+        dataset lines that are multiples of INDEX_EVERY_LINES (first_line = the chunk's first dataset
+        line), or for the bulk format the [length, docs] of every _bulk body written.
+        With summarize, it also holds the chunk's per-minute summary lines and raw edge minutes.
+        """
+        table = ScenarioTable(DataSprayer._load_worker_scenarios(scenarios_path))
         start_time = datetime.fromisoformat(start_time_iso)
-        chunk_output = f"{output_file}.chunk_{chunk_id}"
+        chunk_output = chunk_filename(output_file, chunk_id)
+        summaries = MinuteSummaries(start_time, start_second, end_second) if summarize else None
         
         total = end_second - start_second
         step = max(1, total // 10)  # log every 10%
-        processed = 0
-        
-        print(f"[Gen] Worker {chunk_id} started: seconds {start_second}-{end_second} (~{total:,} s)", flush=True)
-        
-        with open(chunk_output, 'w') as f:
-            for i in range(start_second, end_second):
-                timestamp = start_time + timedelta(seconds=i)
+        next_log = step
+        
+        print(f"[Gen] Worker {chunk_id} started ({engine}): seconds {start_second}-{end_second} (~{total:,} s)", flush=True)
+        
+        batches = []
+        offsets = []
+        pending = []
+        line = first_line
+        next_checkpoint = -(-first_line // INDEX_EVERY_LINES) * INDEX_EVERY_LINES
+        
+        with open_dataset_writer(chunk_output, compress) as f:
+            writer = BufferedLineWriter(f)
+            for block_end, lines in DataSprayer._iter_chunk_blocks(engine, start_second, end_second, start_time, table, seed,
+                                                                   summaries):
+                if dataset_format == "bulk":
+                    pending.extend(lines)
+                    while len(pending) >= BULK_BATCH_DOCS or (pending and block_end == end_second):
+                        body = bulk_body(pending[:BULK_BATCH_DOCS])
+                        writer.write(body)
+                        batches.append([len(body), min(len(pending), BULK_BATCH_DOCS)])
+                        del pending[:BULK_BATCH_DOCS]
+                else:
+                    while next_checkpoint < line + len(lines):
+                        offsets.append(writer.bytes_written + len("".join(lines[:next_checkpoint - line]).encode("utf-8")))
+                        next_checkpoint += INDEX_EVERY_LINES
+                    writer.write_lines(lines)
+                    line += len(lines)
                 
-                # Generate documents for all services
-                for service in SERVICES:
-                    # 98% healthy, 2% anomaly
-                    if random.random() < 0.98:
-                        # Generate healthy doc (inline to avoid pickling issues)
-                        min_latency, max_latency = HEALTHY_LATENCIES[service]
-                        latency = random.gauss((min_latency + max_latency) / 2, (max_latency - min_latency) / 4)
-                        latency = max(min_latency * 0.8, min(max_latency * 1.1, latency))
-                        
-                        doc = {
-                            "@timestamp": timestamp.isoformat(),
-                            "service.name": service,
-                            "http.status_code": random.choices([200, 201, 204], weights=[85, 10, 5])[0],
-                            "latency_ms": round(latency, 2),
-                            "log.message": random.choice(HEALTHY_MESSAGES),
-                            "trace.id": f"trace-{random.randint(100000, 999999)}",
-                            "span.id": f"span-{random.randint(100000, 999999)}"
-                        }
-                        
-                        # Add transaction fields for payment-service
-                        if service == "payment-service":
-                            transaction_status = random.choices(["success", "failed", "cancelled"], weights=[95, 4, 1])[0]
-                            transaction_type = random.choice(["payment", "checkout", "order"])
-                            if transaction_type == "payment":
-                                base_amount = random.uniform(50.0, 500.0)
-                            elif transaction_type == "checkout":
-                                base_amount = random.uniform(25.0, 350.0)
-                            else:  # order
-                                base_amount = random.uniform(10.0, 200.0)
-                            
-                            doc["transaction"] = {
-                                "type": transaction_type,
-                                "amount": round(base_amount, 2),
-                                "status": transaction_status
-                            }
-                    else:
-                        # Generate anomaly doc
-                        scenario = random.choice(scenarios) if scenarios else {
-                            "name": "Market Data Latency Spike",
-                            "service.name": "market-data-feed",
-                            "http.status_code": 200,
-                            "latency_ms": 3500,
-                            "log.message": "WARN: P99 latency > 3000ms",
-                            "duration_seconds": 15
-                        }
-                        doc = {
-                            "@timestamp": timestamp.isoformat(),
-                            "service.name": scenario["service.name"],
-                            "http.status_code": scenario["http.status_code"],
-                            "latency_ms": scenario["latency_ms"],
-                            "log.message": scenario["log.message"],
-                            "trace.id": f"trace-{random.randint(100000, 999999)}",
-                            "span.id": f"span-{random.randint(100000, 999999)}"
-                        }
-                    
-                    f.write(json.dumps(doc) + "\n")
-        
-                processed += 1
-                if processed % step == 0:
+                processed = block_end - start_second
+                if processed >= next_log:
                     pct = processed * 100.0 / total
                     print(f"[Gen] Worker {chunk_id}: {pct:.0f}% ({processed:,}/{total:,} s)", flush=True)
+                    next_log += step
+            writer.flush()
         
         print(f"[Gen] Worker {chunk_id} complete: wrote ~{total*len(SERVICES):,} docs -> {chunk_output}", flush=True)
-        return chunk_output, total
+        chunk_index = {"docs": total * len(SERVICES), "bytes": writer.bytes_written, "offsets": offsets, "batches": batches}
+        if summaries is not None:
+            chunk_index["summaries"] = summaries.lines
+            chunk_index["summary_edges"] = summaries.edges()
+        return chunk_output, total, chunk_index
     
     @staticmethod
     def _generate_chunk_worker_args(args):
         """Wrapper to unpack args tuple for imap_unordered"""
         return DataSprayer._generate_chunk_worker(*args)
     
-    async def _generate_to_file_parallel(self, output_file: str, progress_file: str, days: int = 7):
+    @staticmethod
+    def _stream_chunk_worker(engine: str, chunk_id: int, start_second: int, end_second: int, start_time_iso: str,
+                             scenarios_path: str, seed: int, batch_queue, batch_bytes: int, max_batch_docs: int,
+                             summarize: bool = False):
+        """
+        Worker for --backfill --stream - generates a chunk exactly like _generate_chunk_worker,
+        but puts (ndjson_body, doc_count) batches of about batch_bytes (at most max_batch_docs docs)
+        on batch_queue instead of writing a file.
+        With summarize, sends {"summaries": lines, "edges": raw edge minutes} after the last batch.
+        Sends None when done.
+        """
+        table = ScenarioTable(DataSprayer._load_worker_scenarios(scenarios_path))
+        start_time = datetime.fromisoformat(start_time_iso)
+        total = end_second - start_second
+        summaries = MinuteSummaries(start_time, start_second, end_second) if summarize else None
+        
+        print(f"[Gen] Stream worker {chunk_id} started ({engine}): seconds {start_second}-{end_second} (~{total:,} s)", flush=True)
+        
+        pending = []
+        pending_bytes = 0
+        batches = 0
+        action_bytes = len(BULK_ACTION_LINE)
+        for _, lines in DataSprayer._iter_chunk_blocks(engine, start_second, end_second, start_time, table, seed, summaries):
+            for line in lines:
+                pending.append(line)
+                pending_bytes += len(line) + action_bytes  # Generated JSON is ASCII (escaped by json.dumps)
+                if pending_bytes >= batch_bytes or len(pending) >= max_batch_docs:
+                    # The worker builds the finished _bulk body, so the parent only sends bytes.
+                    # Blocks while the queue is full (backpressure from the bulk pipeline)
+                    batch_queue.put((bulk_body(pending), len(pending)))
+                    pending = []
+                    pending_bytes = 0
+                    batches += 1
+        if pending:
+            batch_queue.put((bulk_body(pending), len(pending)))
+            batches += 1
+        if summaries is not None:
+            batch_queue.put({"summaries": summaries.lines, "edges": summaries.edges()})
+        batch_queue.put(None)
+        
+        print(f"[Gen] Stream worker {chunk_id} complete: {batches:,} batches (~{total*len(SERVICES):,} docs)", flush=True)
+    
+    async def _generate_to_file_parallel(self, output_file: str, progress_file: str, days: int = 7, engine: str = "auto",
+                                         seed: int = None, start_time: datetime = None, slice_range: tuple = None,
+                                         compress: str = "none", output_layout: str = "merged", dataset_format: str = "jsonl",
+                                         summaries: bool = False):
         """
         Phase 1: Generate all documents to local JSONL file using multiprocessing.
         This version splits the work across CPU cores for 3-5x speedup.
+        
+        With the same seed and start_time the output is byte-for-byte identical,
+        and slice_range=(first_second, end_second) regenerates just that part.
+        summaries=True also writes per-minute rollups to output_file + SUMMARY_SUFFIX.
         """
+        engine = resolve_engine(engine)
+        check_compression(compress)
+        check_dataset_format(dataset_format, compress, output_layout)
+        if seed is None:
+            seed = new_seed()
+        
         print("=" * 70)
-        print("PHASE 1: Generating documents to local file (PARALLEL)")
+        print(f"PHASE 1: Generating documents to local file (PARALLEL, engine: {engine}, compress: {compress}, format: {dataset_format})")
         print("=" * 70)
         
         # Calculate time range
-        end_time = datetime.now(timezone.utc)
-        start_time = end_time - timedelta(days=days)
+        if start_time is None:
+            end_time = datetime.now(timezone.utc)
+            start_time = end_time - timedelta(days=days)
+        else:
+            end_time = start_time + timedelta(days=days)
         total_seconds = int((end_time - start_time).total_seconds())
+        first_second, last_second = slice_range if slice_range else (0, total_seconds)
+        if not 0 <= first_second < last_second <= total_seconds:
+            print(f"❌ Error: slice {first_second}:{last_second} is outside the dataset (0:{total_seconds})")
+            sys.exit(1)
+        slice_seconds = last_second - first_second
         docs_per_second = len(SERVICES)
-        total_docs = total_seconds * docs_per_second
+        total_docs = slice_seconds * docs_per_second
         
         # Determine number of processes (leave 2 CPUs for OS/other processes)
         num_processes = max(1, mp.cpu_count() - 2)
         
         print(f"Generating {total_docs:,} documents to {output_file}")
         print(f"Time range: {start_time.isoformat()} to {end_time.isoformat()}")
-        print(f"({total_seconds:,} seconds × {docs_per_second} services)")
+        if slice_range:
+            print(f"Slice: seconds {first_second:,}-{last_second:,} of {total_seconds:,}")
+        print(f"({slice_seconds:,} seconds × {docs_per_second} services)")
+        print(f"Seed: {seed} (regenerate with --seed {seed} --start-time {start_time.isoformat()} --days {days})")
+        
+        # Calculate chunk boundaries (aligned to whole generation blocks)
+        chunks = split_blocks(first_second, last_second, num_processes)
+        num_processes = len(chunks)
         print(f"Using {num_processes} parallel processes (CPU count: {mp.cpu_count()})")
         
-        # Calculate chunk boundaries
-        chunk_size = total_seconds // num_processes
-        chunks = []
-        for i in range(num_processes):
-            start_second = i * chunk_size
-            if i == num_processes - 1:
-                # Last chunk gets any remainder
-                end_second = total_seconds
-            else:
-                end_second = (i + 1) * chunk_size
-            chunks.append((i, start_second, end_second))
-        
         # Start timing
         start_gen_time = time.time()
         
@@ -404,13 +1885,18 @@ class DataSprayer:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         scenarios_path = os.path.join(script_dir, "scenarios.json")
         
+        # Chunk files are named after the data file (not the manifest) in the chunks layout
+        chunk_base = output_file[:-len(MANIFEST_SUFFIX)] if output_layout == "chunks" else output_file
+        
         # Build args list for imap_unordered
         args_list = [
-            (chunk_id, start_sec, end_sec, start_time.isoformat(), output_file, scenarios_path)
+            (engine, chunk_id, start_sec, end_sec, start_time.isoformat(), chunk_base, scenarios_path, seed, compress, dataset_format,
+             (start_sec - first_second) * docs_per_second, summaries)
                  for chunk_id, start_sec, end_sec in chunks]
         
         completed_seconds = 0
         results = []
+        chunk_indexes = {}  # chunk file -> line offsets / _bulk batches written by its worker
         
         # Heartbeat: prints every 15s until we flip the flag
         heartbeat_running = True
@@ -425,17 +1911,18 @@ class DataSprayer:
         hb.start()
         
         with mp.Pool(processes=num_processes) as pool:
-            for chunk_output, sec_count in pool.imap_unordered(DataSprayer._generate_chunk_worker_args, args_list, chunksize=1):
+            for chunk_output, sec_count, chunk_index in pool.imap_unordered(DataSprayer._generate_chunk_worker_args, args_list, chunksize=1):
                 results.append((chunk_output, sec_count))
+                chunk_indexes[chunk_output] = chunk_index
                 completed_seconds += sec_count
                 
-                pct = (completed_seconds / total_seconds) * 100.0
+                pct = (completed_seconds / slice_seconds) * 100.0
                 elapsed = time.time() - start_gen_time
                 produced_docs = completed_seconds * len(SERVICES)
                 rate = produced_docs / elapsed if elapsed > 0 else 0
                 print(
                     f"[Gen] Progress: {pct:.1f}% ("
-                    f"{completed_seconds:,}/{total_seconds:,} s) | "
+                    f"{completed_seconds:,}/{slice_seconds:,} s) | "
                     f"Docs: {produced_docs:,} | Rate: {rate:,.0f} docs/sec",
                     flush=True,
                 )
@@ -446,28 +1933,77 @@ class DataSprayer:
         
         gen_time = time.time() - start_gen_time
         
-        # Concatenate chunk files into final output
-        print(f"\n📦 Merging {num_processes} chunk files...")
+        chunk_files = [chunk_filename(chunk_base, chunk_id) for chunk_id, _, _ in chunks]
         merge_start = time.time()
         
-        COPY_BUFFER = 1024 * 1024 * 10  # 10MB buffer for efficient I/O
-        
-        with open(output_file, 'wb') as outfile:
-            for idx, (chunk_file, _) in enumerate(results, 1):
-                chunk_size_mb = os.path.getsize(chunk_file) / (1024 * 1024)
-                print(f"[Merge] Merging chunk {idx}/{num_processes} ({chunk_size_mb:.1f} MB)...", flush=True)
-                
-                # Stream copy in chunks for better I/O
-                with open(chunk_file, 'rb') as infile:
-                    while True:
-                        data = infile.read(COPY_BUFFER)
-                        if not data:
-                            break
-                        outfile.write(data)
-                
-                os.remove(chunk_file)
-                elapsed = time.time() - merge_start
-                print(f"[Merge] Chunk {idx}/{num_processes} complete (elapsed: {int(elapsed)}s)", flush=True)
+        if output_layout == "chunks":
+            # No merge: record the chunk files (in time order) for ingest to read directly
+            print(f"\n📄 Writing manifest for {len(chunk_files)} chunk files (no merge)...")
+            manifest = {
+                "format": "chunks",
+                "compress": compress,
+                "parts": [os.path.basename(chunk_file) for chunk_file in chunk_files]
+            }
+            with open(output_file + ".tmp", "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(output_file + ".tmp", output_file)
+        else:
+            # Splice chunk files into the final output in time order (not completion order).
+            # The first chunk becomes the output file; the rest are appended in the kernel
+            # and deleted right away, so peak disk usage stays at ~1 dataset + 1 chunk.
+            print(f"\n📦 Merging {num_processes} chunk files...")
+            os.replace(chunk_files[0], output_file)
+            fd = os.open(output_file, os.O_WRONLY)
+            try:
+                for idx, chunk_file in enumerate(chunk_files[1:], 2):
+                    chunk_size_mb = os.path.getsize(chunk_file) / (1024 * 1024)
+                    print(f"[Merge] Merging chunk {idx}/{num_processes} ({chunk_size_mb:.1f} MB)...", flush=True)
+                    method = append_file(fd, chunk_file)
+                    os.remove(chunk_file)
+                    elapsed = time.time() - merge_start
+                    print(f"[Merge] Chunk {idx}/{num_processes} complete via {method} (elapsed: {int(elapsed)}s)", flush=True)
+            finally:
+                os.close(fd)
+        
+        # Offsets are relative to each chunk - shift them to the merged (or chained) stream
+        offset = 0
+        batches = []
+        offsets = []
+        for chunk_file in chunk_files:
+            chunk_index = chunk_indexes[chunk_file]
+            for length, docs in chunk_index["batches"]:
+                batches.append([offset, length, docs])
+                offset += length
+            offsets.extend(offset + chunk_offset for chunk_offset in chunk_index["offsets"])
+            if dataset_format != "bulk":
+                offset += chunk_index["bytes"]
+        
+        if dataset_format == "bulk":
+            with open(output_file + BULK_BATCHES_SUFFIX + ".tmp", "w") as f:
+                json.dump({"format": "bulk", "docs": total_docs, "batches": batches}, f)
+            os.replace(output_file + BULK_BATCHES_SUFFIX + ".tmp", output_file + BULK_BATCHES_SUFFIX)
+            print(f"📄 Wrote {len(batches):,} batch offsets to {output_file + BULK_BATCHES_SUFFIX}")
+        else:
+            write_line_index(output_file, {
+                "docs": total_docs,
+                "bytes": offset,
+                "every": INDEX_EVERY_LINES,
+                "offsets": offsets,
+                "parts": [chunk_indexes[chunk_file]["bytes"] for chunk_file in chunk_files] if output_layout == "chunks" else [offset]
+            })
+            print(f"📄 Wrote line index ({len(offsets):,} checkpoints) to {output_file + INDEX_SUFFIX}")
+        
+        summary_file = output_file + SUMMARY_SUFFIX
+        if summaries:
+            summary_lines = merge_summaries(start_time, [
+                (chunk_indexes[chunk_file]["summaries"], chunk_indexes[chunk_file]["summary_edges"]) for chunk_file in chunk_files
+            ])
+            with open(summary_file + ".tmp", "w") as f:
+                f.writelines(summary_lines)
+            os.replace(summary_file + ".tmp", summary_file)
+            print(f"📊 Wrote {len(summary_lines):,} per-minute summaries to {summary_file}")
+        elif os.path.exists(summary_file):
+            os.remove(summary_file)  # Left over from an earlier dataset - it no longer matches
         
         merge_time = time.time() - merge_start
         total_time = gen_time + merge_time
@@ -480,123 +2016,370 @@ class DataSprayer:
         print(f"   Merge time: {merge_time:.1f}s")
         print(f"   Total time: {total_time:.1f}s")
         print(f"   Rate: {docs_per_sec:,.0f} docs/sec")
+        print(f"   File size: {dataset_size(output_file) / (1024 * 1024):.1f} MB ({output_file})")
         
-        # Save completion status
+        if slice_range:
+            # A slice is a partial regeneration - leave the full dataset's progress file alone
+            return
+        
+        # Save completion status (seed + start_time make the dataset reproducible)
         progress = {
             "current_second": total_seconds,
             "total_seconds": total_seconds,
             "output_file": output_file,
+            "seed": seed,
+            "start_time": start_time.isoformat(),
+            "days": days,
+            "engine": engine,
+            "format": dataset_format,
+            "summaries": summaries,
             "last_updated": datetime.now(timezone.utc).isoformat(),
             "completed": True
         }
         self._save_progress(progress_file, progress)
     
-    async def _generate_to_file_custom(self, output_file: str, progress_file: str, days: int = 90):
-        """Phase 1: Generate all documents to local JSONL file (with custom days)"""
-        print("=" * 70)
-        print("PHASE 1: Generating documents to local file")
+    async def _generate_to_file(self, output_file: str, progress_file: str, days: int = 7, cache: DatasetCache = None,
+                                **generate_options):
+        """Phase 1: Generate all documents to local JSONL file (or link them from the dataset cache)"""
+        key = None
+        if cache is not None:
+            seed, start_time = generate_options.get("seed"), generate_options.get("start_time")
+            if seed is None:
+                # A random seed never produces the same dataset twice
+                print("[Cache] Skipped: only datasets generated with a fixed --seed can be reused")
+            else:
+                if start_time is None:
+                    # "Now minus --days", rounded up to a whole minute so it only differs from a cached
+                    # dataset's start by whole minutes (the key holds seconds/microseconds/UTC offset)
+                    start_time = (datetime.now(timezone.utc) - timedelta(days=days)).replace(second=0, microsecond=0)
+                    start_time = generate_options["start_time"] = start_time + timedelta(minutes=1)
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                key = DatasetCache.key(
+                    os.path.join(script_dir, "scenarios.json"), days=days, seed=seed,
+                    start_phase=start_time.strftime("%S.%f%z"),
+                    engine=resolve_engine(generate_options.get("engine", "auto")),
+                    compress=generate_options.get("compress", "none"),
+                    output_layout=generate_options.get("output_layout", "merged"),
+                    dataset_format=generate_options.get("dataset_format", "jsonl"),
+                    summaries=generate_options.get("summaries", False)
+                )
+                progress = cache.fetch(key, output_file, start_time)
+                if progress is not None:
+                    print(f"[Cache] ✅ Reusing cached dataset {key} from {cache.directory} - skipping generation")
+                    print(f"   File size: {dataset_size(output_file) / (1024 * 1024):.1f} MB ({output_file})")
+                    self._save_progress(progress_file, dict(progress, output_file=output_file, cache_key=key,
+                                                            last_updated=datetime.now(timezone.utc).isoformat()))
+                    return
+                print(f"[Cache] Miss ({key}) - generating")
+        
+        # Call the parallel method (default 7 days) for faster generation
+        # generate_options: engine, seed, compress, output_layout (see _generate_to_file_parallel)
+        await self._generate_to_file_parallel(output_file, progress_file, days=days, **generate_options)
+        if key is not None:
+            cache.store(key, output_file, self._load_progress(progress_file))
+    
+    async def _ingest_from_file(self, input_file: str, progress_file: str, validate_sample: int = 0,
+                                bulk_controller: AdaptiveBulkController = None, ingest_workers: int = 1):
+        """
+        Phase 2: Bulk ingest documents from local file to Elasticsearch.
+        Lines are sent as-is behind a constant action line; validate_sample=N json.loads
+        every Nth line and skips lines that fail to parse. ingest_workers > 1 splits the
+        file across that many processes.
+        """
+        print("\n" + "=" * 70)
+        print("PHASE 2: Bulk ingesting documents to Elasticsearch")
         print("=" * 70)
         
-        # Calculate time range
-        end_time = datetime.now(timezone.utc)
-        start_time = end_time - timedelta(days=days)
-        total_seconds = int((end_time - start_time).total_seconds())
-        docs_per_second = len(SERVICES)
-        total_docs = total_seconds * docs_per_second
+        # [HYPOTHESIS A] Log initial memory state
+        log_memory("[DEBUG] Initial ")
+        
+        if not os.path.exists(input_file):
+            print(f"❌ Error: Input file {input_file} not found")
+            return
         
-        # Load existing progress
-        progress = self._load_progress(progress_file)
-        start_second = progress.get("current_second", 0)
-        file_mode = "a" if start_second > 0 else "w"
+        # Get file size
+        file_size = dataset_size(input_file)
+        file_size_mb = file_size / (1024 * 1024)
+        print(f"File size: {file_size_mb:.2f} MB")
         
-        if start_second > 0:
-            print(f"Resuming generation from second {start_second:,} of {total_seconds:,}")
-            print(f"Progress: {start_second / total_seconds * 100:.2f}%")
-        else:
-            print(f"Generating {total_docs:,} documents to {output_file}")
-            print(f"Time range: {start_time.isoformat()} to {end_time.isoformat()}")
-            print(f"({total_seconds:,} seconds × {docs_per_second} services)")
+        await self._check_cluster()
         
-        last_update = datetime.now()
-        last_count = start_second
+        # Total lines and resume offsets come from the line index (built once if missing)
+        line_index = load_line_index(input_file)
+        total_lines = line_index["docs"]
         
-        with open(output_file, file_mode) as f:
-            for i in range(start_second, total_seconds):
-                timestamp = start_time + timedelta(seconds=i)
-                
-                # Generate documents for all services
-                for service in SERVICES:
-                    # 98% healthy, 2% anomaly
-                    if random.random() < 0.98:
-                        doc = self._generate_healthy_doc(timestamp, service)
-                    else:
-                        doc = self._generate_known_anomaly(timestamp)
+        print(f"Total documents: {total_lines:,}")
+        
+        # Load the ingest checkpoint - resume at the first unacknowledged batch
+        checkpoint = IngestCheckpoint(progress_file.replace("_progress", "_ingest_progress"), input_file, total_lines)
+        remaining = checkpoint.remaining()
+        if checkpoint.watermark > 0 or len(remaining) > 1:
+            print(f"Resuming ingestion from line {checkpoint.watermark:,} "
+                  f"({sum(end - first for first, end in remaining):,} lines left in {len(remaining):,} ranges)")
+        if not remaining:
+            print("✅ All documents already ingested (delete the ingest progress file to ingest again)")
+            return
+        
+        controller = bulk_controller or AdaptiveBulkController()
+        
+        if validate_sample:
+            print(f"Validating 1 in {validate_sample:,} lines with json.loads")
+        
+        if ingest_workers > 1:
+            await self._ingest_parallel(input_file, checkpoint, controller, ingest_workers, validate_sample)
+            return
+        
+        await self._ingest_batches(self._file_batches(input_file, line_index, remaining, controller, validate_sample),
+                                   sum(end - first for first, end in remaining), controller, checkpoint=checkpoint)
+    
+    async def _file_batches(self, input_file: str, line_index: Dict[str, Any], ranges: List[tuple],
+                            controller: AdaptiveBulkController, validate_sample: int = 0):
+        """
+        Read the line ranges [first, end) of a dataset and yield raw NDJSON bulk bodies (streaming,
+        no JSON decode/re-encode) as (body, doc_count, first_line, end_line). A batch never spans
+        two ranges, so each batch acknowledges exactly the lines it was cut from.
+        """
+        action_bytes = len(BULK_ACTION_LINE)
+        lines_read = 0
+        
+        for start_line, end_line in ranges:
+            current_batch = []
+            current_bytes = 0
+            current_line = start_line
+            batch_first = start_line
+            
+            # Seek straight to the start of the range
+            with open_dataset_at(input_file, line_index, start_line) as f:
+                for line in f:
+                    if current_line >= end_line:
+                        break
+                    lines_read += 1
+                    current_line += 1
                     
-                    # Write as JSON line
-                    f.write(json.dumps(doc) + "\n")
-                
-                # Update progress every 1000 seconds (or every 5 seconds for faster feedback)
-                if i % 1000 == 0 or (datetime.now() - last_update).total_seconds() >= 5:
-                    progress_pct = ((i + 1) / total_seconds) * 100
-                    # Calculate seconds processed in THIS interval only
-                    seconds_in_interval = (i + 1) - last_count
-                    elapsed = (datetime.now() - last_update).total_seconds()
+                    # Progress logging every 500k lines
+                    if lines_read % 500000 == 0:
+                        log_memory(f"[STREAM] At {lines_read:,} lines ")
                     
-                    if elapsed > 0 and seconds_in_interval > 0:
-                        # Rate based on this interval only, not total since resume
-                        rate = seconds_in_interval / elapsed  # seconds per second (should be ~1.0 if working well)
-                        remaining_seconds = total_seconds - (i + 1)
-                        eta_seconds = remaining_seconds / rate if rate > 0 else 0
-                        eta_str = f"{int(eta_seconds // 60)}m {int(eta_seconds % 60)}s" if eta_seconds > 0 else "calculating..."
-                        docs_rate = seconds_in_interval * docs_per_second / elapsed
-                    else:
-                        eta_str = "calculating..."
-                        rate = 0
-                        docs_rate = 0
+                    if validate_sample and current_line % validate_sample == 0:
+                        try:
+                            json.loads(line)
+                        except json.JSONDecodeError as e:
+                            print(f"\n⚠️  Warning: Failed to parse line {current_line}: {e}")
+                            continue
+                    if len(line) <= 1:
+                        continue  # Blank line would break the action/source pairing
                     
-                    print(f"\rGeneration: {progress_pct:.2f}% | "
-                          f"{i+1:,}/{total_seconds:,} seconds | "
-                          f"Rate: {docs_rate:.0f} docs/sec | "
-                          f"ETA: {eta_str}",
-                          end="", flush=True)
+                    current_batch.append(line)
+                    current_bytes += len(line) + action_bytes
                     
-                    # Save progress
-                    progress = {
-                        "current_second": i + 1,
-                        "total_seconds": total_seconds,
-                        "output_file": output_file,
-                        "last_updated": datetime.now(timezone.utc).isoformat()
-                    }
-                    self._save_progress(progress_file, progress)
-                    f.flush()  # Ensure data is written to disk
-                    last_update = datetime.now()
-                    last_count = i + 1  # Update to current position for next interval calculation
-        
-        print(f"\n✅ Generation complete! {total_docs:,} documents written to {output_file}")
+                    # When batch is full (at the controller's current byte size, or the doc cap),
+                    # hand it to the ingest pipeline
+                    if current_bytes >= controller.batch_bytes or len(current_batch) >= controller.max_batch_docs:
+                        # This will block if the ingest queue is full (backpressure)
+                        yield bulk_body(current_batch), len(current_batch), batch_first, current_line
+                        current_batch = []  # Start fresh batch (old one is now in queue)
+                        current_bytes = 0
+                        batch_first = current_line
+            
+            # Final partial batch (may be empty if the range ended in skipped lines - still acknowledged)
+            if batch_first < current_line:
+                yield bulk_body(current_batch) if current_batch else b"", len(current_batch), batch_first, current_line
+    
+    @staticmethod
+    def _ingest_worker(worker_id: int, input_file: str, ranges: List[tuple], controller_options: Dict[str, Any],
+                       validate_sample: int, results):
+        """
+        Ingest worker process for --ingest-workers: its own AsyncElasticsearch client, event loop and
+        bulk pipeline for the given line ranges. Reports (kind, worker_id, indexed, failed, acked_ranges)
+        tuples on `results` - "progress" after every batch, then "done".
+        """
+        parent_pid = os.getppid()
+        
+        async def run():
+            es_client = create_es_client()
+            try:
+                sprayer = DataSprayer(es_client)
+                line_index = load_line_index(input_file)
+                controller = AdaptiveBulkController(**controller_options)
+                
+                def report(indexed, failed, acked_ranges):
+                    if os.getppid() != parent_pid:
+                        # Parent died - nobody records our acknowledgements any more, stop sending
+                        print(f"❌ [Worker {worker_id}] Parent process exited, stopping", flush=True)
+                        os._exit(1)
+                    results.put(("progress", worker_id, indexed, failed, acked_ranges))
+                
+                indexed, failed = await sprayer._ingest_batches(
+                    sprayer._file_batches(input_file, line_index, ranges, controller, validate_sample),
+                    sum(end - first for first, end in ranges), controller, on_batch=report
+                )
+                results.put(("done", worker_id, indexed, failed, []))
+            finally:
+                await es_client.close()
+        
+        print(f"[Worker {worker_id}] Ingesting lines {ranges[0][0]:,}-{ranges[-1][1]:,}", flush=True)
+        asyncio.run(run())
     
-    async def _generate_to_file(self, output_file: str, progress_file: str):
-        """Phase 1: Generate all documents to local JSONL file"""
-        # Call the parallel method with default 7 days for faster generation
-        await self._generate_to_file_parallel(output_file, progress_file, days=7)
+    async def _ingest_parallel(self, input_file: str, checkpoint: IngestCheckpoint, controller: AdaptiveBulkController,
+                               ingest_workers: int, validate_sample: int = 0):
+        """
+        Split the unacknowledged lines into equal shares of line ranges (each worker seeks to its
+        ranges through the line index) and ingest them in parallel worker processes. The parent
+        aggregates progress and failures and owns the checkpoint.
+        """
+        total_lines = checkpoint.total_lines
+        remaining = checkpoint.remaining()
+        remaining_lines = sum(end - first for first, end in remaining)
+        shares = split_line_ranges(remaining, ingest_workers)
+        
+        print(f"\n⚡ Launching {len(shares)} ingest worker processes (each with its own client and bulk pipeline)...")
+        results = mp.Queue()
+        workers = [
+            mp.Process(
+                target=DataSprayer._ingest_worker,
+                args=(worker_id, input_file, ranges, controller.options, validate_sample, results),
+                daemon=True
+            )
+            for worker_id, ranges in enumerate(shares)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        loop = asyncio.get_running_loop()
+        start_time = time.time()
+        last_report = start_time
+        progress = {worker_id: (0, 0) for worker_id in range(len(workers))}
+        done = set()
+        try:
+            while len(done) < len(workers):
+                try:
+                    kind, worker_id, indexed, failed, acked_ranges = await loop.run_in_executor(None, results.get, True, 1.0)
+                    progress[worker_id] = (indexed, failed)
+                    for acked_range in acked_ranges:
+                        checkpoint.complete(*acked_range)
+                    if kind == "done":
+                        done.add(worker_id)
+                        print(f"[Ingest] Worker {worker_id} finished: {indexed:,} indexed, {failed:,} failed", flush=True)
+                except queue.Empty:
+                    for worker_id, worker in enumerate(workers):
+                        if worker_id not in done and worker.exitcode is not None:
+                            done.add(worker_id)
+                            print(f"❌ Ingest worker {worker_id} exited with code {worker.exitcode} "
+                                  f"(lines {shares[worker_id][0][0]:,}-{shares[worker_id][-1][1]:,})", flush=True)
+                
+                if time.time() - last_report >= 10:
+                    last_report = time.time()
+                    indexed = sum(i for i, _ in progress.values())
+                    failed = sum(f for _, f in progress.values())
+                    rate = indexed / (last_report - start_time)
+                    pct = (total_lines - remaining_lines + indexed) * 100.0 / total_lines if total_lines else 100.0
+                    print(f"[Ingest] Workers: {pct:.1f}% ({total_lines - remaining_lines + indexed:,}/{total_lines:,}) | "
+                          f"failed {failed:,} | {rate:,.0f} docs/sec | {len(done)}/{len(workers)} done | "
+                          f"checkpoint at line {checkpoint.watermark:,}", flush=True)
+        finally:
+            checkpoint.save()
+        
+        for worker in workers:
+            worker.join(timeout=5)
+        
+        indexed = sum(i for i, _ in progress.values())
+        failed = sum(f for _, f in progress.values())
+        elapsed = time.time() - start_time
+        print(f"\n✅ Parallel ingestion complete! {indexed:,} documents indexed, {failed:,} failed by {len(workers)} workers")
+        print(f"   Average rate: {indexed / elapsed if elapsed > 0 else 0:.0f} docs/sec")
+        print(f"   Total time: {int(elapsed // 60)}m {int(elapsed % 60)}s")
     
-    async def _ingest_from_file(self, input_file: str, progress_file: str):
-        """Phase 2: Bulk ingest documents from local file to Elasticsearch"""
+    async def _ingest_bulk_file(self, input_file: str, progress_file: str, bulk_controller: AdaptiveBulkController = None):
+        """
+        Phase 2 for --format bulk: mmap the bulk-ready file and send each pre-framed batch
+        as a memoryview slice of the mapping - no reading, parsing or copying on the client.
+        Adjacent batches are contiguous, so larger batch sizes are single slices too.
+        """
         print("\n" + "=" * 70)
-        print("PHASE 2: Bulk ingesting documents to Elasticsearch")
+        print("PHASE 2: Bulk ingesting pre-framed batches to Elasticsearch (mmap)")
         print("=" * 70)
         
-        # [HYPOTHESIS A] Log initial memory state
         log_memory("[DEBUG] Initial ")
         
-        if not os.path.exists(input_file):
-            print(f"❌ Error: Input file {input_file} not found")
+        if not os.path.exists(input_file) or not os.path.exists(input_file + BULK_BATCHES_SUFFIX):
+            print(f"❌ Error: {input_file} or its batch index {input_file + BULK_BATCHES_SUFFIX} not found")
             return
         
-        # Get file size
-        file_size = os.path.getsize(input_file)
-        file_size_mb = file_size / (1024 * 1024)
-        print(f"File size: {file_size_mb:.2f} MB")
+        print(f"File size: {os.path.getsize(input_file) / (1024 * 1024):.2f} MB")
+        
+        await self._check_cluster()
+        
+        batches = read_bulk_batches(input_file)
+        total_lines = sum(docs for _, _, docs in batches)
+        print(f"Total documents: {total_lines:,} in {len(batches):,} pre-framed batches")
         
+        # Resume with the pre-framed batches that were not acknowledged
+        checkpoint = IngestCheckpoint(progress_file.replace("_progress", "_ingest_progress"), input_file, total_lines)
+        first_lines = []
+        line = 0
+        for _, _, docs in batches:
+            first_lines.append(line)
+            line += docs
+        pending = [i for i in range(len(batches)) if not checkpoint.acknowledged(first_lines[i], first_lines[i] + batches[i][2])]
+        if not pending:
+            print("✅ All documents already ingested (delete the ingest progress file to ingest again)")
+            return
+        if len(pending) < len(batches):
+            print(f"Resuming ingestion from line {checkpoint.watermark:,} ({len(pending):,} batches left)")
+        
+        with open(input_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            
+            controller = bulk_controller or AdaptiveBulkController()
+            
+            async def mapped_batches():
+                p = 0
+                while p < len(pending):
+                    # Join adjacent pending pre-framed batches up to the current byte target / doc cap
+                    i = pending[p]
+                    first_line = first_lines[i]
+                    offset, end, docs = batches[i][0], batches[i][0] + batches[i][1], batches[i][2]
+                    p += 1
+                    while (p < len(pending) and pending[p] == i + 1 and end + batches[i + 1][1] - offset <= controller.batch_bytes
+                           and docs + batches[i + 1][2] <= controller.max_batch_docs):
+                        i += 1
+                        end += batches[i][1]
+                        docs += batches[i][2]
+                        p += 1
+                    yield view[offset:end], docs, first_line, first_line + docs
+            
+            try:
+                await self._ingest_batches(mapped_batches(), sum(batches[i][2] for i in pending), controller, checkpoint=checkpoint)
+            finally:
+                view.release()
+    
+    async def _time_series_bounds(self) -> Optional[tuple]:
+        """(start, end) @timestamp range INDEX_NAME accepts if it is a time-series data stream, else None"""
+        try:
+            response = await self.es_client.indices.get_data_stream(name=INDEX_NAME)
+        except Exception:
+            return None  # Plain index, or no data stream yet
+        for stream in response["data_streams"]:
+            ranges = stream.get("time_series", {}).get("temporal_ranges")
+            if ranges:
+                return (min(parse_start_time(r["start"]) for r in ranges), max(parse_start_time(r["end"]) for r in ranges))
+        return None
+    
+    async def _check_time_series_window(self, start: datetime, end: datetime):
+        """Exit before generating/ingesting if a TSDS target would reject part of the backfill window"""
+        bounds = await self._time_series_bounds()
+        if bounds is None:
+            return
+        print(f"[TSDS] {INDEX_NAME} is a time-series data stream accepting @timestamp "
+              f"{bounds[0].isoformat()} to {bounds[1].isoformat()}")
+        if start < bounds[0] or end > bounds[1]:
+            print(f"❌ Error: backfill window {start.isoformat()} to {end.isoformat()} is outside the data stream's time bounds")
+            print(f"   Documents outside them would be rejected. Use fewer --days / a later --start-time, or recreate the")
+            print(f"   data stream with a longer look-back (python3 setup.py --tsds --look-back ...)")
+            sys.exit(1)
+    
+    async def _check_cluster(self):
+        """Log cluster/index health and time a 10 doc test bulk before starting bulk ingestion"""
         # Check ES cluster health before starting bulk ingestion
         print("\n[DEBUG] Checking Elasticsearch cluster health...")
         try:
@@ -628,9 +2411,12 @@ class DataSprayer:
         print("[DEBUG] Testing ES bulk responsiveness with 10 test docs...")
         test_start = time.time()
         try:
+            # Distinct timestamps - a time-series data stream rejects same-dimension docs at the same instant
+            test_time = datetime.now(timezone.utc)
             test_docs = [
-                {"_index": INDEX_NAME, "_source": {"@timestamp": datetime.now(timezone.utc).isoformat(), "service.name": "test", "test": True}}
-                for _ in range(10)
+                {"_op_type": "create", "_index": INDEX_NAME,
+                 "_source": {"@timestamp": (test_time + timedelta(milliseconds=i)).isoformat(), "service.name": "test", "test": True}}
+                for i in range(10)
             ]
             test_success, test_failed = await async_bulk(self.es_client, test_docs, raise_on_error=False)
             test_elapsed = time.time() - test_start
@@ -643,75 +2429,135 @@ class DataSprayer:
             print("⚠️  WARNING: ES may not be accepting bulk requests!")
         log_memory("[DEBUG] After test bulk ")
         print()
-        
-        # Load ingestion progress
-        ingest_progress_file = progress_file.replace("_progress", "_ingest_progress")
-        ingest_progress = self._load_progress(ingest_progress_file)
-        start_line = ingest_progress.get("last_line", 0)
-        
-        if start_line > 0:
-            print(f"Resuming ingestion from line {start_line:,}")
-        
-        # Count total lines (for progress calculation)
-        print("Counting total lines...")
-        total_lines = 0
-        with open(input_file, "r") as f:
-            for _ in f:
-                total_lines += 1
-        
-        print(f"Total documents: {total_lines:,}")
-        
-        # Bulk ingest settings - optimized for single-node sandbox ES
-        batch_size = 10000  # Smaller batch size to avoid overwhelming single-node ES
-        # Use a conservative concurrency to reduce the chance of ES getting overwhelmed
-        # and all batches stalling (which can cause sandbox timeouts).
-        max_concurrent_batches = 2  # Process 2 batches in parallel
-        batch = []
-        batch_line = 0
+    
+    async def _ingest_batches(self, batch_source, total_lines: int, controller: AdaptiveBulkController,
+                              checkpoint: IngestCheckpoint = None, on_batch=None, retry_queue: RetryQueue = None):
+        """
+        Bulk ingest batches from an async iterator of (ndjson_body, doc_count, first_line, end_line)
+        tuples. Shared by file ingest and --stream: the source is only pulled when a slot frees up,
+        so a slow cluster throttles whatever produces the batches. The controller sets the
+        number of in-flight batches (and the batch size sources cut at) from batch feedback.
+        Rejected documents (429 / 5xx) are re-queued into later batches with backoff and
+        permanent failures are dead-lettered; a batch's lines are acknowledged to the checkpoint
+        once all its documents are settled. on_batch(indexed_total, failed_total, acked_ranges)
+        is called after every completed batch. Returns (indexed_total, failed_total).
+        """
+        # Starts conservative (2 in flight) to reduce the chance of ES getting overwhelmed
+        # and all batches stalling (which can cause sandbox timeouts); AIMD takes it from there.
+        batch_bytes = []  # Request body size of every batch (ingest stats)
         indexed_total = 0
+        failed_total = 0  # Dead-lettered documents
+        duplicates_total = 0  # Already in a time-series data stream (409)
+        retry_queue = retry_queue if retry_queue is not None else RetryQueue()  # An empty queue is falsy
+        # Rejected and failed requests are resent through the retry queue (with backoff) only -
+        # transport-level retries would multiply every resend
+        bulk_client = self.es_client.options(max_retries=0)
         start_time = datetime.now()
         
-        print(f"Ingesting with batch size: {batch_size:,} (parallel: {max_concurrent_batches} batches)")
+        mb = 1024 * 1024
+        print(f"Ingesting with batch size: {controller.batch_bytes / mb:.1f} MB, max {controller.max_batch_docs:,} docs "
+              f"(parallel: {controller.concurrency} batches, adaptive: {'on' if controller.adaptive else 'off'} - "
+              f"{controller.min_concurrency}-{controller.max_concurrency} in flight, "
+              f"{controller.min_batch_bytes / mb:.1f}-{controller.max_batch_bytes / mb:.1f} MB)")
         print()
         
+        def settle(origin: Dict[str, Any], count: int, acked_ranges: List[tuple]):
+            """Mark documents of a source batch as indexed or dead-lettered; the batch's lines are acknowledged once all are"""
+            origin["outstanding"] -= count
+            if origin["outstanding"] == 0:
+                acked_ranges.append(origin["range"])
+        
         # Helper function to ingest a single batch
-        async def ingest_batch(batch_data: List[Dict], batch_num: int, start_line_num: int) -> tuple:
-            """Ingest a single batch and return (success_count, failed_count, end_line_num)"""
+        async def ingest_batch(body: bytes, doc_count: int, batch_num, origin: Dict[str, Any], retries: List[tuple] = None) -> tuple:
+            """
+            Ingest a single batch and return (success_count, dead_lettered_count, acked_ranges).
+            Retryable item failures go to the retry queue instead of being lost; `retries` holds
+            the queue entries when this batch is a resend.
+            """
+            nonlocal duplicates_total
             batch_start_time = time.time()
+            batch_bytes.append(len(body))
+            acked_ranges = []
             try:
-                print(f"[DEBUG] Batch {batch_num}: Calling async_bulk with {len(batch_data):,} docs, chunk_size={batch_size}...", flush=True)
-                success, failed = await async_bulk(
-                    self.es_client,
-                    batch_data,
-                    raise_on_error=False,
-                    chunk_size=batch_size
-                )
+                print(f"[DEBUG] Batch {batch_num}: Sending _bulk with {doc_count:,} docs ({len(body) / (1024 * 1024):.1f} MB)...", flush=True)
+                # The body is already NDJSON - the client passes bytes straight through
+                response = await bulk_client.bulk(operations=body, index=INDEX_NAME)
+                failures = []
+                duplicates = 0
+                if response["errors"]:
+                    for position, item in enumerate(response["items"]):
+                        result = next(iter(item.values()))
+                        status = result.get("status", 500)
+                        if status == 409:
+                            # Time-series data stream: a doc with the same dimensions and @timestamp
+                            # is already indexed (e.g. resent after a resume) - nothing to retry
+                            duplicates += 1
+                        elif status >= 300:
+                            failures.append((position, status, result.get("error")))
+                success = len(response["items"]) - len(failures) - duplicates
+                duplicates_total += duplicates
                 batch_elapsed = time.time() - batch_start_time
-                failed_count = len(failed) if failed else 0
-                batch_rate = len(batch_data) / batch_elapsed if batch_elapsed > 0 else 0
-                print(f"[DEBUG] Batch {batch_num}: async_bulk COMPLETED in {batch_elapsed:.1f}s - success={success:,}, failed={failed_count}, rate={batch_rate:.0f} docs/sec", flush=True)
+                rejected = sum(1 for _, status, _ in failures if status == 429)
+                controller.record(doc_count, batch_elapsed, rejected=rejected)
+                batch_rate = doc_count / batch_elapsed if batch_elapsed > 0 else 0
+                print(f"[DEBUG] Batch {batch_num}: _bulk COMPLETED in {batch_elapsed:.1f}s - success={success:,}, failed={len(failures)}, rate={batch_rate:.0f} docs/sec", flush=True)
                 
                 # Log first few errors for debugging
-                if failed and len(failed) > 0:
-                    print(f"[DEBUG] Batch {batch_num} first error sample: {str(failed[0])[:500]}", flush=True)
-                
-                end_line_num = start_line_num + len(batch_data)
-                return (success, failed_count, end_line_num)
+                if failures:
+                    print(f"[DEBUG] Batch {batch_num} first error sample: {str(failures[0])[:500]}", flush=True)
             except Exception as e:
                 batch_elapsed = time.time() - batch_start_time
+                status = getattr(e, "status_code", None)
+                controller.record(doc_count, batch_elapsed, rejected=doc_count if status == 429 else 0, error=True)
                 print(f"\n⚠️  [DEBUG] Batch {batch_num} EXCEPTION after {batch_elapsed:.1f}s: {type(e).__name__}: {e}", flush=True)
+                if status in FATAL_STATUSES:
+                    print("\n" + "=" * 70, flush=True)
+                    print(f"❌ FATAL ERROR: Elasticsearch refused the _bulk request ({status})", flush=True)
+                    print("=" * 70, flush=True)
+                    print("Check ELASTIC_API_KEY and its index privileges - retrying would not help.", flush=True)
+                    raise
                 import traceback
                 traceback.print_exc()
-                return (0, len(batch_data), start_line_num + len(batch_data))
+                # The whole request failed - every document in it shares the request's status:
+                # retried if that is retryable (or there was no response at all), dead-lettered if not
+                success = 0
+                failures = [(position, status, f"{type(e).__name__}: {e}") for position in range(doc_count)]
+            
+            # Re-queue retryable failures, dead-letter the rest
+            dead_before = retry_queue.dead
+            if retries is None:
+                requeued = 0
+                if failures:
+                    lines = bytes(body).split(b"\n")
+                    requeued = sum(retry_queue.add([
+                        ((lines[2 * position], lines[2 * position + 1], origin, 1), status, error)
+                        for position, status, error in failures
+                    ]))
+                settle(origin, doc_count - requeued, acked_ranges)
+            else:
+                requeued = set()
+                queued = retry_queue.add([(retries[position], status, error) for position, status, error in failures])
+                for (position, _, _), was_queued in zip(failures, queued):
+                    if was_queued:
+                        requeued.add(position)
+                for position, entry in enumerate(retries):
+                    if position not in requeued:
+                        settle(entry[2], 1, acked_ranges)
+            if failures:
+                print(f"[DEBUG] Batch {batch_num}: {len(failures) - (retry_queue.dead - dead_before):,} docs queued for retry, "
+                      f"{retry_queue.dead - dead_before:,} dead-lettered ({len(retry_queue):,} waiting)", flush=True)
+            return (success, retry_queue.dead - dead_before, acked_ranges)
         
         # Calculate total batches (without loading data into memory)
-        total_batches = (total_lines + batch_size - 1) // batch_size
-        print(f"Will process {total_batches:,} batches (streaming - memory efficient)\n")
+        # Estimate (~250 bytes/doc) - batch size adapts
+        docs_per_batch = max(1, min(controller.max_batch_docs, controller.batch_bytes // 250))
+        total_batches = (total_lines + docs_per_batch - 1) // docs_per_batch
+        print(f"Will process ~{total_batches:,} batches (streaming - memory efficient)\n")
         log_memory("[DEBUG] Before streaming ingest ")
         
-        # Process batches in parallel with semaphore to limit concurrency
-        semaphore = asyncio.Semaphore(max_concurrent_batches)
+        # Process batches in parallel - the controller's slots limit concurrency
         completed_batches = 0
+        completed_retry_batches = 0  # Resent rejected docs - counted apart, they are not part of total_batches
         
         # [FIX] Define in-flight tracking BEFORE heartbeat that uses them
         in_flight_batches = {}  # batch_num -> start_time
@@ -723,6 +2569,7 @@ class DataSprayer:
             "indexed_total": 0,
             "total_lines": total_lines,
             "completed_batches": 0,
+            "completed_retry_batches": 0,
             "total_batches": total_batches,
             "bailout": False,  # Signal to abort ingestion
         }
@@ -735,6 +2582,8 @@ class DataSprayer:
                 total = progress_dict["total_lines"]
                 completed = progress_dict.get("completed_batches", 0)
                 total_b = progress_dict.get("total_batches", total_batches)
+                retried = progress_dict.get("completed_retry_batches", 0)
+                retried_str = f" + {retried} retry batches" if retried else ""
                 if indexed > 0:
                     progress_pct = (indexed / total) * 100
                     rate = indexed / elapsed if elapsed > 0 else 0
@@ -743,7 +2592,7 @@ class DataSprayer:
                     eta_str = f"{int(eta_seconds // 60)}m {int(eta_seconds % 60)}s" if eta_seconds > 0 else "calculating..."
                     print(
                         f"[Ingest] Heartbeat: ingesting... elapsed {int(elapsed)}s, "
-                        f"{progress_pct:.1f}% complete, {completed}/{total_b} batches done, ETA: {eta_str}",
+                        f"{progress_pct:.1f}% complete, {completed}/{total_b} batches{retried_str} done, ETA: {eta_str}",
                         flush=True,
                     )
                 else:
@@ -780,7 +2629,7 @@ class DataSprayer:
                         # After 2 minutes with no completed batches, emit a more explicit warning
                         print(
                             f"[Ingest] Heartbeat: no batches completed after {int(elapsed)}s "
-                            f"({completed}/{total_b} batches done). In-flight: [{in_flight_str}]",
+                            f"({completed}/{total_b} batches{retried_str} done). In-flight: [{in_flight_str}]",
                             flush=True,
                         )
                         log_memory("[DEBUG] Stall ")
@@ -794,134 +2643,145 @@ class DataSprayer:
         hb_thread = threading.Thread(target=_ingest_heartbeat, daemon=True)
         hb_thread.start()
         
-        async def ingest_with_semaphore(batch_data, batch_num, start_line_num):
+        def batch_done(success: int, failed_count: int, acked_ranges: List[tuple], retry: bool = False):
+            nonlocal completed_batches, completed_retry_batches, indexed_total, failed_total
+            if retry:
+                completed_retry_batches += 1
+            else:
+                completed_batches += 1
+            indexed_total += success
+            failed_total += failed_count
+            progress_dict["indexed_total"] = indexed_total
+            progress_dict["completed_batches"] = completed_batches
+            progress_dict["completed_retry_batches"] = completed_retry_batches
+            if checkpoint:
+                for acked_range in acked_ranges:
+                    checkpoint.complete(*acked_range)
+            if on_batch:
+                on_batch(indexed_total, failed_total, acked_ranges)
+        
+        async def ingest_with_semaphore(body, doc_count, batch_num, origin, retries=None):
             # Log when batch is queued (waiting for semaphore)
-            print(f"[Batch {batch_num}/{total_batches}] Queued, waiting for semaphore (lines {start_line_num}-{start_line_num + len(batch_data)})...", flush=True)
-            async with semaphore:
+            if retries is None:
+                print(f"[Batch {batch_num}/{progress_dict['total_batches']}] Queued, waiting for a slot (lines {origin['range'][0]}-{origin['range'][1]})...", flush=True)
+            else:
+                print(f"[Batch {batch_num}] Queued, waiting for a slot ({doc_count:,} retried docs)...", flush=True)
+            async with controller.slot():
                 # Track in-flight batch
                 with in_flight_lock:
                     in_flight_batches[batch_num] = time.time()
                     in_flight_count = len(in_flight_batches)
                 
-                # Log when semaphore acquired and batch actually starts processing
-                print(f"[Batch {batch_num}/{total_batches}] ACQUIRED semaphore, sending {len(batch_data):,} docs to ES... (in-flight: {in_flight_count})", flush=True)
+                # Log when slot acquired and batch actually starts processing
+                label = f"{batch_num}/{progress_dict['total_batches']}" if retries is None else batch_num
+                print(f"[Batch {label}] ACQUIRED slot, sending {doc_count:,} docs to ES... (in-flight: {in_flight_count}/{controller.concurrency})", flush=True)
                 
                 try:
-                    result = await ingest_batch(batch_data, batch_num, start_line_num)
+                    result = await ingest_batch(body, doc_count, batch_num, origin, retries)
                 finally:
                     # Remove from in-flight tracking
                     with in_flight_lock:
                         in_flight_batches.pop(batch_num, None)
                 
-                return result
+                return (*result, retries is not None)
         
-        # STREAMING BATCH PROCESSING - Only keep max_concurrent_batches in memory at a time
+        # STREAMING BATCH PROCESSING - Only keep the in-flight batches (+2) in memory at a time
         # This prevents the 3.8GB memory spike that was causing OOM
-        batch_queue = asyncio.Queue(maxsize=max_concurrent_batches + 2)  # Small buffer
+        batch_queue = asyncio.Queue(maxsize=2)  # Small buffer
         producer_done = asyncio.Event()
         
         async def batch_producer():
-            """Read file and produce batches to the queue (streaming)"""
-            current_batch = []
+            """Pull batches from the source and queue them (streaming)"""
             current_batch_num = 0
-            current_line = 0
             lines_read = 0
             
             print(f"[STREAM] Starting streaming batch producer...", flush=True)
             
-            with open(input_file, "r") as f:
-                # Skip already processed lines
-                for _ in range(start_line):
-                    next(f, None)
-                    current_line += 1
-                
-                for line in f:
-                    lines_read += 1
-                    current_line += 1
-                    
-                    # Progress logging every 500k lines
-                    if lines_read % 500000 == 0:
-                        log_memory(f"[STREAM] At {lines_read:,} lines ")
-                    
-                    try:
-                        doc = json.loads(line.strip())
-                        current_batch.append({
-                            "_index": INDEX_NAME,
-                            "_source": doc
-                        })
-                        
-                        # When batch is full, queue it for processing
-                        if len(current_batch) >= batch_size:
-                            current_batch_num += 1
-                            batch_start_line = current_line - len(current_batch)
-                            # This will block if queue is full (backpressure)
-                            await batch_queue.put((current_batch, current_batch_num, batch_start_line))
-                            current_batch = []  # Start fresh batch (old one is now in queue)
-                            
-                    except json.JSONDecodeError as e:
-                        print(f"\n⚠️  Warning: Failed to parse line {current_line}: {e}")
-                        continue
-                
-                # Final partial batch
-                if current_batch:
-                    current_batch_num += 1
-                    batch_start_line = current_line - len(current_batch)
-                    await batch_queue.put((current_batch, current_batch_num, batch_start_line))
+            async for body, doc_count, first_line, end_line in batch_source:
+                lines_read += end_line - first_line
+                if doc_count == 0:
+                    batch_done(0, 0, [(first_line, end_line)])  # Only skipped lines - nothing to send
+                    continue
+                current_batch_num += 1
+                # The batch size adapts, so re-estimate the total from the batches cut so far
+                remaining_lines = max(0, total_lines - lines_read)
+                progress_dict["total_batches"] = current_batch_num + (remaining_lines + doc_count - 1) // doc_count
+                # This will block if queue is full (backpressure)
+                await batch_queue.put((body, doc_count, current_batch_num, {"range": (first_line, end_line), "outstanding": doc_count}))
             
             producer_done.set()
             print(f"[STREAM] Producer finished: {current_batch_num} batches queued", flush=True)
         
         async def batch_consumer():
-            """Consume batches from queue and ingest them"""
-            nonlocal completed_batches, indexed_total
+            """Consume batches from queue (and due retries) and ingest them"""
             active_tasks = set()
+            retry_batches = 0
             
             while True:
                 # Check for bailout
                 if progress_dict.get("bailout", False):
                     return
                 
-                # Try to get a batch (with timeout to check producer status)
-                try:
-                    batch_data, batch_num, start_line_num = await asyncio.wait_for(
-                        batch_queue.get(), timeout=1.0
+                retry_due = retry_queue.ready_in()
+                if retry_due is not None and len(retry_queue) >= controller.max_batch_docs:
+                    # A batch worth of documents is waiting to be resent - stop reading new ones
+                    # (bounds memory while the cluster is rejecting or unreachable)
+                    if retry_due > 0:
+                        if active_tasks:
+                            done, active_tasks = await asyncio.wait(
+                                active_tasks, timeout=retry_due, return_when=asyncio.FIRST_COMPLETED
+                            )
+                            for completed_task in done:
+                                batch_done(*completed_task.result())
+                        else:
+                            await asyncio.sleep(retry_due)
+                        continue
+                if retry_due == 0:
+                    # Due retries go out ahead of new batches
+                    retries = retry_queue.take(controller.batch_bytes, controller.max_batch_docs)
+                    retry_batches += 1
+                    task = asyncio.create_task(
+                        ingest_with_semaphore(retry_body(retries), len(retries), f"R{retry_batches}", None, retries)
+                    )
+                else:
+                    # Try to get a batch (with timeout to check producer status and the retry queue)
+                    try:
+                        body, doc_count, batch_num, origin = await asyncio.wait_for(
+                            batch_queue.get(), timeout=min(1.0, retry_due) if retry_due is not None else 1.0
+                        )
+                    except asyncio.TimeoutError:
+                        # Producer is done and queue is empty: drain in-flight batches and their retries
+                        if producer_done.is_set() and batch_queue.empty():
+                            if active_tasks:
+                                done, active_tasks = await asyncio.wait(
+                                    active_tasks, timeout=retry_due, return_when=asyncio.FIRST_COMPLETED
+                                )
+                                for completed_task in done:
+                                    batch_done(*completed_task.result())
+                            elif retry_due is None:
+                                break
+                        continue
+                    
+                    # Create ingestion task
+                    task = asyncio.create_task(
+                        ingest_with_semaphore(body, doc_count, batch_num, origin)
                     )
-                except asyncio.TimeoutError:
-                    # Check if producer is done and queue is empty
-                    if producer_done.is_set() and batch_queue.empty():
-                        break
-                    continue
-                
-                # Create ingestion task
-                task = asyncio.create_task(
-                    ingest_with_semaphore(batch_data, batch_num, start_line_num)
-                )
                 active_tasks.add(task)
                 
-                # If we have enough active tasks, wait for one to complete
-                if len(active_tasks) >= max_concurrent_batches:
+                # If we have enough active tasks, wait for one to complete (the limit can change between batches)
+                while len(active_tasks) >= controller.concurrency:
                     done, active_tasks = await asyncio.wait(
                         active_tasks, return_when=asyncio.FIRST_COMPLETED
                     )
                     for completed_task in done:
-                        success, failed_count, end_line_num = completed_task.result()
-                        completed_batches += 1
-                        indexed_total += success
-                        progress_dict["indexed_total"] = indexed_total
-                        progress_dict["completed_batches"] = completed_batches
-            
-            # Wait for remaining tasks
-            if active_tasks:
-                done, _ = await asyncio.wait(active_tasks)
-                for completed_task in done:
-                    success, failed_count, end_line_num = completed_task.result()
-                    completed_batches += 1
-                    indexed_total += success
-                    progress_dict["indexed_total"] = indexed_total
-                    progress_dict["completed_batches"] = completed_batches
+                        batch_done(*completed_task.result())
         
         # Run producer and consumer concurrently
-        await asyncio.gather(batch_producer(), batch_consumer())
+        try:
+            await asyncio.gather(batch_producer(), batch_consumer())
+        finally:
+            if checkpoint:
+                checkpoint.save()  # Whatever was acknowledged, even if ingest was interrupted
         
         # Check if we should have bailed out
         if progress_dict.get("bailout", False):
@@ -935,6 +2795,10 @@ class DataSprayer:
         elapsed = (datetime.now() - start_time).total_seconds()
         rate = indexed_total / elapsed if elapsed > 0 else 0
         print(f"\n[STREAM] Completed: {indexed_total:,}/{total_lines:,} docs ({progress_pct:.1f}%) in {elapsed:.1f}s ({rate:.0f} docs/sec)")
+        if batch_bytes:
+            print(f"[STREAM] Batch sizes: min {min(batch_bytes) / mb:.1f} MB, avg {sum(batch_bytes) / len(batch_bytes) / mb:.1f} MB, "
+                  f"max {max(batch_bytes) / mb:.1f} MB over {len(batch_bytes):,} batches ({sum(batch_bytes) / mb:,.0f} MB sent)")
+        print(f"[AIMD] Final: concurrency={controller.concurrency}, batch={controller.batch_bytes / mb:.1f} MB after {controller.decisions} decisions")
         log_memory("[STREAM] Final ")
                         
         # Stop heartbeat
@@ -952,14 +2816,156 @@ class DataSprayer:
         print(f"\n✅ Ingestion complete! {indexed_total:,} documents indexed")
         print(f"   Average rate: {avg_rate:.0f} docs/sec")
         print(f"   Total time: {int(elapsed_total // 60)}m {int(elapsed_total % 60)}s")
+        if duplicates_total:
+            print(f"   Duplicates: {duplicates_total:,} documents were already indexed (409) and skipped")
+        if retry_queue.retried or failed_total:
+            print(f"   Retries: {retry_queue.retried:,} document resends, {failed_total:,} dead-lettered"
+                  + (f" (see {retry_queue.dead_letter_file})" if failed_total else ""))
+        return indexed_total, failed_total
+    
+    async def _ingest_summaries(self, summary_lines: List[str], bulk_controller: AdaptiveBulkController = None):
+        """
+        Send per-minute summaries to SUMMARY_INDEX_NAME through the bulk pipeline. Every summary has
+        a fixed id, so sending them all again after a resume overwrites instead of duplicating.
+        """
+        print("\n" + "=" * 70)
+        print(f"SUMMARIES: Ingesting {len(summary_lines):,} per-minute summaries into {SUMMARY_INDEX_NAME}")
+        print("=" * 70)
+        
+        async def summary_batches():
+            for first in range(0, len(summary_lines), SUMMARY_BATCH_DOCS):
+                batch = summary_lines[first:first + SUMMARY_BATCH_DOCS]
+                yield summary_body(batch), len(batch), first, first + len(batch)
+        
+        await self._ingest_batches(summary_batches(), len(summary_lines), bulk_controller or AdaptiveBulkController())
+    
+    async def _stream_backfill(self, progress_file: str, days: int = 7, engine: str = "auto", seed: int = None,
+                               start_time: datetime = None, bulk_controller: AdaptiveBulkController = None,
+                               summaries: bool = False, **_file_options):
+        """
+        Generate documents straight into Elasticsearch (--backfill --stream): generator processes
+        feed batches of JSON lines through a bounded queue into the bulk pipeline. No intermediate
+        file, line-count pass or JSON re-parse - total time is roughly the ingest time.
+        Nothing is written to disk, so an interrupted stream restarts from the beginning.
+        With summaries, the workers' per-minute rollups are sent once the raw documents are in.
+        """
+        engine = resolve_engine(engine)
+        if seed is None:
+            seed = new_seed()
+        
+        print("=" * 70)
+        print(f"STREAMING: Generating documents directly into Elasticsearch (engine: {engine})")
+        print("=" * 70)
+        
+        if start_time is None:
+            end_time = datetime.now(timezone.utc)
+            start_time = end_time - timedelta(days=days)
+        else:
+            end_time = start_time + timedelta(days=days)
+        total_seconds = int((end_time - start_time).total_seconds())
+        total_docs = total_seconds * len(SERVICES)
+        
+        print(f"Time range: {start_time.isoformat()} to {end_time.isoformat()}")
+        print(f"Total documents: {total_docs:,} ({total_seconds:,} seconds × {len(SERVICES)} services)")
+        print(f"Seed: {seed} (regenerate with --seed {seed} --start-time {start_time.isoformat()} --days {days})")
+        
+        await self._check_cluster()
+        
+        controller = bulk_controller or AdaptiveBulkController()
+        # Batches are cut by the workers at the starting size - only concurrency adapts in stream mode
+        chunks = split_blocks(0, total_seconds, max(1, mp.cpu_count() - 2))
+        print(f"Using {len(chunks)} generator processes (queue: {STREAM_QUEUE_BATCHES} batches)")
+        
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        scenarios_path = os.path.join(script_dir, "scenarios.json")
+        
+        batch_queue = mp.Queue(maxsize=STREAM_QUEUE_BATCHES)
+        workers = [
+            mp.Process(
+                target=DataSprayer._stream_chunk_worker,
+                args=(engine, chunk_id, start_sec, end_sec, start_time.isoformat(), scenarios_path, seed, batch_queue,
+                      controller.batch_bytes, controller.max_batch_docs, summaries),
+                daemon=True  # Never outlive an aborted ingest
+            )
+            for chunk_id, start_sec, end_sec in chunks
+        ]
+        for worker in workers:
+            worker.start()
+        
+        loop = asyncio.get_running_loop()
+        summary_parts = []  # (lines, edges) per worker
+        
+        async def stream_batches():
+            """Yield batches from the generator processes until every worker has finished"""
+            running = len(workers)
+            docs_sent = 0  # Stream batches arrive in no file order - positions are just arrival order
+            while running:
+                try:
+                    payload = await loop.run_in_executor(None, batch_queue.get, True, 1.0)
+                except queue.Empty:
+                    crashed = [w.name for w in workers if w.exitcode not in (None, 0)]
+                    if crashed:
+                        raise RuntimeError(f"Generator process failed: {', '.join(crashed)}")
+                    continue
+                if payload is None:
+                    running -= 1
+                    continue
+                if isinstance(payload, dict):
+                    summary_parts.append((payload["summaries"], payload["edges"]))
+                    continue
+                body, docs = payload
+                yield body, docs, docs_sent, docs_sent + docs
+                docs_sent += docs
+        
+        try:
+            await self._ingest_batches(stream_batches(), total_docs, controller)
+        finally:
+            for worker in workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+        
+        if summaries:
+            await self._ingest_summaries(merge_summaries(start_time, summary_parts), controller)
+        
+        # Record how to regenerate what was streamed (e.g. with --generate-only --slice)
+        self._save_progress(progress_file, {
+            "current_second": total_seconds,
+            "total_seconds": total_seconds,
+            "output_file": None,
+            "stream": True,
+            "seed": seed,
+            "start_time": start_time.isoformat(),
+            "days": days,
+            "engine": engine,
+            "summaries": summaries,
+            "last_updated": datetime.now(timezone.utc).isoformat(),
+            "completed": True
+        })
     
-    async def backfill(self):
-        """Generate 7 days of historical data for ML training (local-first with resume)"""
-        output_file = "backfill_data.jsonl"
+    async def backfill(self, days: int = 7, stream: bool = False, validate_sample: int = 0,
+                       bulk_controller: AdaptiveBulkController = None, ingest_workers: int = 1, **generate_options):
+        """Generate historical data for ML training (local-first with resume)"""
+        window_start = generate_options.get("start_time") or datetime.now(timezone.utc) - timedelta(days=days)
+        if stream:
+            await self._check_time_series_window(window_start, window_start + timedelta(days=days))
+            print("\n" + "=" * 70)
+            print(f"BACKFILL MODE (STREAM): {days} Days Historical Data Generation")
+            print("=" * 70)
+            await self._stream_backfill("backfill_progress.json", days=days, bulk_controller=bulk_controller, **generate_options)
+            print("\n" + "=" * 70)
+            print("✅ BACKFILL COMPLETE!")
+            print("=" * 70)
+            print("ML job can now be trained on this historical data")
+            return
+        
+        dataset_format = generate_options.get("dataset_format", "jsonl")
+        output_file = dataset_filename("backfill_data.jsonl", generate_options.get("compress", "none"),
+                                       generate_options.get("output_layout", "merged"), dataset_format)
         progress_file = "backfill_progress.json"
         
         print("\n" + "=" * 70)
-        print("BACKFILL MODE: 7 Days Historical Data Generation")
+        print(f"BACKFILL MODE: {days} Days Historical Data Generation")
         print("=" * 70)
         print()
         print("This process has two phases:")
@@ -967,9 +2973,17 @@ class DataSprayer:
         print("  2. Bulk ingest to Elasticsearch (can be paused/resumed)")
         print()
         
+        # A time-series data stream only takes @timestamps inside its time bounds - check before any work
+        window_days = days
+        recorded = self._load_progress(progress_file)
+        if os.path.exists(output_file) and recorded.get("start_time"):
+            window_start = parse_start_time(recorded["start_time"])  # Existing dataset keeps its time range
+            window_days = recorded.get("days", days)
+        await self._check_time_series_window(window_start, window_start + timedelta(days=window_days))
+        
         # Phase 1: Generate to file
-        if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
-            await self._generate_to_file(output_file, progress_file)
+        if not os.path.exists(output_file) or dataset_size(output_file) == 0:
+            await self._generate_to_file(output_file, progress_file, days=days, **generate_options)
         else:
             progress = self._load_progress(progress_file)
             total_seconds = progress.get("total_seconds", 0)
@@ -977,101 +2991,554 @@ class DataSprayer:
             
             if current_second < total_seconds:
                 print(f"⚠️  Found incomplete generation file. Resuming...")
-                await self._generate_to_file(output_file, progress_file)
+                await self._generate_to_file(output_file, progress_file, days=days, **generate_options)
             else:
                 print(f"✅ Generation file already complete ({total_seconds:,} seconds)")
         
         # Phase 2: Ingest from file
-        await self._ingest_from_file(output_file, progress_file)
+        if dataset_format == "bulk":
+            if ingest_workers > 1:
+                print("Note: --ingest-workers applies to JSONL datasets - bulk-ready files are sent from one process (zero-copy)")
+            await self._ingest_bulk_file(output_file, progress_file, bulk_controller=bulk_controller)
+        else:
+            await self._ingest_from_file(output_file, progress_file, validate_sample=validate_sample,
+                                         bulk_controller=bulk_controller, ingest_workers=ingest_workers)
+        
+        # Per-minute summaries (if the dataset has them) - small, so always sent in full
+        summary_file = output_file + SUMMARY_SUFFIX
+        if os.path.exists(summary_file):
+            with open(summary_file, "r") as f:
+                await self._ingest_summaries(f.readlines(), bulk_controller)
+        elif generate_options.get("summaries"):
+            print(f"Note: {output_file} was generated without --summaries - delete it to regenerate with summaries")
         
         print("\n" + "=" * 70)
         print("✅ BACKFILL COMPLETE!")
         print("=" * 70)
         print("ML job can now be trained on this historical data")
-        print(f"Data file: {output_file} ({os.path.getsize(output_file) / (1024**3):.2f} GB)")
+        print(f"Data file: {output_file} ({dataset_size(output_file) / (1024**3):.2f} GB)")
+    
+    async def _live_tick(self, buffer: asyncio.Queue, stats: Dict[str, int], tick: int, clock_start: float,
+                         current_time: datetime, rate: int, scenario: Optional[Dict[str, Any]],
+                         business_incident_active: bool, worker_id: int = 0, workers: int = 1):
+        """
+        Generate the docs of one live tick into the buffer. Without a rate that is one doc per
+        service stamped current_time; with --rate it is `rate` docs cycling through the services,
+        generated in LIVE_RATE_SLICES steps paced on the monotonic clock, so arrivals are spread
+        across the second. Each service's docs are spread over its own millisecond slots (distinct
+        up to LIVE_TSDS_MAX_RATE, as a time-series data stream needs). Worker w of `workers`
+        generates every workers-th doc. The scenario's service gets anomaly docs.
+        """
+        def make_doc(timestamp, service: str) -> Dict[str, Any]:
+            if scenario is not None and service == scenario["service.name"]:
+                return self._generate_anomaly_doc(timestamp, scenario)
+            # Pass business_incident_active flag for payment-service
+            return self._generate_healthy_doc(timestamp, service,
+                                              business_incident_active=(business_incident_active and service == "payment-service"))
+        
+        if rate is None:
+            for service in SERVICES:
+                await buffer.put(make_doc(current_time, service))
+            stats["generated"] += len(SERVICES)
+            return
+        
+        # Docs of service k % len(SERVICES) this second: doc k is its (k // len(SERVICES))-th
+        per_service = [(rate - i + len(SERVICES) - 1) // len(SERVICES) for i in range(len(SERVICES))]
+        for step in range(LIVE_RATE_SLICES):
+            # Sleeps 0 when behind - still lets the flusher run between catch-up slices
+            await asyncio.sleep(max(0.0, clock_start + tick + step / LIVE_RATE_SLICES - time.monotonic()))
+            low, high = step * rate // LIVE_RATE_SLICES, (step + 1) * rate // LIVE_RATE_SLICES
+            generated = 0
+            for k in range(low + (worker_id - low) % workers, high, workers):
+                service = k % len(SERVICES)
+                timestamp = (current_time + timedelta(milliseconds=k // len(SERVICES) * 1000 // per_service[service])).isoformat()
+                await buffer.put(make_doc(timestamp, SERVICES[service]))
+                generated += 1
+            stats["generated"] += generated
+    
+    @staticmethod
+    async def _stop_live_flusher(buffer: asyncio.Queue, flusher: asyncio.Task):
+        """
+        Send what is still buffered (bounded wait), then stop the flusher. Docs that could not be
+        sent within LIVE_DRAIN_TIMEOUT (stalled cluster, full buffer) are discarded so the flusher
+        can finish - a cancelled flusher still waiting on the buffer would keep asyncio.run from exiting.
+        """
+        deadline = time.monotonic() + LIVE_DRAIN_TIMEOUT
+        try:
+            await asyncio.wait_for(buffer.put(None), LIVE_DRAIN_TIMEOUT)
+            await asyncio.wait({flusher}, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+        if flusher.done():
+            return
+        discarded = 0
+        while not buffer.empty():
+            if buffer.get_nowait() is not None:
+                discarded += 1
+        buffer.put_nowait(None)
+        if discarded:
+            print(f"Warning: discarded {discarded:,} buffered documents not sent within {LIVE_DRAIN_TIMEOUT:.0f}s")
+        flusher.cancel()
+        await asyncio.wait({flusher}, timeout=LIVE_DRAIN_TIMEOUT)
+        if not flusher.done():
+            print(f"Warning: live flusher did not stop within {LIVE_DRAIN_TIMEOUT:.0f}s")
+    
+    @staticmethod
+    def _live_worker(worker_id: int, workers: int, wall_start_iso: str, clock_start: float, plans, counters):
+        """
+        Generator process for --live --rate with --live-workers: its own client, buffer and flusher.
+        Takes one (tick, scenario_index, business_incident_active, rate) plan per second from `plans`
+        (None to stop) - the parent owns the anomaly schedule and the rate, so all workers follow
+        the same ones - and publishes its [generated, indexed, failed, lag_ms] totals in its slots
+        of `counters`.
+        """
+        random.seed()  # Forked workers would otherwise draw identical docs
+        parent_pid = os.getppid()
+        wall_start = datetime.fromisoformat(wall_start_iso)
+        
+        async def run():
+            es_client = create_es_client()
+            sprayer = DataSprayer(es_client)
+            buffer = asyncio.Queue(maxsize=LIVE_BUFFER_DOCS)
+            stats = {"generated": 0, "indexed": 0, "failed": 0}
+            flusher = asyncio.create_task(sprayer._live_flusher(buffer, stats))
+            loop = asyncio.get_running_loop()
+            lag = 0.0
+            
+            def publish():
+                slot = worker_id * 4
+                counters[slot:slot + 4] = [stats["generated"], stats["indexed"], stats["failed"], int(lag * 1000)]
+            
+            try:
+                while True:
+                    try:
+                        plan = await loop.run_in_executor(None, plans.get, True, 1.0)
+                    except queue.Empty:
+                        plan = False
+                    publish()
+                    if os.getppid() != parent_pid:
+                        print(f"❌ [Live worker {worker_id}] Parent process exited, stopping", flush=True)
+                        os._exit(1)
+                    if plan is None:
+                        break
+                    if plan is False:
+                        continue
+                    if flusher.done():
+                        flusher.result()
+                        raise RuntimeError("live flusher stopped unexpectedly")
+                    tick, scenario_index, business_incident_active, rate = plan
+                    lag = max(0.0, time.monotonic() - (clock_start + tick))
+                    scenario = sprayer.scenarios[scenario_index] if scenario_index is not None else None
+                    await sprayer._live_tick(buffer, stats, tick, clock_start, wall_start + timedelta(seconds=tick), rate,
+                                             scenario, business_incident_active, worker_id, workers)
+            finally:
+                await DataSprayer._stop_live_flusher(buffer, flusher)
+                publish()
+                await es_client.close()
+        
+        asyncio.run(run())
+    
+    @staticmethod
+    async def _start_control_server(port: int, commands: asyncio.Queue, status, scenarios: List[Dict[str, Any]]):
+        """
+        Start the live control endpoint on 127.0.0.1:port. GET /status and /scenarios answer
+        right away; POST /<command> queues (command, params, reply) for the live loop, which
+        applies it on the next tick, and answers with the reply (a dict, or a ValueError for
+        a bad request). Params come from the query string and/or a JSON object body.
+        Returns the aiohttp runner (cleanup() stops it), or None if the port is unavailable.
+        """
+        async def handle_status(request):
+            return web.json_response(status())
+        
+        async def handle_scenarios(request):
+            return web.json_response([{"index": i, "name": s["name"], "service": s["service.name"]}
+                                      for i, s in enumerate(scenarios)])
+        
+        async def handle_command(request):
+            command = request.match_info["command"]
+            if command not in LIVE_CONTROL_COMMANDS:
+                return web.json_response({"error": f"unknown command '{command}'",
+                                          "commands": list(LIVE_CONTROL_COMMANDS)}, status=404)
+            params = dict(request.query)
+            if request.can_read_body:
+                try:
+                    body = await request.json()
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict):
+                    return web.json_response({"error": "request body must be a JSON object"}, status=400)
+                params.update(body)
+            reply = asyncio.get_running_loop().create_future()
+            await commands.put((command, params, reply))
+            try:
+                result = await asyncio.wait_for(reply, LIVE_CONTROL_TIMEOUT)
+            except asyncio.TimeoutError:
+                return web.json_response({"error": "live loop did not pick up the command in time"}, status=504)
+            if isinstance(result, ValueError):
+                return web.json_response({"error": str(result)}, status=400)
+            return web.json_response(result)
+        
+        app = web.Application()
+        app.router.add_get("/status", handle_status)
+        app.router.add_get("/scenarios", handle_scenarios)
+        app.router.add_post("/{command}", handle_command)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+        except OSError as e:
+            await runner.cleanup()
+            print(f"⚠️  Control endpoint disabled - cannot listen on 127.0.0.1:{port}: {e}")
+            return None
+        return runner
     
-    async def live(self):
-        """Run in live mode with continuous generation and anomaly injection"""
+    async def live(self, rate: int = None, workers: int = 1, control_port: int = LIVE_CONTROL_PORT):
+        """
+        Run in live mode with continuous generation and anomaly injection.
+        Tick n is due n seconds after start on the monotonic clock and stamped wall start + n
+        seconds; it only hands its docs to a bounded buffer that _live_flusher sends in the
+        background. Indexing latency never shifts the schedule - if the buffer fills up, ticks
+        run late and are caught up in a burst - so the data rate stays exact (one doc per
+        service per second, or `rate` docs per second), without drift or gaps.
+        With workers > 1, this process only runs the schedule and hands every tick to
+        that many generator processes.
+        Unless control_port is 0, a localhost control endpoint (_start_control_server) can start a
+        scenario or business incident, stop them, change the rate and report status; commands
+        are applied on the next tick and answered with the timestamp they took effect at.
+        """
         print("Starting live mode - generating real-time data with periodic anomalies...")
         print(f"Services: {', '.join(SERVICES)}")
         print(f"Anomaly injection: Every 60-90 seconds for 15 seconds")
-        print(f"Business incident flag: /tmp/business_incident_active\n")
+        print(f"Business incident flag: {BUSINESS_INCIDENT_FLAG}")
+        if rate is not None:
+            print(f"Rate: {rate:,} docs/sec spread across each second"
+                  + (f" ({workers} generator processes)" if workers > 1 else ""))
+        print(f"Buffer: {LIVE_BUFFER_DOCS:,} docs, flushed every {LIVE_FLUSH_DOCS:,} docs or {LIVE_FLUSH_INTERVAL:.0f}s\n")
+        
+        time_series = await self._time_series_bounds() is not None
+        if time_series and rate is not None and rate > LIVE_TSDS_MAX_RATE:
+            print(f"❌ Error: --rate {rate:,} is above {LIVE_TSDS_MAX_RATE:,} docs/s, the most {INDEX_NAME} accepts as a")
+            print(f"   time-series data stream (one doc per service per millisecond - more would be rejected as")
+            print(f"   duplicates). Use a lower --rate, or a plain index (python3 setup.py without --tsds).")
+            sys.exit(1)
+        
+        wall_start = datetime.now(timezone.utc)
+        clock_start = time.monotonic()
+        tick = 0
+        catching_up = False
+        
+        buffer = asyncio.Queue(maxsize=LIVE_BUFFER_DOCS)
+        stats = {"generated": 0, "indexed": 0, "failed": 0}
+        processes = []
+        plan_queues = []
+        counters = None
+        if workers > 1:
+            counters = mp.RawArray("q", workers * 4)
+            for worker_id in range(workers):
+                plans = mp.Queue()
+                process = mp.Process(
+                    target=DataSprayer._live_worker,
+                    args=(worker_id, workers, wall_start.isoformat(), clock_start, plans, counters),
+                    daemon=True
+                )
+                process.start()
+                processes.append(process)
+                plan_queues.append(plans)
+            flusher = None
+        else:
+            flusher = asyncio.create_task(self._live_flusher(buffer, stats))
         
-        last_anomaly_time = datetime.now(timezone.utc) - timedelta(seconds=60)
+        def totals() -> tuple:
+            """(generated, indexed, failed, lag seconds) across this process or the workers"""
+            if counters is None:
+                return stats["generated"], stats["indexed"], stats["failed"], max(0.0, time.monotonic() - (clock_start + tick))
+            return (sum(counters[0::4]), sum(counters[1::4]), sum(counters[2::4]), max(counters[3::4]) / 1000)
+        
+        report_at = clock_start + LIVE_REPORT_INTERVAL
+        last_report = (clock_start, 0, 0)
+        
+        last_anomaly_time = wall_start - timedelta(seconds=60)
         anomaly_end_time = None
         business_incident_end_time = None
-        
-        while True:
-            current_time = datetime.now(timezone.utc)
-            
-            # Check for business incident flag file
-            business_incident_active = os.path.exists("/tmp/business_incident_active")
-            if business_incident_active and business_incident_end_time is None:
-                # Start business incident (5 minutes = 300 seconds)
-                business_incident_end_time = current_time + timedelta(seconds=300)
-                print(f"\n💼 BUSINESS INCIDENT ACTIVE: Payment processing degradation")
+        business_incident_forced = False  # Started by a control command - runs without the flag file
+        
+        def find_scenario(key) -> Dict[str, Any]:
+            """Scenario by name, service name or index"""
+            for scenario in self.scenarios:
+                if str(key).lower() in (scenario["name"].lower(), scenario["service.name"]):
+                    return scenario
+            if str(key).isdigit() and int(key) < len(self.scenarios):
+                return self.scenarios[int(key)]
+            raise ValueError(f"unknown scenario {key!r} - one of: {', '.join(s['name'] for s in self.scenarios)}")
+        
+        def positive_int(params: Dict[str, Any], name: str, default: Optional[int]) -> Optional[int]:
+            value = params.get(name, default)
+            try:
+                if value is None or int(value) >= 1:
+                    return None if value is None else int(value)
+            except (TypeError, ValueError):
+                pass
+            raise ValueError(f"{name} must be a positive integer")
+        
+        def apply_control(command: str, params: Dict[str, Any], current_time: datetime) -> Dict[str, Any]:
+            """Apply one control command at the tick stamped current_time (ValueError for bad params)"""
+            nonlocal rate, anomaly_end_time, last_anomaly_time, business_incident_end_time, business_incident_forced
+            nonlocal report_at, last_report
+            if command == "scenario":
+                scenario = find_scenario(params.get("name", params.get("service")))
+                duration = positive_int(params, "duration", LIVE_ANOMALY_SECONDS)
+                self.injecting_anomaly = True
+                self.current_scenario = scenario
+                anomaly_end_time = current_time + timedelta(seconds=duration)
+                print(f"\n🔥 INJECTING ANOMALY (control): {scenario['name']}")
+                print(f"   Service: {scenario['service.name']}")
+                print(f"   Duration: {duration} seconds\n")
+                return {"scenario": scenario["name"], "service": scenario["service.name"],
+                        "start": current_time.isoformat(), "end": anomaly_end_time.isoformat()}
+            if command == "business-incident":
+                duration = positive_int(params, "duration", BUSINESS_INCIDENT_SECONDS)
+                business_incident_end_time = current_time + timedelta(seconds=duration)
+                business_incident_forced = True
+                print(f"\n💼 BUSINESS INCIDENT ACTIVE (control): Payment processing degradation")
                 print(f"   Service: payment-service")
-                print(f"   Duration: 5 minutes\n")
-            elif not business_incident_active and business_incident_end_time is not None:
-                # Business incident ended
-                business_incident_end_time = None
-                print(f"\n✅ Business incident ended. System returning to normal.\n")
-            elif business_incident_active and business_incident_end_time and current_time >= business_incident_end_time:
-                # Auto-end after 5 minutes
-                try:
-                    os.remove("/tmp/business_incident_active")
-                except:
-                    pass
-                business_incident_end_time = None
-                print(f"\n✅ Business incident auto-ended after 5 minutes.\n")
-            
-            # Check if it's time to inject an anomaly (but not during business incident for payment-service)
-            if not self.injecting_anomaly:
-                time_since_last = (current_time - last_anomaly_time).total_seconds()
-                if time_since_last >= random.randint(60, 90):
-                    # Start anomaly injection (skip if business incident is active for payment-service)
-                    available_scenarios = [s for s in self.scenarios if not s.get("business_impact", False)]
-                    if not business_incident_active:
-                        available_scenarios = self.scenarios  # Can use any scenario
-                    if available_scenarios:
-                        self.injecting_anomaly = True
-                        self.current_scenario = random.choice(available_scenarios)
-                        anomaly_end_time = current_time + timedelta(seconds=15)
-                        print(f"\n🔥 INJECTING ANOMALY: {self.current_scenario['name']}")
-                        print(f"   Service: {self.current_scenario['service.name']}")
-                        print(f"   Duration: 15 seconds\n")
-            
-            # Check if anomaly should end
-            if self.injecting_anomaly and current_time >= anomaly_end_time:
-                self.injecting_anomaly = False
-                last_anomaly_time = current_time
-                print(f"\n✅ Anomaly ended. System returning to normal.\n")
-            
-            # Generate documents for all services
-            batch = []
-            for service in SERVICES:
-                if self.injecting_anomaly and service == self.current_scenario["service.name"]:
-                    doc = self._generate_anomaly_doc(current_time, self.current_scenario)
+                print(f"   Duration: {duration} seconds\n")
+                return {"business_incident": True, "start": current_time.isoformat(),
+                        "end": business_incident_end_time.isoformat()}
+            if command == "stop":
+                stopped = []
+                if self.injecting_anomaly:
+                    stopped.append(self.current_scenario["name"])
+                    self.injecting_anomaly = False
+                    last_anomaly_time = current_time
+                if business_incident_end_time is not None:
+                    stopped.append("business incident")
+                    with contextlib.suppress(OSError):
+                        os.remove(BUSINESS_INCIDENT_FLAG)
+                    business_incident_end_time = None
+                    business_incident_forced = False
+                if stopped:
+                    print(f"\n✅ Stopped (control): {', '.join(stopped)}. System returning to normal.\n")
+                return {"stopped": stopped, "at": current_time.isoformat()}
+            # rate - null goes back to one doc per service per second (not with generator processes)
+            new_rate = positive_int(params, "rate", None)
+            if new_rate is None and processes:
+                raise ValueError("rate must be a positive integer with --live-workers")
+            if new_rate is not None and time_series and new_rate > LIVE_TSDS_MAX_RATE:
+                raise ValueError(f"rate must be at most {LIVE_TSDS_MAX_RATE:,} docs/s for a time-series data stream")
+            rate = new_rate
+            now = time.monotonic()
+            generated, indexed, _, _ = totals()
+            last_report, report_at = (now, generated, indexed), now + LIVE_REPORT_INTERVAL
+            print(f"\n⚙️  Rate set (control): " + (f"{rate:,} docs/sec" if rate else "one doc per service per second"))
+            return {"rate": rate, "from": current_time.isoformat()}
+        
+        def control_status() -> Dict[str, Any]:
+            generated, indexed, failed, lag = totals()
+            return {
+                "status": ("business_incident" if business_incident_end_time is not None
+                           else "anomaly" if self.injecting_anomaly else "healthy"),
+                "tick": tick,
+                "rate": rate,
+                "docs_per_second": rate or len(SERVICES),
+                "scenario": ({"name": self.current_scenario["name"], "service": self.current_scenario["service.name"],
+                              "end": anomaly_end_time.isoformat()} if self.injecting_anomaly else None),
+                "business_incident": ({"end": business_incident_end_time.isoformat(),
+                                       "source": "control" if business_incident_forced else "flag"}
+                                      if business_incident_end_time is not None else None),
+                "generated": generated,
+                "indexed": indexed,
+                "failed": failed,
+                "lag_seconds": round(lag, 1),
+            }
+        
+        commands = asyncio.Queue()
+        control = None
+        try:
+            if control_port:
+                control = await self._start_control_server(control_port, commands, control_status, self.scenarios)
+                if control is not None:
+                    print(f"Control endpoint: http://127.0.0.1:{control_port} (GET /status, /scenarios; "
+                          f"POST /{', /'.join(LIVE_CONTROL_COMMANDS)})\n")
+            while True:
+                delay = clock_start + tick - time.monotonic()
+                if delay > 0:
+                    if catching_up:
+                        catching_up = False
+                        print(f"\n✅ Caught up with the schedule ({buffer.qsize():,} docs buffered)")
+                    await asyncio.sleep(delay)
                 else:
-                    # Pass business_incident_active flag for payment-service
-                    doc = self._generate_healthy_doc(current_time, service, 
-                                                      business_incident_active=(business_incident_active and service == "payment-service"))
-                batch.append(doc)
+                    if delay < -1 and not catching_up:
+                        catching_up = True
+                        print(f"\n⏩ {-delay:.0f}s behind schedule (indexing slower than generation) - catching up")
+                    await asyncio.sleep(0)  # Let the flusher run between catch-up ticks
+                if flusher is not None and flusher.done():
+                    flusher.result()  # Raises whatever stopped it
+                    raise RuntimeError("live flusher stopped unexpectedly")
+                crashed = [p.name for p in processes if p.exitcode is not None]
+                if crashed:
+                    raise RuntimeError(f"Live generator process exited: {', '.join(crashed)}")
+                
+                current_time = wall_start + timedelta(seconds=tick)
+                
+                # Control commands queued since the last tick take effect on this one
+                while not commands.empty():
+                    command, params, reply = commands.get_nowait()
+                    try:
+                        result = apply_control(command, params, current_time)
+                    except ValueError as e:
+                        result = e
+                    if not reply.done():
+                        reply.set_result(result)
+                
+                # Check for business incident flag file (a control-started incident runs without it)
+                business_incident_flag = os.path.exists(BUSINESS_INCIDENT_FLAG)
+                if business_incident_flag and business_incident_end_time is None:
+                    # Start business incident (5 minutes)
+                    business_incident_end_time = current_time + timedelta(seconds=BUSINESS_INCIDENT_SECONDS)
+                    print(f"\n💼 BUSINESS INCIDENT ACTIVE: Payment processing degradation")
+                    print(f"   Service: payment-service")
+                    print(f"   Duration: 5 minutes\n")
+                elif not business_incident_flag and business_incident_end_time is not None and not business_incident_forced:
+                    # Business incident ended
+                    business_incident_end_time = None
+                    print(f"\n✅ Business incident ended. System returning to normal.\n")
+                elif business_incident_end_time is not None and current_time >= business_incident_end_time:
+                    # Auto-end after 5 minutes (or the control command's duration)
+                    try:
+                        os.remove(BUSINESS_INCIDENT_FLAG)
+                    except:
+                        pass
+                    business_incident_end_time = None
+                    business_incident_forced = False
+                    print(f"\n✅ Business incident auto-ended.\n")
+                business_incident_active = business_incident_end_time is not None
             
-            # Index batch
-            await self._bulk_index(batch)
+                # Check if it's time to inject an anomaly (but not during business incident for payment-service)
+                if not self.injecting_anomaly:
+                    time_since_last = (current_time - last_anomaly_time).total_seconds()
+                    if time_since_last >= random.randint(60, 90):
+                        # Start anomaly injection, weighted by probability
+                        # (skip business impact scenarios if business incident is active for payment-service)
+                        sampler = self.table.no_impact_sampler if business_incident_active else self.table.sampler
+                        if sampler is not None:
+                            self.injecting_anomaly = True
+                            self.current_scenario = self.scenarios[sampler.sample(random)]
+                            anomaly_end_time = current_time + timedelta(seconds=15)
+                            print(f"\n🔥 INJECTING ANOMALY: {self.current_scenario['name']}")
+                            print(f"   Service: {self.current_scenario['service.name']}")
+                            print(f"   Duration: 15 seconds\n")
             
-            # Status update
-            if business_incident_active:
-                status = "💼 BUSINESS INCIDENT"
-            elif self.injecting_anomaly:
-                status = "🔥 ANOMALY"
+                # Check if anomaly should end
+                if self.injecting_anomaly and current_time >= anomaly_end_time:
+                    self.injecting_anomaly = False
+                    last_anomaly_time = current_time
+                    print(f"\n✅ Anomaly ended. System returning to normal.\n")
+
+                scenario = self.current_scenario if self.injecting_anomaly else None
+                if processes:
+                    plan = (tick, self.scenarios.index(scenario) if scenario else None, business_incident_active, rate)
+                    for plans in plan_queues:
+                        plans.put(plan)
+                else:
+                    await self._live_tick(buffer, stats, tick, clock_start, current_time, rate, scenario, business_incident_active)
+                tick += 1
+                
+                # Status update
+                if business_incident_active:
+                    status = "💼 BUSINESS INCIDENT"
+                elif self.injecting_anomaly:
+                    status = "🔥 ANOMALY"
+                else:
+                    status = "✅ HEALTHY"
+                if rate is None:
+                    print(f"[{current_time.strftime('%H:%M:%S')}] {status} - Indexed {stats['indexed']:,} documents "
+                          f"({buffer.qsize():,} buffered)", end='\r')
+                elif time.monotonic() >= report_at:
+                    # Achieved vs target rate since the last report
+                    now = time.monotonic()
+                    generated, indexed, failed, lag = totals()
+                    elapsed = now - last_report[0]
+                    print(f"[{current_time.strftime('%H:%M:%S')}] {status} - target {rate:,} docs/s | "
+                          f"generated {(generated - last_report[1]) / elapsed:,.0f}/s | indexed {(indexed - last_report[2]) / elapsed:,.0f}/s | "
+                          f"failed {failed:,} | lag {lag:.1f}s", flush=True)
+                    last_report = (now, generated, indexed)
+                    report_at = now + LIVE_REPORT_INTERVAL
+        finally:
+            if control is not None:
+                await control.cleanup()
+            if processes:
+                for plans in plan_queues:
+                    plans.put(None)
+                deadline = time.monotonic() + LIVE_DRAIN_TIMEOUT + 5  # One bound for all workers
+                for process in processes:
+                    process.join(timeout=max(0.0, deadline - time.monotonic()))
+                    if process.is_alive():
+                        process.terminate()
             else:
-                status = "✅ HEALTHY"
-            print(f"[{current_time.strftime('%H:%M:%S')}] {status} - Indexed {len(batch)} documents", end='\r')
-            
-            # Wait 1 second
-            await asyncio.sleep(1)
+                await self._stop_live_flusher(buffer, flusher)
+            generated, indexed, failed, _ = totals()
+            elapsed = time.monotonic() - clock_start
+            print(f"\nLive mode stopped after {elapsed:.0f}s: {generated:,} documents generated, {indexed:,} indexed, "
+                  f"{failed:,} failed" + (f" - average {indexed / elapsed:,.0f} docs/s indexed (target {rate:,})"
+                                          if rate is not None and elapsed > 0 else ""))
+
+
+def parse_start_time(value: str) -> datetime:
+    """argparse type for --start-time (naive timestamps are treated as UTC)"""
+    start_time = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    return start_time
+
+
+def parse_size(value: str) -> int:
+    """argparse type for sizes: a number with an optional KB/MB/GB suffix (e.g. 8MB)"""
+    text = value.strip().upper().rstrip("B")
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a size like 8MB, got {value}")
+
+
+def parse_range(value: str) -> tuple:
+    """argparse type for MIN:MAX bounds (counts or sizes)"""
+    try:
+        low, high = (parse_size(part) for part in value.split(":"))
+    except (ValueError, argparse.ArgumentTypeError):
+        raise argparse.ArgumentTypeError("expected MIN:MAX, e.g. 1:16 or 1MB:15MB")
+    if not 0 < low <= high:
+        raise argparse.ArgumentTypeError("expected 0 < MIN <= MAX")
+    return low, high
+
+
+def parse_slice(value: str) -> tuple:
+    """argparse type for --slice START:END (seconds from dataset start)"""
+    try:
+        first, last = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected START:END in seconds, e.g. 3600:7200")
+    return first, last
+
+
+def create_es_client() -> AsyncElasticsearch:
+    """Create the async client from ES_CLOUD_ID/ES_API_KEY (also used by ingest worker processes)"""
+    if ES_CLOUD_ID and (ES_CLOUD_ID.startswith("https://") or ES_CLOUD_ID.startswith("http://")):
+        # URL-based connection (http:// or https://)
+        connection = {"hosts": [ES_CLOUD_ID]}
+    else:
+        # Traditional Cloud ID connection
+        connection = {"cloud_id": ES_CLOUD_ID}
+    return AsyncElasticsearch(
+        **connection,
+        api_key=ES_API_KEY,
+        request_timeout=300,  # Increased for large parallel batches
+        max_retries=3,
+        retry_on_timeout=True,
+        serializers={NdjsonSerializer.mimetype: PassthroughNdjsonSerializer()}  # Pre-framed bodies go out as-is
+    )
 
 
 async def main():
@@ -1080,27 +3547,110 @@ async def main():
     parser.add_argument("--live", action="store_true", help="Run in live mode with anomaly injection (default)")
     parser.add_argument("--generate-only", action="store_true", help="Generate to local file only (no ES connection required)")
     parser.add_argument("--days", type=int, default=7, help="Number of days to generate (default: 7)")
+    parser.add_argument("--engine", choices=ENGINES, default="auto",
+                        help="Generation engine for --generate-only/--backfill: numpy (vectorized) or python (default: auto = numpy if installed)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for reproducible generation (default: random, logged and saved to backfill_progress.json)")
+    parser.add_argument("--start-time", type=parse_start_time, default=None,
+                        help="Dataset start time, ISO 8601 (default: now minus --days). Use with --seed to regenerate a dataset")
+    parser.add_argument("--slice", type=parse_slice, default=None, metavar="START:END",
+                        help="With --generate-only: regenerate only seconds START:END of the dataset "
+                             "(seed/start time/days default to the values in backfill_progress.json)")
+    parser.add_argument("--compress", choices=list(COMPRESSION_EXTENSIONS), default="none",
+                        help="Compress the generated dataset (backfill_data.jsonl.gz / .zst); ingest decompresses transparently")
+    parser.add_argument("--output-layout", choices=OUTPUT_LAYOUTS, default="merged",
+                        help="merged: splice worker chunks into one file in the kernel; "
+                             "chunks: skip the merge and ingest the chunk files via a manifest (default: merged)")
+    parser.add_argument("--format", dest="dataset_format", choices=DATASET_FORMATS, default="jsonl",
+                        help="jsonl: one document per line; bulk: pre-framed _bulk batches (backfill_data.bulk) "
+                             "that ingest memory-maps and sends without parsing (default: jsonl)")
+    parser.add_argument("--summaries", action="store_true",
+                        help="Also compute per-service, per-minute rollups while generating (backfill_data.jsonl.summary.jsonl) "
+                             f"and ingest them into {SUMMARY_INDEX_NAME}")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse datasets from (and add them to) a local cache keyed by days, seed, format options, "
+                             "scenarios.json and VERSION (timestamps are shifted to the requested window) - needs --seed")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"Dataset cache directory (default: $DATA_SPRAYER_CACHE_DIR or {CACHE_DIR})")
+    parser.add_argument("--cache-size", type=parse_size, default=CACHE_MAX_BYTES, metavar="SIZE",
+                        help="Evict least recently used cached datasets beyond this size, e.g. 20GB (default: 20GB)")
+    parser.add_argument("--validate-sample", type=int, default=0, metavar="N",
+                        help="With --backfill: json.loads every Nth line before sending and skip lines that fail "
+                             "(default: 0 = send lines unparsed)")
+    parser.add_argument("--concurrency", type=int, default=2,
+                        help="With --backfill: bulk requests in flight at start (default: 2)")
+    parser.add_argument("--concurrency-range", type=parse_range, default=(1, 16), metavar="MIN:MAX",
+                        help="Bounds for the adaptive in-flight bulk requests (default: 1:16)")
+    parser.add_argument("--batch-bytes", type=parse_size, default=8 * 1024 * 1024, metavar="SIZE",
+                        help="With --backfill: bulk request body size at start, e.g. 8MB (default: 8MB)")
+    parser.add_argument("--batch-bytes-range", type=parse_range, default=(1024 * 1024, 15 * 1024 * 1024), metavar="MIN:MAX",
+                        help="Bounds for the adaptive bulk request size (default: 1MB:15MB)")
+    parser.add_argument("--max-batch-docs", type=int, default=50000,
+                        help="Cap on docs per bulk request, whatever their size (default: 50000)")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="Keep --concurrency/--batch-bytes fixed instead of adapting them (AIMD) to the cluster")
+    parser.add_argument("--ingest-workers", type=int, default=1, metavar="N",
+                        help="With --backfill: split the dataset into N line-aligned ranges ingested by N processes, "
+                             "each with its own client and bulk pipeline (default: 1)")
+    parser.add_argument("--stream", action="store_true",
+                        help="With --backfill: generate straight into Elasticsearch with no intermediate file "
+                             "(no resume - an interrupted stream starts over)")
+    parser.add_argument("--rate", type=int, default=None, metavar="N",
+                        help="With --live: generate N docs/sec spread across each second, cycling through the services, "
+                             "instead of one doc per service per second (load testing)")
+    parser.add_argument("--live-workers", type=int, default=1, metavar="N",
+                        help="With --live --rate: split the rate across N generator processes, each with its own "
+                             "client and flusher, following one shared anomaly schedule (default: 1)")
+    parser.add_argument("--control-port", type=int, default=LIVE_CONTROL_PORT, metavar="PORT",
+                        help="With --live: port of the localhost control endpoint for starting/stopping scenarios, "
+                             f"changing the rate and reading status; 0 disables it (default: {LIVE_CONTROL_PORT}, "
+                             "env DATA_SPRAYER_CONTROL_PORT)")
     args = parser.parse_args()
+    if args.rate is not None and args.rate < 1:
+        parser.error("--rate must be at least 1")
+    if args.live_workers > 1 and args.rate is None:
+        parser.error("--live-workers needs --rate")
     
     # Log version on startup
     print(f"[Data Sprayer] Version: {VERSION}")
     
+    cache = DatasetCache(args.cache_dir, args.cache_size) if args.cache else None
+    
     # Generate-only mode doesn't need ES credentials
     if args.generate_only:
-        output_file = "backfill_data.jsonl"
+        output_file = dataset_filename("backfill_data.jsonl", args.compress, args.output_layout, args.dataset_format)
         progress_file = "backfill_progress.json"
         
+        # Create a minimal sprayer for file generation
+        sprayer = DataSprayer(None)  # No ES client needed
+        
+        if args.slice:
+            # Regenerate a slice of an existing dataset from its recorded seed/start time
+            recorded = sprayer._load_progress(progress_file)
+            if args.seed is None:
+                args.seed = recorded.get("seed")
+            if args.engine == "auto":
+                args.engine = recorded.get("engine", "auto")  # Engines produce different streams
+            if args.start_time is None and recorded.get("start_time"):
+                args.start_time = parse_start_time(recorded["start_time"])
+                args.days = recorded.get("days", args.days)
+            if args.seed is None or args.start_time is None:
+                print("Error: --slice needs --seed and --start-time (or a backfill_progress.json that records them)")
+                sys.exit(1)
+            output_file = dataset_filename(f"backfill_slice_{args.slice[0]}_{args.slice[1]}.jsonl", args.compress,
+                                           args.output_layout, args.dataset_format)
+        
         print("\n" + "=" * 70)
         print(f"GENERATE-ONLY MODE: {args.days} Days Historical Data Generation")
         print("=" * 70)
         print("Generating to local file only - no Elasticsearch connection required")
         print()
         
-        # Create a minimal sprayer for file generation
-        sprayer = DataSprayer(None)  # No ES client needed
-        
-        # Generate to file using parallel method for speed
-        await sprayer._generate_to_file_parallel(output_file, progress_file, args.days)
+        # Generate to file using parallel method for speed (slices are never cached)
+        await sprayer._generate_to_file(output_file, progress_file, args.days, cache=None if args.slice else cache,
+                                        engine=args.engine, seed=args.seed, start_time=args.start_time,
+                                        slice_range=args.slice, compress=args.compress, output_layout=args.output_layout,
+                                        dataset_format=args.dataset_format, summaries=args.summaries)
         
         print("\n" + "=" * 70)
         print("✅ GENERATION COMPLETE!")
@@ -1125,25 +3675,10 @@ async def main():
     es_client = None
     try:
         if ES_CLOUD_ID and (ES_CLOUD_ID.startswith("https://") or ES_CLOUD_ID.startswith("http://")):
-            # URL-based connection (http:// or https://)
             print(f"[DEBUG] Using URL-based connection: {ES_CLOUD_ID}")
-            es_client = AsyncElasticsearch(
-                hosts=[ES_CLOUD_ID],
-                api_key=ES_API_KEY,
-                request_timeout=300,  # Increased for large parallel batches
-                max_retries=3,
-                retry_on_timeout=True
-            )
         else:
-            # Traditional Cloud ID connection
             print(f"[DEBUG] Using Cloud ID-based connection")
-            es_client = AsyncElasticsearch(
-                cloud_id=ES_CLOUD_ID,
-                api_key=ES_API_KEY,
-                request_timeout=300,  # Increased for large parallel batches
-                max_retries=3,
-                retry_on_timeout=True
-            )
+        es_client = create_es_client()
         print("[DEBUG] Elasticsearch client created successfully")
     except Exception as e:
         print("\n" + "=" * 70)
@@ -1169,10 +3704,20 @@ async def main():
         
         # Run appropriate mode
         if args.backfill:
-            await sprayer.backfill()
+            bulk_controller = AdaptiveBulkController(
+                concurrency=args.concurrency, batch_bytes=args.batch_bytes,
+                concurrency_range=args.concurrency_range, batch_bytes_range=args.batch_bytes_range,
+                max_batch_docs=args.max_batch_docs,
+                adaptive=not args.no_adaptive
+            )
+            await sprayer.backfill(days=args.days, stream=args.stream, validate_sample=args.validate_sample,
+                                   bulk_controller=bulk_controller, ingest_workers=args.ingest_workers,
+                                   engine=args.engine, seed=args.seed,
+                                   start_time=args.start_time, compress=args.compress, output_layout=args.output_layout,
+                                   dataset_format=args.dataset_format, summaries=args.summaries, cache=cache)
         else:
             # Default to live mode
-            await sprayer.live()
+            await sprayer.live(rate=args.rate, workers=args.live_workers, control_port=args.control_port)
     
     except KeyboardInterrupt:
         print("\n\nShutting down gracefully...")
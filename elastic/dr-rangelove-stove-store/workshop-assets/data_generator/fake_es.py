@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Fake Elasticsearch - local stand-in for the endpoints data_sprayer.py and setup.py use, with
+fault injection, so ingest throughput, backoff and stall recovery can be exercised offline / in CI.
+
+Implements info, cluster health, _bulk, index create/exists/delete/settings/stats/refresh/
+forcemerge/count, index templates and data streams (in memory - documents are counted, not stored).
+A data stream created from a time_series template reports temporal_ranges from the template's
+index.look_back_time/look_ahead_time and rejects create ops whose @timestamp falls outside them
+(ranges keep moving forward, as if the lifecycle rolled the stream over).
+
+Fault injection (all optional, drawn from --seed):
+- --latency SPEC: per-request latency in ms - fixed:MS, uniform:LOW:HIGH, normal:MEAN:STDDEV,
+  lognormal:MEDIAN:SIGMA or exp:MEAN
+- --max-docs-per-sec N: throughput cap - requests queue behind each other like a saturated cluster
+- --reject-rate P: fraction of bulk items rejected with 429 (es_rejected_execution_exception)
+- --request-reject-rate P: fraction of whole _bulk requests answered 429
+- --item-failure-rate P: fraction of bulk items failing permanently (400 mapper_parsing_exception)
+- --hang-rate P: fraction of _bulk requests that never answer (until --hang-seconds)
+- --stall START:END: every _bulk request between START and END seconds after startup hangs until END
+
+Control endpoints (not part of the Elasticsearch API):
+- GET  /_fake/stats   counters: requests, docs received/indexed/rejected/failed, hangs, per-index docs
+- POST /_fake/reset   zero the counters
+- POST /_fake/config  change fault settings at runtime, e.g. {"reject_rate": 0, "stall": null}
+
+Usage:
+  python3 fake_es.py                                   # http://127.0.0.1:9200
+  python3 fake_es.py --port 0 --latency lognormal:50:0.5 --reject-rate 0.02 --stall 60:360
+  ELASTICSEARCH_URL=http://127.0.0.1:9200 ELASTIC_API_KEY=x python3 data_sprayer.py --backfill --days 1
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import random
+import re
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+VERSION_NUMBER = "8.15.0"
+HEADERS = {"X-Elastic-Product": "Elasticsearch"}
+REPORT_INTERVAL = 10.0  # Seconds between throughput reports (when something was received)
+LATENCY_DISTRIBUTIONS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+TSDS_LOOK_BACK = "2h"  # Elasticsearch defaults for index.look_back_time / index.look_ahead_time
+TSDS_LOOK_AHEAD = "30m"
+DURATION_UNITS = {"d": 86400, "h": 3600, "m": 60, "s": 1, "ms": 0.001}
+TIMESTAMP_FIELD = re.compile(rb'"@timestamp":\s*"([^"]+)"')
+FAULT_SETTINGS = ("latency", "max_docs_per_sec", "reject_rate", "request_reject_rate", "item_failure_rate",
+                  "hang_rate", "hang_seconds", "stall")
+
+
+def parse_latency(spec: Optional[str]) -> Optional[tuple]:
+    """--latency SPEC -> (distribution, params in ms); None for no added latency"""
+    if not spec:
+        return None
+    name, *params = spec.split(":")
+    if name not in LATENCY_DISTRIBUTIONS or len(params) != LATENCY_DISTRIBUTIONS[name]:
+        raise ValueError(f"invalid latency {spec!r} - use fixed:MS, uniform:LOW:HIGH, normal:MEAN:STDDEV, "
+                         f"lognormal:MEDIAN:SIGMA or exp:MEAN")
+    return name, tuple(float(p) for p in params)
+
+
+def parse_stall(spec) -> Optional[tuple]:
+    """--stall START:END (seconds after startup) -> (start, end)"""
+    if not spec:
+        return None
+    start, end = (float(v) for v in spec.split(":")) if isinstance(spec, str) else spec
+    if end <= start:
+        raise ValueError(f"invalid stall {spec!r} - END must be after START")
+    return start, end
+
+
+def parse_duration(value: str) -> timedelta:
+    """Elasticsearch time value (7d, 2h, 30m, ...) -> timedelta"""
+    match = re.fullmatch(r"(\d+)(d|h|ms|m|s)", str(value).strip())
+    if not match:
+        raise ValueError(f"invalid time value {value!r}")
+    return timedelta(seconds=int(match.group(1)) * DURATION_UNITS[match.group(2)])
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def error_body(status: int, error_type: str, reason: str) -> Dict[str, Any]:
+    return {"error": {"root_cause": [{"type": error_type, "reason": reason}], "type": error_type, "reason": reason},
+            "status": status}
+
+
+class FakeCluster:
+    """Index state, fault settings and counters behind the aiohttp routes"""
+
+    def __init__(self, args):
+        self.rng = random.Random(args.seed)
+        self.started = time.monotonic()
+        self.indices: Dict[str, Dict[str, Any]] = {}
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self.configure({key: getattr(args, key) for key in FAULT_SETTINGS})
+        self.quiet = args.quiet
+        self.next_free = 0.0  # Throughput cap: when the "cluster" can start on the next request
+        self.actions: Dict[bytes, tuple] = {}  # Action line -> (op type, _index), parsed once
+        self.reset()
+
+    def configure(self, config: Dict[str, Any]):
+        """Apply fault settings (same names as the command line options, with underscores) - all or nothing"""
+        unknown = set(config) - set(FAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"unknown setting(s): {', '.join(sorted(unknown))}")
+        parsed = {}
+        for key, value in config.items():
+            if key == "latency":
+                parsed[key] = parse_latency(value)
+            elif key == "stall":
+                parsed[key] = parse_stall(value)
+            else:
+                parsed[key] = float(value or 0)
+                if key.endswith("_rate") and not 0 <= parsed[key] <= 1:
+                    raise ValueError(f"{key} must be between 0 and 1")
+        for key, value in parsed.items():
+            setattr(self, key, value)
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "latency": ":".join([self.latency[0]] + [f"{p:g}" for p in self.latency[1]]) if self.latency else None,
+            "max_docs_per_sec": self.max_docs_per_sec,
+            "reject_rate": self.reject_rate,
+            "request_reject_rate": self.request_reject_rate,
+            "item_failure_rate": self.item_failure_rate,
+            "hang_rate": self.hang_rate,
+            "hang_seconds": self.hang_seconds,
+            "stall": list(self.stall) if self.stall else None,
+        }
+
+    def reset(self):
+        self.stats = {"requests": 0, "bulk_requests": 0, "rejected_requests": 0, "hung_requests": 0,
+                      "docs_received": 0, "docs_indexed": 0, "docs_rejected": 0, "docs_failed": 0, "bytes_received": 0}
+        self.reset_at = time.monotonic()
+        for index in self.indices.values():
+            index["docs"] = 0
+            index["bytes"] = 0
+
+    def index(self, name: str, create: bool = True) -> Optional[Dict[str, Any]]:
+        if name not in self.indices and create:
+            self.indices[name] = {"settings": {"index.number_of_shards": "1", "index.number_of_replicas": "1",
+                                               "index.refresh_interval": "1s"},
+                                  "mappings": {}, "docs": 0, "bytes": 0, "data_stream": False, "time_series": None}
+        return self.indices.get(name)
+
+    def time_series_template(self, name: str) -> Optional[Dict[str, str]]:
+        """Flattened settings of the highest-priority template matching name, if it is a time_series template"""
+        matching = [t for t in self.templates.values()
+                    if any(fnmatch.fnmatchcase(name, pattern) for pattern in t.get("index_patterns", []))]
+        if not matching:
+            return None
+        template = max(matching, key=lambda t: t.get("priority", 0))
+        settings = {}
+        pending = [("", template.get("template", {}).get("settings", {}))]
+        while pending:
+            prefix, values = pending.pop()
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    pending.append((f"{prefix}{key}.", value))
+                else:
+                    settings[f"{prefix}{key}"] = value
+        settings = {key if key.startswith("index.") else f"index.{key}": value for key, value in settings.items()}
+        return settings if settings.get("index.mode") == "time_series" else None
+
+    @staticmethod
+    def temporal_range(index: Dict[str, Any]) -> tuple:
+        """(start, end) @timestamps a time-series data stream accepts right now"""
+        time_series = index["time_series"]
+        return time_series["start"], datetime.now(timezone.utc) + time_series["look_ahead"]
+
+    def draw_latency(self) -> float:
+        """Seconds of latency for one request"""
+        if self.latency is None:
+            return 0.0
+        name, params = self.latency
+        if name == "fixed":
+            ms = params[0]
+        elif name == "uniform":
+            ms = self.rng.uniform(*params)
+        elif name == "normal":
+            ms = self.rng.gauss(*params)
+        elif name == "lognormal":
+            ms = params[0] * self.rng.lognormvariate(0, params[1])
+        else:
+            ms = self.rng.expovariate(1 / params[0]) if params[0] > 0 else 0
+        return max(0.0, ms) / 1000
+
+    def uptime(self) -> float:
+        return time.monotonic() - self.started
+
+    async def report(self):
+        """Print received/indexed docs per second while data is coming in"""
+        last = dict(self.stats)
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            if self.stats["docs_received"] == last["docs_received"] or self.quiet:
+                last = dict(self.stats)
+                continue
+            rate = (self.stats["docs_indexed"] - last["docs_indexed"]) / REPORT_INTERVAL
+            print(f"[Fake ES] {rate:,.0f} docs/s indexed | total received {self.stats['docs_received']:,}, "
+                  f"indexed {self.stats['docs_indexed']:,}, rejected {self.stats['docs_rejected']:,}, "
+                  f"failed {self.stats['docs_failed']:,}, hung requests {self.stats['hung_requests']:,}", flush=True)
+            last = dict(self.stats)
+
+
+def json_response(data: Any, status: int = 200) -> web.Response:
+    return web.json_response(data, status=status, headers=HEADERS)
+
+
+def not_found(name: str) -> web.Response:
+    return json_response(error_body(404, "index_not_found_exception", f"no such index [{name}]"), status=404)
+
+
+def build_app(cluster: FakeCluster) -> web.Application:
+    routes = web.RouteTableDef()
+
+    @web.middleware
+    async def count_requests(request, handler):
+        cluster.stats["requests"] += 1
+        return await handler(request)
+
+    # --- Cluster ---
+
+    @routes.get("/")  # Also answers HEAD (ping)
+    async def info(request):
+        return json_response({"name": "fake-es", "cluster_name": "fake-es",
+                              "version": {"number": VERSION_NUMBER, "build_flavor": "default"},
+                              "tagline": "You Know, for Search"})
+
+    @routes.get("/_cluster/health")
+    @routes.get("/_cluster/health/{index}")
+    async def health(request):
+        return json_response({"cluster_name": "fake-es", "status": "green", "timed_out": False,
+                              "number_of_nodes": 1, "number_of_data_nodes": 1,
+                              "active_primary_shards": len(cluster.indices), "active_shards": len(cluster.indices),
+                              "relocating_shards": 0, "initializing_shards": 0, "unassigned_shards": 0,
+                              "number_of_pending_tasks": 0})
+
+    # --- Bulk ---
+
+    def time_series_error(index: Dict[str, Any], op_type: str, source: bytes) -> Optional[dict]:
+        """Error for a bulk item a data stream would refuse (None if it is accepted)"""
+        if op_type != "create":
+            return {"type": "illegal_argument_exception",
+                    "reason": "only write ops with an op_type of create are allowed in data streams"}
+        if not index["time_series"]:
+            return None
+        match = TIMESTAMP_FIELD.search(source)
+        if not match:
+            return {"type": "illegal_argument_exception", "reason": "data stream timestamp field [@timestamp] is missing"}
+        try:
+            timestamp = datetime.fromisoformat(match.group(1).decode())
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+        except ValueError:
+            return {"type": "document_parsing_exception",
+                    "reason": f"failed to parse field [@timestamp] with value [{match.group(1).decode()}]"}
+        start, end = cluster.temporal_range(index)
+        if start <= timestamp < end:
+            return None
+        return {"type": "illegal_argument_exception",
+                "reason": f"the document timestamp [{format_timestamp(timestamp)}] is outside of ranges of currently "
+                          f"writable indices [[{format_timestamp(start)},{format_timestamp(end)}]]"}
+
+    async def bulk(request):
+        body = await request.read()
+        cluster.stats["bulk_requests"] += 1
+        cluster.stats["bytes_received"] += len(body)
+        lines = body.split(b"\n")
+        if lines and not lines[-1]:
+            lines.pop()
+        actions = lines[0::2]
+        docs = len(actions)
+        cluster.stats["docs_received"] += docs
+        start = time.monotonic()
+
+        # Hangs: a stall window (until it ends) or a random hang (for hang_seconds)
+        uptime = cluster.uptime()
+        hang = None
+        if cluster.stall and cluster.stall[0] <= uptime < cluster.stall[1]:
+            hang = cluster.stall[1] - uptime
+        elif cluster.hang_rate and cluster.rng.random() < cluster.hang_rate:
+            hang = cluster.hang_seconds
+        if hang:
+            cluster.stats["hung_requests"] += 1
+            await asyncio.sleep(hang)
+
+        await asyncio.sleep(cluster.draw_latency())
+        if cluster.request_reject_rate and cluster.rng.random() < cluster.request_reject_rate:
+            cluster.stats["rejected_requests"] += 1
+            cluster.stats["docs_rejected"] += docs
+            return json_response(error_body(429, "es_rejected_execution_exception",
+                                            "rejected execution of coordinating operation"), status=429)
+
+        # Throughput cap: this request occupies the cluster for docs / max_docs_per_sec seconds
+        if cluster.max_docs_per_sec:
+            now = time.monotonic()
+            cluster.next_free = max(now, cluster.next_free) + docs / cluster.max_docs_per_sec
+            await asyncio.sleep(cluster.next_free - now)
+
+        default_index = request.match_info.get("index")
+        items = []
+        errors = False
+        for action, source in zip(actions, lines[1::2]):
+            parsed = cluster.actions.get(action)
+            if parsed is None:
+                op_type, meta = next(iter(json.loads(action).items()))
+                parsed = cluster.actions[action] = (op_type, meta.get("_index"))
+                if len(cluster.actions) > 10000:
+                    cluster.actions.clear()  # Per-doc _id actions - don't keep them all
+            op_type, index_name = parsed
+            index_name = index_name or default_index
+            index = cluster.index(index_name, create=False) if index_name else None
+            draw = cluster.rng.random() if cluster.reject_rate or cluster.item_failure_rate else 1.0
+            error = None
+            if not index_name:
+                error = {"type": "action_request_validation_exception", "reason": "Validation Failed: 1: index is missing;"}
+            elif index and index["data_stream"]:
+                error = time_series_error(index, op_type, source)
+            if error:
+                status = 400
+                cluster.stats["docs_failed"] += 1
+            elif draw < cluster.reject_rate:
+                status, error = 429, {"type": "es_rejected_execution_exception",
+                                      "reason": "rejected execution of primary operation"}
+                cluster.stats["docs_rejected"] += 1
+            elif draw < cluster.reject_rate + cluster.item_failure_rate:
+                status, error = 400, {"type": "mapper_parsing_exception", "reason": "failed to parse (injected)"}
+                cluster.stats["docs_failed"] += 1
+            else:
+                status, error = 201 if op_type == "create" else 200, None
+                cluster.stats["docs_indexed"] += 1
+                index = index or cluster.index(index_name)
+                index["docs"] += 1
+                index["bytes"] += len(source)
+            if error:
+                errors = True
+                items.append({op_type: {"_index": index_name, "status": status, "error": error}})
+            else:
+                items.append({op_type: {"_index": index_name, "result": "created", "status": status}})
+        took = int((time.monotonic() - start) * 1000)
+        return json_response({"errors": errors, "took": took, "items": items})
+
+    for path in ("/_bulk", "/{index}/_bulk"):
+        routes.post(path)(bulk)
+        routes.put(path)(bulk)
+
+    # --- Templates and data streams ---
+
+    @routes.put("/_index_template/{name}")
+    @routes.post("/_index_template/{name}")
+    async def put_template(request):
+        cluster.templates[request.match_info["name"]] = await request.json()
+        return json_response({"acknowledged": True})
+
+    @routes.head("/_index_template/{name}")
+    async def template_exists(request):
+        return web.Response(status=200 if request.match_info["name"] in cluster.templates else 404, headers=HEADERS)
+
+    @routes.put("/_data_stream/{name}")
+    async def create_data_stream(request):
+        name = request.match_info["name"]
+        if name in cluster.indices:
+            return json_response(error_body(400, "resource_already_exists_exception",
+                                            f"data_stream [{name}] already exists"), status=400)
+        settings = cluster.time_series_template(name)
+        index = cluster.index(name)
+        index["data_stream"] = True
+        if settings:
+            # Backing indices reach back look_back_time from creation and look_ahead_time past now
+            index["time_series"] = {
+                "start": datetime.now(timezone.utc) - parse_duration(settings.get("index.look_back_time", TSDS_LOOK_BACK)),
+                "look_ahead": parse_duration(settings.get("index.look_ahead_time", TSDS_LOOK_AHEAD))
+            }
+        return json_response({"acknowledged": True})
+
+    @routes.get("/_data_stream/{name}")
+    async def get_data_stream(request):
+        name = request.match_info["name"]
+        index = cluster.index(name, create=False)
+        if not index or not index["data_stream"]:
+            return json_response(error_body(404, "index_not_found_exception", f"no such index [{name}]"), status=404)
+        stream = {"name": name, "status": "GREEN", "indices": []}
+        if index["time_series"]:
+            start, end = cluster.temporal_range(index)
+            stream["time_series"] = {"temporal_ranges": [{"start": format_timestamp(start), "end": format_timestamp(end)}]}
+        return json_response({"data_streams": [stream]})
+
+    # --- Fake control ---
+
+    @routes.get("/_fake/stats")
+    async def fake_stats(request):
+        elapsed = time.monotonic() - cluster.reset_at
+        return json_response(dict(cluster.stats, seconds=round(elapsed, 1), settings=cluster.settings(),
+                                  indexed_per_second=round(cluster.stats["docs_indexed"] / elapsed) if elapsed else 0,
+                                  indices={name: index["docs"] for name, index in cluster.indices.items()}))
+
+    @routes.post("/_fake/reset")
+    async def fake_reset(request):
+        cluster.reset()
+        return json_response({"acknowledged": True})
+
+    @routes.post("/_fake/config")
+    async def fake_config(request):
+        try:
+            cluster.configure(await request.json())
+        except (ValueError, TypeError) as e:
+            return json_response({"error": str(e)}, status=400)
+        print(f"[Fake ES] Settings: {json.dumps(cluster.settings())}", flush=True)
+        return json_response(cluster.settings())
+
+    # --- Indices ---
+
+    @routes.head("/{index}")
+    async def index_exists(request):
+        exists = all(cluster.index(name, create=False) for name in request.match_info["index"].split(","))
+        return web.Response(status=200 if exists else 404, headers=HEADERS)
+
+    @routes.put("/{index}")
+    async def create_index(request):
+        name = request.match_info["index"]
+        if name in cluster.indices:
+            return json_response(error_body(400, "resource_already_exists_exception", f"index [{name}] already exists"),
+                                 status=400)
+        body = await request.json() if request.can_read_body else {}
+        index = cluster.index(name)
+        index["mappings"] = body.get("mappings", {})
+        for key, value in body.get("settings", {}).items():
+            index["settings"][key if key.startswith("index.") else f"index.{key}"] = str(value)
+        return json_response({"acknowledged": True, "shards_acknowledged": True, "index": name})
+
+    @routes.delete("/{index}")
+    async def delete_index(request):
+        name = request.match_info["index"]
+        if cluster.indices.pop(name, None) is None:
+            return not_found(name)
+        return json_response({"acknowledged": True})
+
+    @routes.get("/{index}/_settings")
+    async def get_settings(request):
+        name = request.match_info["index"]
+        index = cluster.index(name, create=False)
+        if not index:
+            return not_found(name)
+        return json_response({name: {"settings": dict(index["settings"])}})
+
+    @routes.put("/{index}/_settings")
+    async def put_settings(request):
+        name = request.match_info["index"]
+        index = cluster.index(name, create=False)
+        if not index:
+            return not_found(name)
+        body = await request.json()
+        body = body["index"] if isinstance(body.get("index"), dict) else body
+        for key, value in body.items():
+            key = key if key.startswith("index.") else f"index.{key}"
+            if value is None:
+                index["settings"].pop(key, None)
+            else:
+                index["settings"][key] = str(value)
+        return json_response({"acknowledged": True})
+
+    @routes.get("/{index}/_stats")
+    async def index_stats(request):
+        name = request.match_info["index"]
+        index = cluster.index(name, create=False)
+        if not index:
+            return not_found(name)
+        primaries = {"docs": {"count": index["docs"], "deleted": 0}, "store": {"size_in_bytes": index["bytes"]}}
+        return json_response({"_all": {"primaries": primaries, "total": primaries},
+                              "indices": {name: {"primaries": primaries, "total": primaries}}})
+
+    @routes.post("/{index}/_refresh")
+    @routes.get("/{index}/_refresh")
+    @routes.post("/{index}/_forcemerge")
+    async def shards_ok(request):
+        name = request.match_info["index"]
+        if not cluster.index(name, create=False):
+            return not_found(name)
+        return json_response({"_shards": {"total": 1, "successful": 1, "failed": 0}})
+
+    @routes.get("/{index}/_count")
+    @routes.post("/{index}/_count")
+    async def count(request):
+        name = request.match_info["index"]
+        index = cluster.index(name, create=False)
+        if not index:
+            return not_found(name)
+        return json_response({"count": index["docs"], "_shards": {"total": 1, "successful": 1, "failed": 0}})
+
+    app = web.Application(middlewares=[count_requests], client_max_size=1 << 30)
+    app.add_routes(routes)
+    return app
+
+
+async def serve(args):
+    cluster = FakeCluster(args)
+    runner = web.AppRunner(build_app(cluster), access_log=None)
+    await runner.setup()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    await web.SockSite(runner, sock).start()
+    host, port = sock.getsockname()[:2]
+    # First line of output - scripts starting this with --port 0 read the URL from it
+    print(f"[Fake ES] Listening on http://{host}:{port}", flush=True)
+    print(f"[Fake ES] Settings: {json.dumps(cluster.settings())}", flush=True)
+    reporter = asyncio.create_task(cluster.report())
+    try:
+        await asyncio.Event().wait()
+    finally:
+        reporter.cancel()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Elasticsearch for offline ingest testing (with fault injection)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=9200, help="Port to listen on; 0 picks a free one (default: 9200)")
+    parser.add_argument("--latency", default=None, metavar="SPEC",
+                        help="Per-request latency in ms: fixed:MS, uniform:LOW:HIGH, normal:MEAN:STDDEV, "
+                             "lognormal:MEDIAN:SIGMA or exp:MEAN (default: none)")
+    parser.add_argument("--max-docs-per-sec", type=float, default=0, metavar="N",
+                        help="Throughput cap; requests queue behind each other (default: unlimited)")
+    parser.add_argument("--reject-rate", type=float, default=0.0, metavar="P",
+                        help="Fraction of bulk items rejected with 429 (default: 0)")
+    parser.add_argument("--request-reject-rate", type=float, default=0.0, metavar="P",
+                        help="Fraction of _bulk requests answered 429 as a whole (default: 0)")
+    parser.add_argument("--item-failure-rate", type=float, default=0.0, metavar="P",
+                        help="Fraction of bulk items failing permanently with 400 (default: 0)")
+    parser.add_argument("--hang-rate", type=float, default=0.0, metavar="P",
+                        help="Fraction of _bulk requests that hang for --hang-seconds (default: 0)")
+    parser.add_argument("--hang-seconds", type=float, default=3600.0,
+                        help="How long a random hang lasts (default: 3600 - i.e. until the client gives up)")
+    parser.add_argument("--stall", default=None, metavar="START:END",
+                        help="All _bulk requests between START and END seconds after startup hang until END "
+                             "(e.g. 30:400 to trigger the ingest bailout)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and fault draws")
+    parser.add_argument("--quiet", action="store_true", help="No periodic throughput reports")
+    args = parser.parse_args()
+    try:
+        FakeCluster(args)  # Validate the fault settings before starting
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
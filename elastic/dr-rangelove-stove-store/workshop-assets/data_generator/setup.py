@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 """
 Minimal setup script for workshop - creates o11y-heartbeat index with proper mappings
+(and the o11y-heartbeat-summary index for data_sprayer.py --summaries)
+
+    python3 setup.py                                   # Create the index
+    python3 setup.py --tsds                            # Create it as a time-series data stream instead
+    python3 setup.py --bulk-load -- <command...>       # Create it, run <command> with bulk-load settings, restore them
+    python3 setup.py --restore                         # Restore settings left behind by an interrupted bulk load
 """
+import argparse
+import json
 import os
+import signal
+import subprocess
 import sys
 from elasticsearch import Elasticsearch
 
@@ -14,9 +24,92 @@ if not ES_URL or not ES_API_KEY:
     print("ERROR: ELASTIC_CLOUD_ID/ELASTICSEARCH_URL and ELASTIC_API_KEY/ELASTICSEARCH_APIKEY must be set")
     sys.exit(1)
 
-def main():
+INDEX_NAME = "o11y-heartbeat"
+TEMPLATE_NAME = "o11y-heartbeat-tsds"
+SUMMARY_INDEX_NAME = "o11y-heartbeat-summary"
+
+MAPPINGS = {
+    "properties": {
+        "@timestamp": {"type": "date"},
+        "service.name": {"type": "keyword"},
+        "latency_ms": {"type": "long"},
+        "http.status_code": {"type": "integer"},
+        "log.message": {"type": "text"},
+        "trace.id": {"type": "keyword"},
+        "span.id": {"type": "keyword"},
+        "transaction": {
+            "properties": {
+                "type": {"type": "keyword"},
+                "amount": {"type": "float"},
+                "status": {"type": "keyword"}
+            }
+        }
+    }
+}
+
+# Per-service, per-minute rollups written by data_sprayer.py --summaries
+SUMMARY_MAPPINGS = {
+    "properties": {
+        "@timestamp": {"type": "date"},
+        "service.name": {"type": "keyword"},
+        "interval": {"type": "keyword"},
+        "doc_count": {"type": "long"},
+        "latency_ms": {
+            "properties": {stat: {"type": "float"} for stat in ["min", "avg", "max", "p50", "p95", "p99"]}
+        },
+        "http.status_class": {
+            "properties": {status_class: {"type": "long"} for status_class in ["2xx", "3xx", "4xx", "5xx"]}
+        },
+        "transaction": {
+            "properties": {
+                "count": {"type": "long"},
+                "success": {"type": "long"},
+                "success_rate": {"type": "float"},
+                "amount_sum": {"type": "double"},
+                "success_amount_sum": {"type": "double"}
+            }
+        }
+    }
+}
+
+# Time-series data stream (--tsds): documents are routed and sorted by service, metrics are
+# stored as gauges and backing indices cover consecutive time ranges. Backing indices only
+# accept @timestamps inside their range - the first one reaches back look_back_time, which
+# must cover the backfill (Elasticsearch allows at most 7d).
+TSDS_LOOK_BACK = "7d"
+TSDS_MAPPINGS = {
+    "properties": {
+        **MAPPINGS["properties"],
+        "service.name": {"type": "keyword", "time_series_dimension": True},
+        "latency_ms": {"type": "long", "time_series_metric": "gauge"},
+        "transaction": {
+            "properties": {
+                **MAPPINGS["properties"]["transaction"]["properties"],
+                "amount": {"type": "float", "time_series_metric": "gauge"}
+            }
+        }
+    }
+}
+
+# Index settings while bulk loading: no periodic refresh, no replica copies, fsync the
+# translog in the background instead of on every bulk request
+BULK_LOAD_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.number_of_replicas": "0",
+    "index.translog.durability": "async",
+}
+# Original values of the settings above, kept until they are restored - an interrupted
+# or killed bulk load is cleaned up by the next --bulk-load or --restore
+BULK_LOAD_STATE_FILE = "bulk_load_settings.json"
+
+
+class Interrupted(Exception):
+    """Raised from a signal handler so the bulk load unwinds through its finally block"""
+
+
+def connect() -> Elasticsearch:
     print(f"[Setup] Connecting to {ES_URL}")
-    
+
     # Connect to Elasticsearch
     if ES_URL.startswith("https://") or ES_URL.startswith("http://"):
         # URL-based connection
@@ -32,7 +125,7 @@ def main():
             api_key=ES_API_KEY,
             request_timeout=60
         )
-    
+
     # Test connection
     try:
         info = es.info()
@@ -40,38 +133,22 @@ def main():
     except Exception as e:
         print(f"[Setup] ERROR: Failed to connect to Elasticsearch: {e}")
         sys.exit(1)
-    
+    return es
+
+
+def create_index(es: Elasticsearch, index_name: str = INDEX_NAME, mappings: dict = MAPPINGS):
     # Create index with mappings
-    index_name = "o11y-heartbeat"
-    
     if es.indices.exists(index=index_name):
         print(f"[Setup] Index {index_name} already exists, skipping creation")
         return
-    
+
     print(f"[Setup] Creating index: {index_name}")
-    
+
     try:
         es.indices.create(
             index=index_name,
             body={
-                "mappings": {
-                    "properties": {
-                        "@timestamp": {"type": "date"},
-                        "service.name": {"type": "keyword"},
-                        "latency_ms": {"type": "long"},
-                        "http.status_code": {"type": "integer"},
-                        "log.message": {"type": "text"},
-                        "trace.id": {"type": "keyword"},
-                        "span.id": {"type": "keyword"},
-                        "transaction": {
-                            "properties": {
-                                "type": {"type": "keyword"},
-                                "amount": {"type": "float"},
-                                "status": {"type": "keyword"}
-                            }
-                        }
-                    }
-                }
+                "mappings": mappings
             }
         )
         print(f"[Setup] ✓ Index created: {index_name}")
@@ -79,5 +156,205 @@ def main():
         print(f"[Setup] ERROR: Failed to create index: {e}")
         sys.exit(1)
 
+
+def create_data_stream(es: Elasticsearch, index_name: str = INDEX_NAME, look_back: str = TSDS_LOOK_BACK,
+                       retention: str = None):
+    # Create a time-series data stream (index template + data stream) instead of a plain index
+    if es.indices.exists(index=index_name):
+        if es.indices.exists_index_template(name=TEMPLATE_NAME):
+            print(f"[Setup] Data stream {index_name} already exists, skipping creation")
+            return
+        print(f"[Setup] ERROR: {index_name} already exists as a plain index - delete it to recreate it as a data stream")
+        sys.exit(1)
+
+    print(f"[Setup] Creating index template {TEMPLATE_NAME} (time series, look-back {look_back})")
+
+    lifecycle = {"data_retention": retention} if retention else {}
+    try:
+        es.indices.put_index_template(
+            name=TEMPLATE_NAME,
+            index_patterns=[index_name],
+            data_stream={},
+            priority=500,
+            template={
+                "settings": {
+                    "index.mode": "time_series",
+                    "index.routing_path": ["service.name"],
+                    "index.look_back_time": look_back
+                },
+                "mappings": TSDS_MAPPINGS,
+                "lifecycle": lifecycle  # Data stream lifecycle rolls over to new time-bounded backing indices
+            }
+        )
+        es.indices.create_data_stream(name=index_name)
+        print(f"[Setup] ✓ Time-series data stream created: {index_name}")
+    except Exception as e:
+        print(f"[Setup] ERROR: Failed to create data stream: {e}")
+        sys.exit(1)
+
+
+def apply_bulk_load_settings(es: Elasticsearch, index_name: str = INDEX_NAME):
+    """Save the current values of BULK_LOAD_SETTINGS to the state file, then apply the bulk-load values"""
+    if os.path.exists(BULK_LOAD_STATE_FILE):
+        # A previous bulk load never restored - its saved values are the real originals
+        print(f"[Setup] Found {BULK_LOAD_STATE_FILE} from an interrupted bulk load, keeping its original settings")
+    else:
+        # Keyed by backing index for a data stream - they all share the template's settings
+        current = next(iter(es.indices.get_settings(index=index_name, flat_settings=True).values()))["settings"]
+        # Settings that were never set explicitly are saved as None, which resets them to the default
+        original = {key: current.get(key) for key in BULK_LOAD_SETTINGS}
+        with open(BULK_LOAD_STATE_FILE + ".tmp", "w") as f:
+            json.dump({"index": index_name, "settings": original}, f, indent=2)
+        os.replace(BULK_LOAD_STATE_FILE + ".tmp", BULK_LOAD_STATE_FILE)
+
+    print(f"[Setup] Applying bulk-load settings to {index_name}: {BULK_LOAD_SETTINGS}")
+    try:
+        es.indices.put_settings(index=index_name, settings=BULK_LOAD_SETTINGS)
+    except Exception as e:
+        # Some deployments (e.g. serverless) reject some of these - apply what is allowed
+        print(f"[Setup] ⚠️  Could not apply all bulk-load settings at once ({e}), applying one by one")
+        for key, value in BULK_LOAD_SETTINGS.items():
+            try:
+                es.indices.put_settings(index=index_name, settings={key: value})
+            except Exception as e:
+                print(f"[Setup] ⚠️  Skipping {key}: {e}")
+    print("[Setup] ✓ Bulk-load settings applied")
+
+
+def restore_settings(es: Elasticsearch) -> bool:
+    """
+    Restore the settings saved by apply_bulk_load_settings. Returns False if some could not be
+    restored - those stay in the state file for setup.py --restore; True once none are left.
+    """
+    try:
+        with open(BULK_LOAD_STATE_FILE, "r") as f:
+            state = json.load(f)
+    except OSError:
+        return True
+    index_name = state["index"]
+
+    print(f"[Setup] Restoring index settings on {index_name}: {state['settings']}")
+    remaining = {}
+    try:
+        es.indices.put_settings(index=index_name, settings=state["settings"])
+    except Exception as e:
+        print(f"[Setup] ⚠️  Could not restore all settings at once ({e}), restoring one by one")
+        for key, value in state["settings"].items():
+            try:
+                es.indices.put_settings(index=index_name, settings={key: value})
+            except Exception as e:
+                print(f"[Setup] ⚠️  Could not restore {key}: {e}")
+                remaining[key] = value
+    if remaining:
+        with open(BULK_LOAD_STATE_FILE + ".tmp", "w") as f:
+            json.dump({"index": index_name, "settings": remaining}, f, indent=2)
+        os.replace(BULK_LOAD_STATE_FILE + ".tmp", BULK_LOAD_STATE_FILE)
+        print(f"[Setup] ERROR: {len(remaining)} of {len(state['settings'])} settings not restored on {index_name} "
+              f"(kept in {BULK_LOAD_STATE_FILE})")
+        print(f"[Setup] Run 'python3 setup.py --restore' once Elasticsearch is reachable")
+        return False
+    os.remove(BULK_LOAD_STATE_FILE)
+    print("[Setup] ✓ Index settings restored")
+    return True
+
+
+def finish_bulk_load(es: Elasticsearch, index_name: str = INDEX_NAME, force_merge: bool = False):
+    """Make the loaded documents searchable and optionally merge the segments the load produced"""
+    print(f"[Setup] Refreshing {index_name}...")
+    es.indices.refresh(index=index_name)
+    if force_merge:
+        print(f"[Setup] Force-merging {index_name} to 1 segment (can take a while)...")
+        es.options(request_timeout=3600).indices.forcemerge(index=index_name, max_num_segments=1)
+    count = es.count(index=index_name)["count"]
+    print(f"[Setup] ✓ {index_name} ready with {count:,} documents")
+
+
+def bulk_load(es: Elasticsearch, command, force_merge: bool = False) -> int:
+    """
+    Run `command` with bulk-load index settings and restore the original settings afterwards -
+    whether it succeeds, fails or this process is interrupted. Returns the command's exit code.
+    """
+    child = None
+
+    def on_signal(signum, frame):
+        # Pass the signal on (Ctrl-C already reached the whole process group), then unwind
+        # through the finally block below
+        if child is not None and child.poll() is None and signum != signal.SIGINT:
+            child.send_signal(signum)
+        raise Interrupted(signal.Signals(signum).name)
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, on_signal)
+
+    returncode = 1
+    restored = False
+    try:
+        apply_bulk_load_settings(es)
+        print(f"[Setup] Running: {' '.join(command)}")
+        child = subprocess.Popen(command)
+        returncode = child.wait()
+        if returncode != 0:
+            print(f"[Setup] ERROR: Bulk load command exited with code {returncode}")
+    except Interrupted as e:
+        print(f"[Setup] Interrupted by {e}, restoring index settings...")
+        if child is not None:
+            try:
+                child.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                child.kill()
+        returncode = 130
+    finally:
+        # Restore even if the command failed; ignore further signals until it is done
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_IGN)
+        restored = restore_settings(es)
+
+    if not restored:
+        return returncode or 1  # Index is still in bulk-load mode - don't refresh/merge it
+    if returncode == 0:
+        finish_bulk_load(es, force_merge=force_merge)
+    return returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the workshop index, optionally around a bulk load")
+    parser.add_argument("--tsds", action="store_true",
+                        help="Create o11y-heartbeat as a time-series data stream (service.name dimension, gauge metrics)")
+    parser.add_argument("--look-back", default=TSDS_LOOK_BACK,
+                        help=f"With --tsds: how far back the data stream accepts @timestamps - must cover the backfill "
+                             f"(default: {TSDS_LOOK_BACK}, the maximum)")
+    parser.add_argument("--retention", default=None,
+                        help="With --tsds: delete backing indices older than this, e.g. 30d (default: keep)")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Run the command after -- with refresh off, no replicas and async translog, "
+                             "then restore the original settings and refresh")
+    parser.add_argument("--force-merge", action="store_true",
+                        help="With --bulk-load: force-merge to 1 segment after a successful load")
+    parser.add_argument("--restore", action="store_true",
+                        help=f"Restore settings saved in {BULK_LOAD_STATE_FILE} by an interrupted bulk load")
+    parser.add_argument("command", nargs=argparse.REMAINDER,
+                        help="With --bulk-load: command to run, e.g. -- python3 -u data_sprayer.py --backfill")
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if args.bulk_load and not command:
+        parser.error("--bulk-load needs a command to run after --")
+
+    es = connect()
+
+    if args.restore:
+        if not os.path.exists(BULK_LOAD_STATE_FILE):
+            print(f"[Setup] Nothing to restore ({BULK_LOAD_STATE_FILE} not found)")
+            return
+        sys.exit(0 if restore_settings(es) else 1)
+
+    if args.tsds:
+        create_data_stream(es, look_back=args.look_back, retention=args.retention)
+    else:
+        create_index(es)
+    create_index(es, SUMMARY_INDEX_NAME, SUMMARY_MAPPINGS)
+
+    if args.bulk_load:
+        sys.exit(bulk_load(es, command, force_merge=args.force_merge))
+
 if __name__ == "__main__":
     main()
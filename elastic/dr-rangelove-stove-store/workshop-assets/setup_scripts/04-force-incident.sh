@@ -1,17 +1,40 @@
 #!/bin/bash
 set -e
 
-echo "[Force Incident] Injecting anomalous data for payment-service..."
-
-# Validate required env vars
-: "${ELASTICSEARCH_URL:?ELASTICSEARCH_URL required}"
-: "${ELASTICSEARCH_APIKEY:?ELASTICSEARCH_APIKEY required}"
-
 # Configuration
 SERVICE_NAME="${FORCE_INCIDENT_SERVICE:-payment-service}"
 ANOMALY_LATENCY="${FORCE_INCIDENT_LATENCY:-2500}"
 ERROR_CODE="${FORCE_INCIDENT_ERROR_CODE:-503}"
 DOC_COUNT="${FORCE_INCIDENT_COUNT:-10}"
+DURATION_SECONDS="${FORCE_INCIDENT_DURATION:-15}"
+CONTROL_URL="${SPRAYER_CONTROL_URL:-http://127.0.0.1:8765}"
+
+echo "[Force Incident] Injecting anomalous data for ${SERVICE_NAME}..."
+
+# Preferred: ask the live data sprayer to run the service's scenario - it starts on the
+# sprayer's next tick (under a second) and replies with the exact start/end timestamps.
+# The scenario's own latency/status from scenarios.json apply, so explicit latency, status
+# or doc count settings always index the docs directly instead.
+if [ -n "${FORCE_INCIDENT_LATENCY:-}${FORCE_INCIDENT_ERROR_CODE:-}${FORCE_INCIDENT_COUNT:-}" ]; then
+  echo "[Force Incident] Explicit latency/status/count set - indexing anomalous docs directly"
+elif curl -fsS --max-time 2 "${CONTROL_URL}/status" > /dev/null 2>&1; then
+  echo "[Force Incident] Using data sprayer control endpoint at ${CONTROL_URL} (${DURATION_SECONDS}s)"
+  if RESPONSE=$(curl -sS --max-time 15 -X POST "${CONTROL_URL}/scenario" \
+      -H "Content-Type: application/json" \
+      -d '{"name": "'"${SERVICE_NAME}"'", "duration": '"${DURATION_SECONDS}"'}' \
+      -w '\n%{http_code}' 2>&1) && [ "${RESPONSE##*$'\n'}" = "200" ]; then
+    echo "${RESPONSE%$'\n'*}"
+    echo "[Force Incident] Alert should trigger within 1-2 minutes"
+    exit 0
+  fi
+  echo "[Force Incident] Control endpoint did not start a scenario (${RESPONSE//$'\n'/ }) - indexing anomalous docs directly"
+else
+  echo "[Force Incident] Data sprayer control endpoint not reachable - indexing anomalous docs directly"
+fi
+
+# Validate required env vars
+: "${ELASTICSEARCH_URL:?ELASTICSEARCH_URL required}"
+: "${ELASTICSEARCH_APIKEY:?ELASTICSEARCH_APIKEY required}"
 
 echo "[Force Incident] Config: service=${SERVICE_NAME}, latency=${ANOMALY_LATENCY}ms, status=${ERROR_CODE}, count=${DOC_COUNT}"
 
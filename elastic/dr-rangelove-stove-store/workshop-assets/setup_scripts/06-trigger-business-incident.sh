@@ -1,12 +1,14 @@
 #!/bin/bash
 # Trigger Business Impact Incident
-# Creates a flag file that the data sprayer monitors to inject business-critical degradation
+# Asks the live data sprayer's control endpoint to start it (falls back to the flag file
+# that the data sprayer monitors) to inject business-critical degradation
 # NOTE: This script must be run on kubernetes-vm (where the data sprayer runs)
 
 set -euo pipefail
 
 FLAG_FILE="/tmp/business_incident_active"
 DURATION_MINUTES=5
+CONTROL_URL="${SPRAYER_CONTROL_URL:-http://127.0.0.1:8765}"
 
 echo "=========================================="
 echo "💼 Triggering Business Impact Incident"
@@ -20,15 +22,34 @@ echo ""
 echo "Duration: ${DURATION_MINUTES} minutes"
 echo ""
 
-# Create flag file
-touch "$FLAG_FILE"
-echo "✅ Business incident flag created: $FLAG_FILE"
+STARTED=false
+if curl -fsS --max-time 2 "${CONTROL_URL}/status" > /dev/null 2>&1; then
+  # Starts on the data sprayer's next tick; the reply has the exact start/end timestamps
+  if RESPONSE=$(curl -sS --max-time 15 -X POST "${CONTROL_URL}/business-incident" \
+      -H "Content-Type: application/json" \
+      -d '{"duration": '"$((DURATION_MINUTES * 60))"'}' \
+      -w '\n%{http_code}' 2>&1) && [ "${RESPONSE##*$'\n'}" = "200" ]; then
+    echo "${RESPONSE%$'\n'*}"
+    echo ""
+    echo "✅ Business incident started via the data sprayer control endpoint (${CONTROL_URL})"
+    END_HINT="curl -X POST ${CONTROL_URL}/stop"
+    STARTED=true
+  else
+    echo "⚠️  Control endpoint did not start the incident (${RESPONSE//$'\n'/ }) - using the flag file"
+  fi
+fi
+if [ "$STARTED" = false ]; then
+  # Create flag file
+  touch "$FLAG_FILE"
+  echo "✅ Business incident flag created: $FLAG_FILE"
+  END_HINT="rm $FLAG_FILE"
+fi
 echo ""
 echo "The data sprayer will now inject degraded payment service data."
 echo "You can monitor the impact in Kibana Discover or via your alert rule."
 echo ""
 echo "To end the incident early, run:"
-echo "  rm $FLAG_FILE"
+echo "  ${END_HINT}"
 echo ""
 echo "The incident will auto-end after ${DURATION_MINUTES} minutes."
 echo ""